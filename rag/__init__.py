@@ -2,10 +2,37 @@
 RAG (Retrieval-Augmented Generation) System
 
 A complete RAG implementation using Ollama for embeddings and generation.
+
+Submodules are imported on first attribute access, so `import rag` stays
+cheap; numpy and the ollama client load only when a class is used.
 """
 
-from .vector_store import VectorStore
-from .document_processor import DocumentProcessor
-from .rag_engine import RAGEngine
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .vector_store import VectorStore
+    from .document_processor import DocumentProcessor
+    from .rag_engine import RAGEngine
+
+# Public name -> submodule defining it
+_LAZY = {
+    'VectorStore': '.vector_store',
+    'DocumentProcessor': '.document_processor',
+    'RAGEngine': '.rag_engine',
+}
 
 __all__ = ['VectorStore', 'DocumentProcessor', 'RAGEngine']
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Sequence, Tuple
+import numpy as np
+
+
+class AnswerCache:
+    """
+    Cache of generated answers keyed by question embedding
+
+    A new question is answered from the cache when a cached question is at
+    least `threshold` cosine-similar to it and retrieval returned the same
+    chunk IDs for both, so paraphrases of an earlier question skip the LLM
+    while questions that pull in different context do not.
+
+    Entries are evicted least recently used beyond max_entries and expire
+    after ttl seconds. Every entry belongs to the index version (store and
+    generation) its context was retrieved from and only answers lookups of
+    that version. Entries of superseded versions are never served again and
+    age out; a generation that finishes after an index write still stores
+    its answer under the old version without disturbing newer entries.
+    """
+
+    def __init__(self, max_entries=256, threshold=0.95, ttl=3600.0):
+        """
+        Initialize answer cache
+
+        Args:
+            max_entries: Answers kept before least recently used are evicted
+            threshold: Minimum cosine similarity between questions for a hit
+            ttl: Seconds an answer stays valid (None or 0 = no expiry)
+        """
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl or None
+
+        # key -> (unit question embedding, context IDs, version, result, created)
+        self._entries: 'OrderedDict[int, Tuple[np.ndarray, Tuple[int, ...], Hashable, Dict, float]]' = OrderedDict()
+        self._next_key = 0
+        self._version = None  # Version of the latest lookup, for counting index changes
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0  # Lookups that saw another index version than the previous one
+
+    @staticmethod
+    def _unit(embedding) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    def _expire(self, now: float):
+        """Drop entries older than ttl (lock held)"""
+        if self.ttl is None:
+            return
+        # Hits move entries to the end, so LRU order is not creation order
+        expired = [key for key, entry in self._entries.items() if now - entry[4] > self.ttl]
+        for key in expired:
+            del self._entries[key]
+
+    def lookup(self, embedding, context_ids: Sequence[int], version: Hashable) -> Optional[Dict]:
+        """
+        Cached result for a question, or None
+
+        Args:
+            embedding: Question embedding
+            context_ids: Chunk IDs retrieved for the question
+            version: Index version the context was retrieved from
+        """
+        query = self._unit(embedding)
+        context_ids = tuple(context_ids)
+
+        with self._lock:
+            if version != self._version:
+                if self._version is not None:
+                    self.invalidations += 1
+                self._version = version
+            self._expire(time.monotonic())
+
+            keys = [key for key, entry in self._entries.items() if entry[2] == version]
+            if query is None or not keys:
+                self.misses += 1
+                return None
+
+            matrix = np.stack([self._entries[k][0] for k in keys])
+            if matrix.shape[1] != len(query):
+                self.misses += 1
+                return None
+            similarity = matrix @ query
+
+            # Most similar first: the nearest question above the threshold
+            # with the same context wins
+            for i in np.argsort(-similarity):
+                if similarity[i] < self.threshold:
+                    break
+                entry = self._entries[keys[i]]
+                if entry[1] == context_ids:
+                    self._entries.move_to_end(keys[i])
+                    self.hits += 1
+                    return dict(entry[3], similarity=float(similarity[i]))
+
+            self.misses += 1
+            return None
+
+    def store(self, embedding, context_ids: Sequence[int], version: Hashable, result: Dict):
+        """Remember the result generated for a question"""
+        query = self._unit(embedding)
+        if query is None or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[self._next_key] = (query, tuple(context_ids), version, result, time.monotonic())
+            self._next_key += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Cache size and hit statistics"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'invalidations': self.invalidations
+        }
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Answer a JSONL file of questions offline
+
+Questions are read in batches, embedded with one request per batch and
+retrieved with one scoring pass over the index; answers are generated with
+a bounded number of concurrent Ollama requests and written in input order
+as they complete.
+
+Usage:
+    python batch_qa.py questions.jsonl -o answers.jsonl --index my_index.pkl [--concurrency 4]
+
+Each input line is a JSON object with a "question" field (or a plain JSON
+string); other fields are copied to the output line next to the answer.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List
+
+
+class BatchQA:
+    """
+    Answer many questions with batched retrieval and concurrent generation
+
+    Ollama only runs requests in parallel up to its OLLAMA_NUM_PARALLEL
+    setting; concurrency beyond that just queues on the server.
+    """
+
+    def __init__(self, engine, concurrency: int = 4, batch_size: int = 32, question_field: str = 'question'):
+        """
+        Initialize batch answering
+
+        Args:
+            engine: RAGEngine with an index loaded
+            concurrency: Generation requests in flight at once
+            batch_size: Questions embedded and retrieved together
+            question_field: Field holding the question in input records
+        """
+        self.engine = engine
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.question_field = question_field
+
+    def _generate(self, prompt: str) -> Dict:
+        """Generate one answer, timing it; errors are returned, not raised"""
+        engine = self.engine
+        start = time.perf_counter()
+        try:
+            response = engine.client.chat(
+                model=engine.llm_model,
+                messages=[{'role': 'user', 'content': prompt}],
+                keep_alive=engine.keep_alive
+            )
+        except Exception as e:
+            return {'error': str(e), 'latency': time.perf_counter() - start}
+
+        latency = time.perf_counter() - start
+        engine.record_response(response, latency, latency)
+        return {'response': response, 'latency': latency}
+
+    def _batches(self, items: Iterable) -> Iterator[List[Dict]]:
+        batch = []
+        for item in items:
+            if not isinstance(item, dict):
+                item = {self.question_field: item}
+            batch.append(item)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _record(item: Dict, context: List, outcome: Dict) -> Dict:
+        """Output line: the input record plus answer, sources and timings"""
+        record = dict(item)
+        response = outcome.get('response')
+        record['answer'] = response['message']['content'] if response is not None else None
+        record['sources'] = [
+            metadata.get('filename', metadata.get('source', 'Unknown')) for _, _, metadata in context
+        ]
+        record['latency_sec'] = round(outcome['latency'], 4)
+        if response is not None:
+            record['prompt_tokens'] = response.get('prompt_eval_count')
+            record['response_tokens'] = response.get('eval_count')
+        if 'error' in outcome:
+            record['error'] = outcome['error']
+        return record
+
+    def run(self, items: Iterable, write: Callable[[Dict], None]) -> Dict:
+        """
+        Answer every question, handing output records to `write` in input order
+
+        Args:
+            items: Input records (dicts with the question field, or strings)
+            write: Called with each output record
+
+        Returns:
+            Summary with counts, throughput and latency percentiles
+        """
+        engine = self.engine
+        latencies = []
+        answered = 0
+        failed = 0
+        tokens = 0
+        retrieval_sec = 0.0
+        start = time.perf_counter()
+
+        # Futures in submission order; bounded so a huge input is never
+        # turned into prompts all at once
+        pending = deque()
+        max_pending = max(2 * self.concurrency, self.batch_size)
+
+        def flush_one():
+            nonlocal answered, failed, tokens
+            item, context, future = pending.popleft()
+            outcome = future.result()
+            record = self._record(item, context, outcome)
+            if 'error' in record:
+                failed += 1
+            else:
+                answered += 1
+                latencies.append(outcome['latency'])
+                tokens += record.get('response_tokens') or 0
+            write(record)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='batch-qa') as pool:
+            for batch in self._batches(items):
+                questions = [str(item.get(self.question_field, '')) for item in batch]
+                engine.total_queries += len(batch)
+
+                retrieval_start = time.perf_counter()
+                try:
+                    contexts = engine.retrieve_batch(questions)
+                except Exception as e:
+                    print(f"✗ Retrieval failed for a batch of {len(batch)}: {e}")
+                    contexts = None
+                retrieval_sec += time.perf_counter() - retrieval_start
+
+                for i, (item, question) in enumerate(zip(batch, questions)):
+                    if contexts is None:
+                        future = Future()
+                        future.set_result({'error': 'retrieval failed', 'latency': 0.0})
+                        pending.append((item, [], future))
+                    else:
+                        with engine.metrics.span('context'):
+                            context = engine.context_builder.build(contexts[i])
+                        context = engine.compress_context(question, context)
+                        with engine.metrics.span('prompt'):
+                            prompt = engine.create_rag_prompt(question, context)
+                        pending.append((item, context, pool.submit(self._generate, prompt)))
+
+                    while len(pending) > max_pending:
+                        flush_one()
+
+            while pending:
+                flush_one()
+
+        wall = time.perf_counter() - start
+        engine.last_query_at = time.time()
+        latencies.sort()
+
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+
+        return {
+            'questions': answered + failed,
+            'failed': failed,
+            'wall_sec': wall,
+            'retrieval_sec': retrieval_sec,
+            'questions_per_sec': answered / wall if wall > 0 else 0.0,
+            'tokens_per_sec': tokens / wall if wall > 0 else 0.0,
+            'latency_p50_sec': pct(0.50),
+            'latency_p95_sec': pct(0.95),
+            'latency_p99_sec': pct(0.99),
+            'concurrency': self.concurrency,
+            'batch_size': self.batch_size
+        }
+
+    def answer_file(self, input_path: str, output_path: str) -> Dict:
+        """Answer a JSONL file of questions into a JSONL file of answers"""
+        with open(input_path, encoding='utf-8') as src, open(output_path, 'w', encoding='utf-8') as out:
+            items = (json.loads(line) for line in src if line.strip())
+
+            def write(record):
+                out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                out.flush()
+
+            return self.run(items, write)
+
+
+def print_summary(summary: Dict):
+    """Print the throughput and latency summary of a run"""
+    print("\n" + "=" * 70)
+    print("📊 Batch QA Summary")
+    print("=" * 70)
+    print(f"Questions: {summary['questions']} ({summary['failed']} failed)")
+    print(f"Wall time: {summary['wall_sec']:.2f}s (retrieval {summary['retrieval_sec']:.2f}s)")
+    print(f"Throughput: {summary['questions_per_sec']:.2f} questions/sec, "
+          f"{summary['tokens_per_sec']:.1f} tokens/sec")
+    print(f"Latency: p50 {summary['latency_p50_sec']:.2f}s / p95 {summary['latency_p95_sec']:.2f}s / "
+          f"p99 {summary['latency_p99_sec']:.2f}s")
+    print(f"Concurrency: {summary['concurrency']}, batch size: {summary['batch_size']}")
+    print("=" * 70)
+
+
+def main():
+    import config
+    from rag_engine import RAGEngine
+    from model_warmer import parse_keep_alive
+
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions with RAG")
+    parser.add_argument('input', help="JSONL file of questions")
+    parser.add_argument('-o', '--output', help="JSONL file for answers (default: <input>.answers.jsonl)")
+    parser.add_argument('--index', help="Index file to load")
+    parser.add_argument('--concurrency', type=int, default=config.BATCH_CONCURRENCY,
+                        help="Generation requests in flight")
+    parser.add_argument('--batch-size', type=int, default=config.BATCH_SIZE,
+                        help="Questions embedded and retrieved together")
+    parser.add_argument('--field', default='question', help="Field holding the question")
+    parser.add_argument('--top-k', type=int, default=config.DEFAULT_TOP_K, help="Documents retrieved per question")
+    args = parser.parse_args()
+
+    engine = RAGEngine(
+        llm_model=config.LLM_MODEL,
+        embedding_model=config.EMBEDDING_MODEL,
+        ollama_host=config.OLLAMA_HOST,
+        top_k=args.top_k,
+        min_k=config.TOP_K_MIN,
+        score_gap=config.SCORE_GAP,
+        min_score=config.MIN_SCORE,
+        vector_dtype=config.VECTOR_DTYPE,
+        text_compression=config.TEXT_COMPRESSION,
+        context_budget=config.CONTEXT_BUDGET,
+        compression_budget=config.COMPRESSION_BUDGET,
+        tokenizer=config.TOKENIZER or None,
+        keep_alive=parse_keep_alive(config.KEEP_ALIVE),
+        metrics=config.METRICS,
+        trace_path=config.TRACE_FILE or None
+    )
+    if args.index:
+        if not os.path.exists(args.index):
+            print(f"✗ Index file not found: {args.index}")
+            return 1
+        engine.load_index(args.index)
+
+    output = args.output or os.path.splitext(args.input)[0] + '.answers.jsonl'
+    qa = BatchQA(engine, concurrency=args.concurrency, batch_size=args.batch_size, question_field=args.field)
+    summary = qa.answer_file(args.input, output)
+    print(f"✓ Answers written to {output}")
+    print_summary(summary)
+    return 0 if not summary['failed'] else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
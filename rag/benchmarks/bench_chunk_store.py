@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark memory per chunk: per-chunk lists vs the columnar ChunkStore
+
+Chunks a synthetic corpus of many files and stores the result both ways:
+the previous layout (one text string and one metadata dict per chunk, as
+produced by chunk_text) and ChunkStore (one source text and one interned
+metadata record per file, integer offset columns per chunk). Memory is
+measured with tracemalloc and includes the source texts for ChunkStore.
+Also times reading every chunk back, since ChunkStore builds texts lazily.
+
+Usage:
+    python benchmarks/bench_chunk_store.py [num_files] [file_kb]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunk_store import ChunkStore
+from document_processor import DocumentProcessor
+from bench_chunker import make_corpus
+
+
+def measure(build):
+    """(result, bytes allocated and still held, seconds) of build()"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def main():
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    file_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    size = file_kb * 1000
+    corpus = make_corpus(num_files * size + size)
+    files = [
+        (corpus[i * size:(i + 1) * size], {'source': f"/data/docs/d{i % 32:02d}/doc{i:06d}.txt",
+                                           'filename': f"doc{i:06d}.txt"})
+        for i in range(num_files)
+    ]
+    processor = DocumentProcessor(chunk_size=500, chunk_overlap=50)
+
+    def build_lists():
+        # File texts are dropped after chunking, as when indexing
+        texts, metas = [], []
+        for text, meta in files:
+            for chunk in processor.chunk_text(text, meta):
+                texts.append(chunk['text'])
+                metas.append(chunk['metadata'])
+        return texts, metas
+
+    def build_columnar():
+        store = ChunkStore()
+        for text, meta in files:
+            # Copy so the kept source is counted, like a text read from disk
+            source = text.encode('utf-8').decode('utf-8')
+            for span in processor.chunk_source(source, dict(meta)).spans():
+                store.add_span(*span)
+        return store
+
+    (texts, metas), list_bytes, list_time = measure(build_lists)
+    store, store_bytes, store_time = measure(build_columnar)
+    num_chunks = len(texts)
+    assert len(store) == num_chunks
+
+    start = time.perf_counter()
+    for row in range(num_chunks):
+        store.text(row)
+        store.metadata(row)
+    read_time = time.perf_counter() - start
+
+    print("=" * 70)
+    print(f"{num_files} files x {file_kb} KB, {num_chunks} chunks")
+    print("=" * 70)
+    print(f"{'layout':<22}{'MB':>10}{'bytes/chunk':>14}{'build (s)':>12}")
+    print("-" * 70)
+    print(f"{'per-chunk lists':<22}{list_bytes / 1e6:>10.1f}{list_bytes / num_chunks:>14.0f}{list_time:>12.2f}")
+    print(f"{'ChunkStore':<22}{store_bytes / 1e6:>10.1f}{store_bytes / num_chunks:>14.0f}{store_time:>12.2f}")
+    print("-" * 70)
+    print(f"Memory reduction: {list_bytes / store_bytes:.2f}x")
+    list_text = sum(sys.getsizeof(t) for t in texts)
+    store_text = sum(sys.getsizeof(t) for t in store._sources)
+    print(f"Excluding text: {(list_bytes - list_text) / num_chunks:.0f} → "
+          f"{(store_bytes - store_text) / num_chunks:.0f} bytes/chunk "
+          f"(text {list_text / num_chunks:.0f} → {store_text / num_chunks:.0f} bytes/chunk)")
+    print(f"ChunkStore.memory_bytes() estimate: {store.memory_bytes() / num_chunks:.0f} bytes/chunk")
+    print(f"Lazy read of every chunk: {read_time / num_chunks * 1e6:.2f} µs/chunk")
+
+    same = all(store.text(i) == texts[i] and store.metadata(i) == metas[i] for i in range(num_chunks))
+    print(f"Same texts and metadata: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold start: process start to first answer
+
+Every measurement runs in a fresh interpreter and reports milliseconds from
+process launch to each milestone, median over several runs:
+
+- bare interpreter and `import rag`
+- CLI startup: import rag_bot, build the RAGBot and open the index lazily;
+  checked against STARTUP_BUDGET_MS (exit status 1 when over budget)
+- eager vs lazy index opening up to the first search, on a synthetic index
+  of random vectors (no Ollama needed)
+- with --index and a running Ollama: first answer to --question
+
+Usage:
+    python benchmarks/bench_cold_start.py [--index my_index.pkl] [--question "..."]
+                                          [--runs 5] [--budget 300] [--vectors 50000] [--dim 768]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAG_DIR)
+
+OLLAMA_HOST = os.getenv('OLLAMA_HOST', 'http://localhost:11434')
+
+# Runs in the child interpreter: argv = [mode, index, question]; prints the
+# wall-clock time of each milestone as JSON on the last line
+CHILD = r'''
+import contextlib, json, os, sys, time
+marks = {}
+mode, index, question = sys.argv[1:4]
+sys.path.insert(0, os.getcwd())
+with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+    import rag_bot
+    marks['import'] = time.time()
+    bot = rag_bot.RAGBot()
+    marks['engine'] = time.time()
+    if index:
+        bot.engine.load_index(index, lazy=mode != 'eager')
+        marks['open'] = time.time()
+    if mode in ('eager', 'lazy'):
+        import numpy as np
+        store = bot.engine.vector_store
+        store.search_by_embedding(np.random.default_rng(0).standard_normal(store.embedding_dim), 3)
+        marks['first_search'] = time.time()
+    elif mode == 'answer':
+        result = bot.engine.query(question, show_stats=False)
+        marks['first_answer'] = time.time()
+print(json.dumps(marks))
+'''
+
+
+def run_child(args, runs, cwd=RAG_DIR):
+    """Median milliseconds from launch to each milestone the child reports"""
+    samples = {}
+    for _ in range(runs):
+        start = time.time()
+        out = subprocess.run([sys.executable, *args], cwd=cwd, capture_output=True, text=True, check=True)
+        marks = json.loads(out.stdout.strip().splitlines()[-1])
+        for name, ts in marks.items():
+            samples.setdefault(name, []).append((ts - start) * 1000)
+    return {name: statistics.median(values) for name, values in samples.items()}
+
+
+def build_index(path, n, dim):
+    """Synthetic index of random vectors, inserted without Ollama"""
+    import numpy as np
+    from vector_store import VectorStore
+
+    rng = np.random.default_rng(0)
+    store = VectorStore(embedding_model='bench', dtype='float32')
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    for i, vec in enumerate(vectors):
+        store._append(f"synthetic document {i} " * 8, vec, {'source': f"doc{i // 10}.txt"})
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        store.save(path)
+
+
+def ollama_available():
+    from ollama_client import server_version
+    try:
+        server_version(OLLAMA_HOST, timeout=1.0)
+        return True
+    except Exception:
+        return False
+
+
+def main():
+    from config import STARTUP_BUDGET_MS
+
+    parser = argparse.ArgumentParser(description="Measure process start to first answer")
+    parser.add_argument('--index', help="Index file for the first-answer measurement")
+    parser.add_argument('--question', default="What is Python?", help="Question for the first answer")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh processes per measurement")
+    parser.add_argument('--budget', type=float, default=STARTUP_BUDGET_MS, help="CLI startup budget in ms")
+    parser.add_argument('--vectors', type=int, default=50_000, help="Synthetic index size")
+    parser.add_argument('--dim', type=int, default=768, help="Synthetic embedding dimension")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic = os.path.join(tmp, 'synthetic.pkl')
+        print(f"Building synthetic index ({args.vectors} x {args.dim})...")
+        build_index(synthetic, args.vectors, args.dim)
+        size_mb = (os.path.getsize(synthetic) + os.path.getsize(synthetic + '.vectors.npy')) / 1e6
+
+        mark = 'import json, time; {}print(json.dumps({{"ready": time.time()}}))'
+        rows = [
+            ("bare interpreter", run_child(['-c', mark.format('')], args.runs), 'ready'),
+            ("import rag", run_child(['-c', mark.format('import rag; ')], args.runs,
+                                     cwd=os.path.dirname(RAG_DIR)), 'ready'),
+        ]
+        cli = run_child(['-c', CHILD, 'open', synthetic, ''], args.runs)
+        rows.append(("import rag_bot", cli, 'import'))
+        rows.append(("RAGBot()", cli, 'engine'))
+        rows.append(("lazy index open", cli, 'open'))
+        eager = run_child(['-c', CHILD, 'eager', synthetic, ''], args.runs)
+        lazy = run_child(['-c', CHILD, 'lazy', synthetic, ''], args.runs)
+        rows.append(("eager open", eager, 'open'))
+        rows.append(("eager first search", eager, 'first_search'))
+        rows.append(("lazy first search", lazy, 'first_search'))
+
+    if args.index and ollama_available():
+        answer = run_child(['-c', CHILD, 'answer', os.path.abspath(args.index), args.question], args.runs)
+        rows.append(("first answer", answer, 'first_answer'))
+    elif args.index:
+        print(f"⚠️  Ollama not reachable at {OLLAMA_HOST}, skipping the first-answer measurement")
+
+    print("=" * 60)
+    print(f"Cold start, median of {args.runs} runs (synthetic index {size_mb:.0f} MB)")
+    print("=" * 60)
+    print(f"{'milestone':<28}{'ms since launch':>18}")
+    print("-" * 60)
+    for name, marks, key in rows:
+        print(f"{name:<28}{marks[key]:>18.0f}")
+    print("=" * 60)
+
+    startup = cli['open']
+    if startup > args.budget:
+        print(f"✗ CLI startup {startup:.0f} ms exceeds the {args.budget:.0f} ms budget")
+        return 1
+    print(f"✓ CLI startup {startup:.0f} ms within the {args.budget:.0f} ms budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
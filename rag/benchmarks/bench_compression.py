@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark extractive context compression
+
+Indexes a directory (default: the repo's data/ and docs/ folders) and, for
+every golden question (default: data/eval/*.jsonl), builds the RAG prompt
+from the packed top-k context as is and compressed by SentenceCompressor at
+several token budgets. Reports the prompt tokens and prompt eval time
+Ollama measured (one generated token per prompt), the local token estimate,
+the compression time per question, and how often the context still holds a
+relevant passage (source and evidence phrase, see eval_harness.is_relevant).
+
+Compression time includes embedding the sentences; the first budget pays
+for the embedding requests, later budgets hit the sentence cache.
+
+Needs a running Ollama with the embedding and LLM models (OLLAMA_HOST,
+EMBEDDING_MODEL, MODEL_NAME); without the LLM only the estimate is shown.
+EMBEDDING_MODEL=hash runs the retrieval side offline.
+
+Usage:
+    python benchmarks/bench_compression.py [directory] [--golden data/eval] [--top-k 5]
+                                           [--budgets 400,200,100]
+"""
+
+import argparse
+import contextlib
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from context_compressor import SentenceCompressor
+from eval_harness import is_relevant, load_golden_set
+from rag_engine import RAGEngine
+from tokenizer import count_tokens
+
+OLLAMA_HOST = os.getenv('OLLAMA_HOST', 'http://localhost:11434')
+MODEL_NAME = os.getenv('MODEL_NAME', 'llama3.1')
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'nomic-embed-text')
+
+
+def prompt_eval(engine, prompt):
+    """(prompt_eval_count, prompt eval ms) reported by Ollama"""
+    response = engine.client.chat(
+        model=engine.llm_model,
+        messages=[{'role': 'user', 'content': prompt}],
+        options={'num_predict': 1}
+    )
+    return response['prompt_eval_count'], response.get('prompt_eval_duration', 0) / 1e6
+
+
+def main():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Measure prompt evaluation with and without context compression")
+    parser.add_argument('directory', nargs='?', default=root, help="Documents to index (default: this repo)")
+    parser.add_argument('--golden', default=os.path.join(root, 'data', 'eval'), help="Golden set JSONL file or directory")
+    parser.add_argument('--top-k', type=int, default=5, help="Chunks retrieved per question")
+    parser.add_argument('--budgets', default='400,200,100', help="Comma-separated compression token budgets")
+    args = parser.parse_args()
+
+    golden = load_golden_set(args.golden)
+    engine = RAGEngine(llm_model=MODEL_NAME, embedding_model=EMBEDDING_MODEL,
+                       ollama_host=OLLAMA_HOST, top_k=args.top_k, metrics=False)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        engine.index_from_directory(args.directory, '**/*.md, **/*.txt', workers=1)
+
+    configs = [('uncompressed', None)] + [
+        (f"compressed {budget}", SentenceCompressor(budget)) for budget in (int(b) for b in args.budgets.split(','))
+    ]
+    rows = {name: {'estimate': [], 'evaluated': [], 'eval_ms': [], 'compress_ms': [], 'recall': []}
+            for name, _ in configs}
+    embedder = engine.vector_store.embedder
+    use_llm = True
+
+    for item in golden:
+        question = item['question']
+        results, _, embedding, _ = engine.retrieve_detailed(question)
+        packed = engine.context_builder.build(results)
+        for name, compressor in configs:
+            start = time.perf_counter()
+            context = packed if compressor is None else compressor.compress(question, packed, embedder, embedding)
+            row = rows[name]
+            row['compress_ms'].append((time.perf_counter() - start) * 1000)
+
+            prompt = engine.create_rag_prompt(question, context)
+            row['estimate'].append(count_tokens(prompt))
+            row['recall'].append(any(is_relevant(text, meta, item) for text, _, meta in context))
+            if use_llm:
+                try:
+                    count, ms = prompt_eval(engine, prompt)
+                    row['evaluated'].append(count)
+                    row['eval_ms'].append(ms)
+                except Exception as e:
+                    print(f"⚠️  LLM unavailable ({e}), showing estimated tokens only")
+                    use_llm = False
+
+    if not use_llm:
+        for row in rows.values():
+            row['evaluated'].clear()
+            row['eval_ms'].clear()
+
+    base = rows['uncompressed']
+    base_tokens = statistics.mean(base['evaluated'] or base['estimate'])
+    base_ms = statistics.mean(base['eval_ms']) if base['eval_ms'] else None
+    print("=" * 94)
+    print(f"{len(golden)} questions, top_k={args.top_k}, {len(engine.vector_store)} chunks, "
+          f"embeddings {engine.vector_store.embedding_model}, LLM {MODEL_NAME}")
+    print("=" * 94)
+    print(f"{'context':<18}{'est. tokens':>12}{'prompt_eval':>13}{'reduction':>11}{'eval ms':>10}"
+          f"{'eval gain':>11}{'compress ms':>13}{'recall':>8}")
+    print("-" * 94)
+    for name, _ in configs:
+        row = rows[name]
+        evaluated = statistics.mean(row['evaluated']) if row['evaluated'] else None
+        measured = evaluated if evaluated is not None else statistics.mean(row['estimate'])
+        if evaluated is not None:
+            eval_ms = statistics.mean(row['eval_ms'])
+            llm_text = f"{evaluated:>13.0f}{1 - measured / base_tokens:>11.1%}{eval_ms:>10.0f}"
+            llm_text += f"{1 - eval_ms / base_ms:>11.1%}" if base_ms else f"{'-':>11}"
+        else:
+            llm_text = f"{'-':>13}{1 - measured / base_tokens:>11.1%}{'-':>10}{'-':>11}"
+        print(f"{name:<18}{statistics.mean(row['estimate']):>12.0f}{llm_text}"
+              f"{statistics.mean(row['compress_ms']):>13.2f}{statistics.mean(row['recall']):>8.0%}")
+    print("=" * 94)
+    print("eval gain: prompt eval time saved; compare it with compress ms, which the query pays instead")
+    print("Ollama reuses cached prompt prefixes between requests, which can lower prompt_eval for every row")
+
+
+if __name__ == "__main__":
+    main()
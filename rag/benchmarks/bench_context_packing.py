@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark prompt context packing
+
+Indexes a directory (default: the repo's data/ and docs/ folders) and, for
+every question of an eval set (default: data/eval/*.jsonl), builds the RAG
+prompt from the top-k retrieved chunks verbatim and with ContextBuilder at
+several token budgets. Reports the prompt tokens Ollama evaluated
+(prompt_eval_count, one generated token per prompt), the prompt eval time,
+the local token estimate, and how often a chunk of one of the question's
+expected sources is still in the context.
+
+Eval set lines are JSON objects: {"question": ..., "sources": [filename, ...]}.
+
+Needs a running Ollama with the embedding and LLM models (OLLAMA_HOST,
+EMBEDDING_MODEL, MODEL_NAME); without the LLM only the estimate is shown.
+
+Usage:
+    python benchmarks/bench_context_packing.py [directory] [eval.jsonl | eval_dir] [top_k] [budget,...]
+"""
+
+import contextlib
+import json
+import os
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from context_builder import ContextBuilder
+from rag_engine import RAGEngine
+from tokenizer import count_tokens
+
+OLLAMA_HOST = os.getenv('OLLAMA_HOST', 'http://localhost:11434')
+MODEL_NAME = os.getenv('MODEL_NAME', 'llama3.1')
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'nomic-embed-text')
+
+
+def load_eval_set(path):
+    """Eval questions from a JSONL file or every *.jsonl file of a directory"""
+    path = Path(path)
+    files = sorted(path.glob('*.jsonl')) if path.is_dir() else [path]
+    items = []
+    for file in files:
+        with open(file, encoding='utf-8') as f:
+            items.extend(json.loads(line) for line in f if line.strip())
+    return items
+
+
+def prompt_eval(engine, prompt):
+    """(prompt_eval_count, prompt_eval seconds) reported by Ollama"""
+    response = engine.client.chat(
+        model=engine.llm_model,
+        messages=[{'role': 'user', 'content': prompt}],
+        options={'num_predict': 1}
+    )
+    return response['prompt_eval_count'], response.get('prompt_eval_duration', 0) / 1e9
+
+
+def has_source(context, sources):
+    """Whether any context passage comes from one of the expected sources"""
+    names = {os.path.basename(s) for s in sources}
+    return any(os.path.basename(meta.get('source', '')) in names for _, _, meta in context)
+
+
+def main():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    directory = sys.argv[1] if len(sys.argv) > 1 else root
+    eval_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(root, 'data', 'eval')
+    top_k = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    budgets = [int(b) for b in sys.argv[4].split(',')] if len(sys.argv) > 4 else [0, 512, 256]
+
+    questions = load_eval_set(eval_path)
+    engine = RAGEngine(llm_model=MODEL_NAME, embedding_model=EMBEDDING_MODEL,
+                       ollama_host=OLLAMA_HOST, top_k=top_k)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        engine.index_from_directory(directory, '**/*.md, **/*.txt', workers=1)
+
+    configs = [('verbatim', None)] + [
+        (f"packed {budget or 'unlimited'}", ContextBuilder(budget)) for budget in budgets
+    ]
+    use_llm = True
+    rows = {name: {'estimate': [], 'evaluated': [], 'seconds': [], 'recall': []} for name, _ in configs}
+
+    for item in questions:
+        question = item['question']
+        retrieved = engine.retrieve(question)
+        for name, builder in configs:
+            context = retrieved if builder is None else builder.build(retrieved)
+            prompt = engine.create_rag_prompt(question, context)
+            row = rows[name]
+            row['estimate'].append(count_tokens(prompt))
+            row['recall'].append(has_source(context, item.get('sources', [])))
+            if use_llm:
+                try:
+                    count, seconds = prompt_eval(engine, prompt)
+                    row['evaluated'].append(count)
+                    row['seconds'].append(seconds)
+                except Exception as e:
+                    print(f"⚠️  LLM unavailable ({e}), showing estimated tokens only")
+                    use_llm = False
+
+    if not use_llm:
+        for row in rows.values():
+            row['evaluated'].clear()
+
+    base = statistics.mean(rows['verbatim']['evaluated'] or rows['verbatim']['estimate'])
+    print("=" * 82)
+    print(f"{len(questions)} questions, top_k={top_k}, {len(engine.vector_store)} chunks, LLM {MODEL_NAME}")
+    print("=" * 82)
+    print(f"{'context':<20}{'est. tokens':>12}{'prompt_eval':>13}{'reduction':>11}{'eval ms':>10}{'src recall':>12}")
+    print("-" * 82)
+    for name, _ in configs:
+        row = rows[name]
+        evaluated = statistics.mean(row['evaluated']) if row['evaluated'] else None
+        measured = evaluated if evaluated is not None else statistics.mean(row['estimate'])
+        evaluated_text = f"{evaluated:>13.0f}" if evaluated is not None else f"{'-':>13}"
+        seconds_text = f"{statistics.mean(row['seconds']) * 1000:>10.0f}" if evaluated is not None else f"{'-':>10}"
+        print(f"{name:<20}{statistics.mean(row['estimate']):>12.0f}{evaluated_text}"
+              f"{1 - measured / base:>11.1%}{seconds_text}{statistics.mean(row['recall']):>12.0%}")
+    print("=" * 82)
+    print("Ollama reuses cached prompt prefixes between requests, which can lower prompt_eval for every row")
+
+
+if __name__ == "__main__":
+    main()
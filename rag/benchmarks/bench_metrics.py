@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark the overhead of latency spans
+
+Times an empty `with metrics.span(...)` block with metrics disabled,
+enabled, and enabled with a JSONL trace file. A query records about ten
+spans and observations, against an embedding call of several
+milliseconds and a generation of seconds.
+
+Usage:
+    python benchmarks/bench_metrics.py [iterations]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Metrics
+
+
+def per_span_ns(metrics, iterations):
+    """Mean nanoseconds per empty span"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with metrics.span('search'):
+            pass
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configs = [
+            ('disabled', Metrics(enabled=False)),
+            ('enabled', Metrics()),
+            ('enabled + trace', Metrics(trace_path=os.path.join(tmp, 'trace.jsonl'))),
+        ]
+
+        baseline_start = time.perf_counter()
+        for _ in range(iterations):
+            pass
+        loop_ns = (time.perf_counter() - baseline_start) / iterations * 1e9
+
+        print("=" * 62)
+        print(f"{'metrics':<20}{'ns/span':>10}{'µs/query':>12}{'of 10 ms retrieval':>20}")
+        print("-" * 62)
+        for name, metrics in configs:
+            ns = per_span_ns(metrics, iterations) - loop_ns
+            per_query = ns * 10
+            print(f"{name:<20}{ns:>10.0f}{per_query / 1000:>12.1f}{per_query / 10_000_000:>20.3%}")
+            metrics.close()
+        print("=" * 62)
+
+
+if __name__ == "__main__":
+    main()
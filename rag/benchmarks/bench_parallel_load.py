@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark parallel directory loading and chunking
+
+Generates a tree of small text files (default 100k, nested two levels deep)
+and reads and chunks it through DocumentProcessor.iter_paths_sources with
+one process and with every CPU. Reports files/s, MB/s and CPU utilization
+(CPU seconds across all processes per wall second).
+
+Usage:
+    python benchmarks/bench_parallel_load.py [num_files] [tree_dir]
+"""
+
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from document_processor import DocumentProcessor
+from bench_chunker import make_corpus
+
+
+def build_tree(root, num_files):
+    """Write num_files files of ~4 KB under root/dNN/dNN/"""
+    corpus = make_corpus(num_files * 4000 + 4000)
+    for i in range(num_files):
+        sub = os.path.join(root, f"d{i % 32:02d}", f"d{(i // 32) % 32:02d}")
+        os.makedirs(sub, exist_ok=True)
+        ext = 'md' if i % 2 else 'txt'
+        with open(os.path.join(sub, f"doc{i:06d}.{ext}"), 'w', encoding='utf-8') as f:
+            f.write(corpus[i * 4000:(i + 1) * 4000])
+
+
+def run(processor, root, workers):
+    t0 = time.perf_counter()
+    cpu0 = os.times()
+    chunks = 0
+    size = 0
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        paths = processor.find_files(root, '**/*.md, **/*.txt')
+        for source in processor.iter_paths_sources(paths, workers=workers):
+            chunks += len(source.starts)
+            size += len(source.text)
+    wall = time.perf_counter() - t0
+    cpu1 = os.times()
+    cpu = (cpu1.user - cpu0.user) + (cpu1.system - cpu0.system) \
+        + (cpu1.children_user - cpu0.children_user) + (cpu1.children_system - cpu0.children_system)
+    return wall, cpu, chunks, size
+
+
+def main():
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    root = sys.argv[2] if len(sys.argv) > 2 else None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = root or tmp
+        if not os.path.exists(os.path.join(root, 'd00')):
+            print(f"Writing {num_files} files to {root}...")
+            build_tree(root, num_files)
+
+        processor = DocumentProcessor(chunk_size=500, chunk_overlap=50)
+        files = len(processor.find_files(root, '**/*.md, **/*.txt'))
+
+        print("=" * 70)
+        print(f"{'workers':<10}{'time (s)':>10}{'files/s':>12}{'MB/s':>10}{'CPU util':>12}{'chunks':>12}")
+        print("-" * 70)
+        results = {}
+        for workers in (1, os.cpu_count() or 1):
+            wall, cpu, chunks, size = run(processor, root, workers)
+            results[workers] = chunks
+            print(f"{workers:<10}{wall:>10.2f}{files / wall:>12.0f}{size / 1e6 / wall:>10.1f}"
+                  f"{cpu / wall:>12.2f}{chunks:>12}")
+        print("=" * 70)
+        print(f"Same chunk count: {len(set(results.values())) == 1}")
+
+
+if __name__ == "__main__":
+    main()
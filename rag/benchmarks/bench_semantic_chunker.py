@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark semantic chunking against the fixed-size chunker
+
+Chunks a directory (default: the repo's data/ and docs/ folders) both ways
+and reports chunking throughput, chunk counts and sizes, and sentence
+embedding cache statistics. Then indexes both chunkings and, for a set of
+questions, reports the average prompt tokens of the RAG prompt built from
+the top-k retrieved chunks.
+
+Needs a running Ollama with the embedding model (OLLAMA_HOST,
+EMBEDDING_MODEL).
+
+Usage:
+    python benchmarks/bench_semantic_chunker.py [directory] [top_k] [questions.txt]
+
+questions.txt holds one question per line; the default questions are about
+the demo documents.
+"""
+
+import contextlib
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from document_processor import DocumentProcessor
+from embedding_cache import get_embedding_cache
+from rag_engine import RAGEngine
+from tokenizer import count_tokens
+
+OLLAMA_HOST = os.getenv('OLLAMA_HOST', 'http://localhost:11434')
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'nomic-embed-text')
+
+DEFAULT_QUESTIONS = [
+    "What is Python used for?",
+    "Who created Python and when was it released?",
+    "What are the three main types of machine learning?",
+    "What are the components of a RAG system?",
+    "Why do RAG systems reduce hallucinations?",
+    "How are documents split into chunks?",
+    "How does the vector store find similar documents?",
+    "What is chunk overlap for?",
+]
+
+
+def chunk_all(processor, paths):
+    """(chunk_texts, chunk_metadata, seconds) for every file"""
+    texts, metas = [], []
+    start = time.perf_counter()
+    for path in paths:
+        for chunk in processor.chunk_text(processor.load_text_file(str(path)), {'source': str(path)}):
+            texts.append(chunk['text'])
+            metas.append(chunk['metadata'])
+    return texts, metas, time.perf_counter() - start
+
+
+def prompt_tokens(texts, metas, questions, top_k):
+    """Average tokens of the RAG prompt over questions"""
+    engine = RAGEngine(embedding_model=EMBEDDING_MODEL, ollama_host=OLLAMA_HOST, top_k=top_k)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        engine.index_documents(texts, metas)
+    counts = []
+    for question in questions:
+        context = engine.retrieve(question)
+        counts.append(count_tokens(engine.create_rag_prompt(question, context)))
+    return statistics.mean(counts)
+
+
+def main():
+    default = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    directory = sys.argv[1] if len(sys.argv) > 1 else default
+    top_k = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    if len(sys.argv) > 3:
+        with open(sys.argv[3], encoding='utf-8') as f:
+            questions = [line.strip() for line in f if line.strip()]
+    else:
+        questions = DEFAULT_QUESTIONS
+
+    paths = DocumentProcessor.find_files(directory, '**/*.md, **/*.txt')
+    size_mb = sum(p.stat().st_size for p in paths) / 1e6
+    cache = get_embedding_cache(EMBEDDING_MODEL, OLLAMA_HOST)
+
+    fixed = DocumentProcessor(chunk_size=500, chunk_overlap=50)
+    semantic = DocumentProcessor(chunk_size=500, strategy='semantic',
+                                 embedding_model=EMBEDDING_MODEL, ollama_host=OLLAMA_HOST)
+
+    results = {}
+    for name, processor in (('fixed', fixed), ('semantic', semantic), ('semantic (cached)', semantic)):
+        texts, metas, elapsed = chunk_all(processor, paths)
+        sizes = [count_tokens(t) for t in texts]
+        results[name] = (texts, metas, elapsed, sizes)
+
+    print("=" * 78)
+    print(f"{len(paths)} files, {size_mb:.2f} MB, embedding model {EMBEDDING_MODEL}")
+    print("=" * 78)
+    print(f"{'chunker':<20}{'time (s)':>10}{'MB/s':>10}{'chunks':>10}{'mean tok':>10}{'max tok':>10}")
+    print("-" * 78)
+    for name, (texts, _, elapsed, sizes) in results.items():
+        print(f"{name:<20}{elapsed:>10.2f}{size_mb / elapsed:>10.2f}{len(texts):>10}"
+              f"{statistics.mean(sizes):>10.0f}{max(sizes):>10}")
+    print("-" * 78)
+    stats = cache.stats()
+    print(f"Sentence embedding cache: {stats['entries']} entries, {stats['requests']} requests, "
+          f"hit rate {stats['hit_rate']:.0%}")
+
+    print(f"\nAverage prompt tokens over {len(questions)} questions (top_k={top_k}):")
+    for name in ('fixed', 'semantic'):
+        texts, metas, _, _ = results[name]
+        print(f"  {name:<10}{prompt_tokens(texts, metas, questions, top_k):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
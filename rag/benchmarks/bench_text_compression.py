@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark compressed document text storage
+
+Indexes the chunks of a text directory (default: the repo's docs/ and
+data/ folders, or a synthetic corpus when given a size) into ChunkStores
+with plain text and with zlib / zstd blocks of several sizes. Reports the
+text footprint in memory and in the pickled index, and the latency of
+reading top-k chunk texts at random rows (cold block cache, then rerun).
+
+Usage:
+    python benchmarks/bench_text_compression.py [directory | synthetic_mb] [top_k]
+"""
+
+import os
+import pickle
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunk_store import ChunkStore
+from document_processor import DocumentProcessor
+from text_blocks import zstandard
+from bench_chunker import make_corpus
+
+
+def load_sources(processor, target):
+    """SourceChunks of a directory, or of a synthetic corpus of target MB"""
+    if target.replace('.', '', 1).isdigit():
+        corpus = make_corpus(int(float(target) * 1e6))
+        size = 8000
+        return [
+            processor.chunk_source(corpus[i:i + size], {'source': f"doc{i // size:06d}.txt"})
+            for i in range(0, len(corpus), size)
+        ]
+
+    paths = processor.find_files(target, '**/*.md, **/*.txt')
+    return [
+        processor.chunk_source(processor.load_text_file(str(p)), {'source': str(p), 'filename': p.name})
+        for p in paths
+    ]
+
+
+def text_bytes(store):
+    """Bytes held for document text alone"""
+    if store.compression:
+        return store._blocks.nbytes
+    return sum(sys.getsizeof(s) for s in store._sources)
+
+
+def read_latency(store, rows, top_k):
+    """Mean µs to read top_k chunk texts: cold block cache, then the same rows again"""
+    if store.compression:
+        store._blocks._cache.clear()
+    results = []
+    for _ in range(2):
+        start = time.perf_counter()
+        for i in range(0, len(rows), top_k):
+            for row in rows[i:i + top_k]:
+                store.text(row)
+        results.append((time.perf_counter() - start) / (len(rows) / top_k) * 1e6)
+    return results
+
+
+def main():
+    default = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    target = sys.argv[1] if len(sys.argv) > 1 else default
+    top_k = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    processor = DocumentProcessor(chunk_size=500, chunk_overlap=50)
+    sources = load_sources(processor, target)
+
+    configs = [(None, 0)]
+    codecs = ['zlib'] + (['zstd'] if zstandard is not None else [])
+    for codec in codecs:
+        for block_kb in (4, 16, 64):
+            configs.append((codec, block_kb))
+
+    rng = random.Random(0)
+    plain = None
+    rows = None
+
+    utf8 = sum(len(s.text.encode('utf-8')) for s in sources)
+
+    print("=" * 86)
+    print(f"{'storage':<14}{'text MB':>10}{'ratio':>8}{'vs UTF-8':>10}{'file MB':>10}{'build (s)':>11}"
+          f"{'top-k cold µs':>14}{'rerun µs':>9}")
+    print("-" * 86)
+    for codec, block_kb in configs:
+        store = ChunkStore(codec, block_size=block_kb * 1024 or 1 << 14)
+        start = time.perf_counter()
+        for source in sources:
+            for span in source.spans():
+                store.add_span(*span)
+        build = time.perf_counter() - start
+
+        if rows is None:
+            rows = [rng.randrange(len(store)) for _ in range(top_k * 2000)]
+        cold, warm = read_latency(store, rows, top_k)
+        size = text_bytes(store)
+        file_size = len(pickle.dumps(store.to_dict(), protocol=pickle.HIGHEST_PROTOCOL))
+
+        if plain is None:
+            plain = (size, [store.text(i) for i in range(len(store))])
+            name = 'plain'
+        else:
+            name = f"{codec} {block_kb}K"
+            assert [store.text(i) for i in range(len(store))] == plain[1]
+
+        print(f"{name:<14}{size / 1e6:>10.2f}{plain[0] / size:>8.2f}{utf8 / size:>10.2f}{file_size / 1e6:>10.2f}"
+              f"{build:>11.2f}{cold:>14.1f}{warm:>9.1f}")
+    print("=" * 86)
+    print(f"{len(sources)} sources, {len(plain[1])} chunks, {utf8 / 1e6:.2f} MB UTF-8; "
+          f"plain size counts Python str objects")
+    if zstandard is None:
+        print("zstandard not installed: zstd rows skipped")
+
+
+if __name__ == "__main__":
+    main()
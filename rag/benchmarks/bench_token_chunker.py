@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark token-budget chunking against the character chunker
+
+For an English and a CJK corpus, reports chunking throughput and how many
+tokens each chunk ends up with. Character chunks of 500 give very different
+token counts per language; token chunks stay at the budget.
+
+Usage:
+    python benchmarks/bench_token_chunker.py [size_mb] [tokenizer]
+
+tokenizer is a Hugging Face repo id or tokenizer.json path (requires the
+tokenizers package); the default is the built-in approximation.
+"""
+
+import os
+import sys
+import time
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from document_processor import DocumentProcessor
+from tokenizer import get_tokenizer
+from bench_chunker import make_corpus
+
+CJK_SENTENCES = [
+    "檢索增強生成結合了資訊檢索與文本生成。",
+    "向量資料庫儲存文件的嵌入表示！",
+    "查詢時系統先找出最相關的文件片段。",
+    "大型語言模型根據檢索到的上下文回答問題？",
+    "分塊大小會影響檢索品質與提示長度。\n",
+]
+
+
+def make_cjk_corpus(size_bytes):
+    parts, total, i = [], 0, 0
+    while total < size_bytes:
+        sentence = CJK_SENTENCES[i % len(CJK_SENTENCES)]
+        parts.append(sentence)
+        total += len(sentence.encode('utf-8'))
+        i += 1
+    return "".join(parts)
+
+
+def run(name, processor, text, tokenizer):
+    start = time.perf_counter()
+    chunks = processor.chunk_text(text)
+    elapsed = time.perf_counter() - start
+    mb = len(text.encode('utf-8')) / 1e6
+
+    # Token statistics on a sample to keep the benchmark quick
+    sample = chunks[:: max(1, len(chunks) // 2000)]
+    counts = [tokenizer.count(c['text']) for c in sample]
+    print(f"{name:<22}{mb / elapsed:>10.1f}{len(chunks):>10}"
+          f"{statistics.mean(counts):>12.1f}{statistics.pstdev(counts):>10.1f}{max(counts):>8}")
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 20
+    tokenizer_name = sys.argv[2] if len(sys.argv) > 2 else None
+    tokenizer = get_tokenizer(tokenizer_name)
+
+    corpora = {
+        'English': make_corpus(int(size_mb * 1e6)),
+        'CJK': make_cjk_corpus(int(size_mb * 1e6)),
+    }
+
+    for name, text in corpora.items():
+        print("=" * 72)
+        print(f"{name} corpus, {size_mb:g} MB, tokenizer: {tokenizer.name}")
+        print("-" * 72)
+        print(f"{'chunker':<22}{'MB/s':>10}{'chunks':>10}{'tok/chunk':>12}{'stdev':>10}{'max':>8}")
+        run("chars 500/50", DocumentProcessor(500, 50), text, tokenizer)
+        run("tokens 128/16", DocumentProcessor(128, 16, chunk_unit='tokens', tokenizer=tokenizer_name), text, tokenizer)
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark VectorStore storage dtypes
+
+Compares search latency, memory and top-k agreement of the matrix store in
+float64 / float32 / float16 (and bfloat16 when ml_dtypes is installed)
+against the original list-of-float64-arrays implementation. Half precision
+is measured with the float32 scoring copy (memory includes it) and with
+per-search block upcasting.
+No Ollama server is needed: random embeddings are inserted directly.
+
+Usage:
+    python benchmarks/bench_vector_dtype.py [num_vectors] [dim]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_store import VectorStore, bfloat16
+
+NUM_QUERIES = 20
+TOP_K = 5
+
+
+def legacy_search(embeddings, query, top_k):
+    """Original per-vector cosine loop over a Python list"""
+    sims = []
+    for i, emb in enumerate(embeddings):
+        sim = np.dot(query, emb) / (np.linalg.norm(query) * np.linalg.norm(emb))
+        sims.append((i, sim))
+    sims.sort(key=lambda x: x[1], reverse=True)
+    return [i for i, _ in sims[:top_k]]
+
+
+def build_store(dtype, vectors, scoring_copy=True):
+    store = VectorStore(embedding_model='bench', dtype=dtype, scoring_copy=scoring_copy)
+    for i, vec in enumerate(vectors):
+        store._append(f"doc {i}", vec, {})
+    return store
+
+
+def time_queries(search, queries):
+    start = time.perf_counter()
+    results = [search(q) for q in queries]
+    elapsed = (time.perf_counter() - start) / len(queries)
+    return elapsed, results
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 768
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n, dim))
+    queries = rng.standard_normal((NUM_QUERIES, dim))
+
+    print("=" * 70)
+    print(f"VectorStore dtype benchmark: {n} vectors x {dim} dims, top-{TOP_K}")
+    print("=" * 70)
+
+    # Baseline: list of float64 arrays
+    tracemalloc.start()
+    legacy = [np.array(v) for v in vectors]
+    legacy_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    legacy_time, reference = time_queries(lambda q: legacy_search(legacy, q, TOP_K), queries)
+    del legacy
+
+    print(f"{'storage':<16}{'latency (ms)':>14}{'memory (MB)':>14}{'speedup':>10}{'top-k overlap':>16}")
+    print("-" * 70)
+    print(f"{'float64 list':<16}{legacy_time * 1000:>14.2f}{legacy_bytes / 1e6:>14.1f}{1.0:>10.1f}{1.0:>16.3f}")
+
+    configs = [('float64 matrix', 'float64', True), ('float32 matrix', 'float32', True)]
+    for dtype in ['float16'] + (['bfloat16'] if bfloat16 is not None else []):
+        # With the float32 scoring copy, and upcasting blocks on every search
+        configs += [(f"{dtype} copy", dtype, True), (f"{dtype} blocks", dtype, False)]
+    for label, dtype, scoring_copy in configs:
+        store = build_store(dtype, vectors, scoring_copy)
+
+        def search(q):
+            scores = store._score(q)
+            top = np.argpartition(-scores, TOP_K - 1)[:TOP_K]
+            return list(top[np.argsort(-scores[top])])
+
+        search(queries[0])  # warm-up, builds the scoring copy
+        memory = store.embeddings.nbytes + store._norms[:store._size].nbytes + store.stats()['scoring_copy_bytes']
+        elapsed, results = time_queries(search, queries)
+        overlap = np.mean([len(set(a) & set(b)) / TOP_K for a, b in zip(results, reference)])
+
+        print(f"{label:<16}{elapsed * 1000:>14.2f}{memory / 1e6:>14.1f}"
+              f"{legacy_time / elapsed:>10.1f}{overlap:>16.3f}")
+
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
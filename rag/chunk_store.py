@@ -0,0 +1,387 @@
+import sys
+import numpy as np
+from typing import Dict, List, Tuple
+from text_blocks import TextBlocks
+
+
+def _record_key(metadata: Dict):
+    """Hashable key used to intern a metadata record, None if unhashable"""
+    try:
+        key = tuple(sorted(metadata.items()))
+        hash(key)
+        return key
+    except TypeError:
+        return None
+
+
+class _Column:
+    """Indexable view of one computed chunk field (texts or metadata)"""
+
+    def __init__(self, getter):
+        self._getter = getter
+
+    def __getitem__(self, row: int):
+        return self._getter(row)
+
+
+class ChunkStore:
+    """
+    Columnar storage of chunk texts and metadata
+
+    Every chunk is one row of integer columns: source ID, start / end offset
+    into the source text and chunk index. A source text and its metadata
+    record are stored once however many chunks refer to it, and identical
+    metadata records are interned. Chunk texts and metadata dicts are only
+    built when a row is read.
+
+    Span rows (chunk_index >= 0) read as source[start:end].strip() with
+    chunk_index / start_char / end_char added to the source metadata, the
+    same as DocumentProcessor.chunk_text(). Standalone rows (chunk_index -1)
+    hold their own text as source and their full metadata as record.
+
+    With compression, source texts are UTF-8 encoded into compressed
+    TextBlocks and every row also records its byte range there, so reading
+    a chunk decompresses only the blocks it overlaps.
+
+    Rows are only appended. Readers bound themselves by a row count taken
+    from a published snapshot, so appends never disturb them; delete goes
+    through take(), which builds a new store.
+    """
+
+    def __init__(self, compression: str = None, block_size: int = 1 << 14):
+        """
+        Initialize chunk store
+
+        Args:
+            compression: None to keep source texts as strings, or 'zlib' /
+                'zstd' to keep them in compressed blocks
+            block_size: Uncompressed bytes per compressed block
+        """
+        self.compression = compression if compression not in (None, '', 'none') else None
+        self.block_size = block_size
+
+        self._sources: List = []  # Source texts, or (byte offset, byte length) when compressed
+        self._source_records: List[int] = []  # Record index per source
+        self._records: List[Dict] = []  # Interned metadata records
+        self._record_keys: List = []  # Interning key per record (None = unhashable)
+        self._record_index: Dict = {}  # Interning key -> record index
+        self._source_index: Dict[int, int] = {}  # id(source text) -> source ID
+
+        self._source_ids = np.empty(0, dtype=np.int32)
+        self._starts = np.empty(0, dtype=np.int64)
+        self._ends = np.empty(0, dtype=np.int64)
+        self._chunk_index = np.empty(0, dtype=np.int32)
+        self._size = 0
+
+        if self.compression:
+            self._blocks = TextBlocks(self.compression, block_size)
+            self._byte_starts = np.empty(0, dtype=np.int64)  # Row byte range in _blocks
+            self._byte_ends = np.empty(0, dtype=np.int64)
+        else:
+            self._blocks = None
+        # Compressed mode: [source, source_id, base, is_ascii, char_pos, byte_pos]
+        # of the last source added, to convert its char offsets to bytes
+        self._open = None
+        self._last_source = (None, None)  # (source_id, decoded text) for row()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def num_sources(self) -> int:
+        return len(self._sources)
+
+    @property
+    def _columns(self) -> Tuple[str, ...]:
+        names = ('_source_ids', '_starts', '_ends', '_chunk_index')
+        return names + ('_byte_starts', '_byte_ends') if self.compression else names
+
+    def _intern(self, metadata: Dict) -> int:
+        """Index of the record equal to metadata, adding it if new"""
+        key = _record_key(metadata)
+        if key is not None:
+            index = self._record_index.get(key)
+            if index is not None:
+                return index
+            self._record_index[key] = len(self._records)
+        self._records.append(dict(metadata))
+        self._record_keys.append(key)
+        return len(self._records) - 1
+
+    def _source_id(self, source: str, metadata: Dict, shared: bool) -> int:
+        """Source ID for a text, reusing it if this very string was added before"""
+        if shared:
+            if self.compression:
+                open_ = self._open
+                source_id = open_[1] if open_ is not None and open_[0] is source else None
+            else:
+                source_id = self._source_index.get(id(source))
+                # Identity check: the stored string keeps its id from being reused
+                if source_id is not None and self._sources[source_id] is not source:
+                    source_id = None
+            if source_id is not None and self._records[self._source_records[source_id]] == metadata:
+                return source_id
+
+        record = self._intern(metadata)
+        source_id = len(self._sources)
+        if self.compression:
+            data = source.encode('utf-8')
+            base = self._blocks.append(data)
+            self._sources.append((base, len(data)))
+            self._open = [source, source_id, base, source.isascii(), 0, base]
+        else:
+            self._sources.append(source)
+            if shared:
+                self._source_index[id(source)] = source_id
+        self._source_records.append(record)
+        return source_id
+
+    def _byte_range(self, source: str, start: int, end: int) -> Tuple[int, int]:
+        """Byte range in _blocks of source[start:end], source being the last one added"""
+        _, _, base, is_ascii, char_pos, byte_pos = self._open
+        if is_ascii:
+            return base + start, base + end
+
+        # Chunks of a source arrive in increasing start order: walk forward
+        if start < char_pos:
+            char_pos, byte_pos = 0, base
+        byte_start = byte_pos + len(source[char_pos:start].encode('utf-8'))
+        self._open[4], self._open[5] = start, byte_start
+        return byte_start, byte_start + len(source[start:end].encode('utf-8'))
+
+    def _reserve(self, rows: int):
+        """Grow the columns geometrically to hold `rows` more chunks"""
+        needed = self._size + rows
+        capacity = len(self._starts)
+        if needed <= capacity:
+            return
+
+        capacity = max(needed, capacity * 2, 64)
+        for name in self._columns:
+            old = getattr(self, name)
+            column = np.empty(capacity, dtype=old.dtype)
+            column[:self._size] = old[:self._size]
+            setattr(self, name, column)
+
+    def add_span(self, source: str, metadata: Dict, start: int, end: int, chunk_index: int) -> int:
+        """
+        Append a chunk that is a span of a source text
+
+        Args:
+            source: Full source text; passing the same string object again
+                reuses the stored source instead of adding a copy (when
+                compressed, only for consecutive chunks of one source)
+            metadata: Source metadata, shared by all chunks of the source
+            start: Start offset of the chunk span in source
+            end: End offset of the chunk span in source
+            chunk_index: Position of the chunk in its source (-1 = standalone)
+
+        Returns:
+            Row of the new chunk
+        """
+        source_id = self._source_id(source, metadata, shared=chunk_index >= 0)
+        self._reserve(1)
+
+        row = self._size
+        self._source_ids[row] = source_id
+        self._starts[row] = start
+        self._ends[row] = end
+        self._chunk_index[row] = chunk_index
+        if self.compression:
+            self._byte_starts[row], self._byte_ends[row] = self._byte_range(source, start, end)
+        self._size += 1
+        return row
+
+    def add_text(self, text: str, metadata: Dict) -> int:
+        """Append a standalone chunk with its own text and full metadata"""
+        return self.add_span(text, metadata, 0, len(text), -1)
+
+    def text(self, row: int) -> str:
+        """Chunk text, sliced from its source"""
+        if self.compression:
+            text = self._blocks.read(self._byte_starts[row], self._byte_ends[row]).decode('utf-8')
+        else:
+            source = self._sources[self._source_ids[row]]
+            text = source[self._starts[row]:self._ends[row]]
+        return text.strip() if self._chunk_index[row] >= 0 else text
+
+    def metadata(self, row: int) -> Dict:
+        """Chunk metadata dict, built from its source record"""
+        record = self._records[self._source_records[self._source_ids[row]]]
+        meta = dict(record)
+        chunk_index = int(self._chunk_index[row])
+        if chunk_index >= 0:
+            meta['chunk_index'] = chunk_index
+            meta['start_char'] = int(self._starts[row])
+            meta['end_char'] = int(self._ends[row])
+        return meta
+
+    def source_text(self, source_id: int) -> str:
+        """Full text of a source"""
+        if not self.compression:
+            return self._sources[source_id]
+
+        # Consecutive rows of one source get the same string object, so
+        # copying them into another store keeps sharing the source
+        cached_id, text = self._last_source
+        if cached_id != source_id:
+            base, length = self._sources[source_id]
+            text = self._blocks.read(base, base + length).decode('utf-8')
+            self._last_source = (source_id, text)
+        return text
+
+    def row(self, row: int) -> Tuple[str, Dict, int, int, int]:
+        """(source, source_metadata, start, end, chunk_index) of a chunk, see add_span"""
+        source_id = int(self._source_ids[row])
+        return (
+            self.source_text(source_id),
+            self._records[self._source_records[source_id]],
+            int(self._starts[row]),
+            int(self._ends[row]),
+            int(self._chunk_index[row])
+        )
+
+    @property
+    def texts(self) -> _Column:
+        return _Column(self.text)
+
+    @property
+    def metadatas(self) -> _Column:
+        return _Column(self.metadata)
+
+    def take(self, rows) -> 'ChunkStore':
+        """New store holding the given rows, dropping unreferenced sources and records"""
+        rows = np.asarray(rows, dtype=np.intp)
+        out = ChunkStore(self.compression, self.block_size)
+        if not len(rows):
+            return out
+
+        used_sources, source_ids = np.unique(self._source_ids[rows], return_inverse=True)
+        source_records = np.array([self._source_records[i] for i in used_sources], dtype=np.intp)
+        used_records, record_ids = np.unique(source_records, return_inverse=True)
+
+        out._records = [self._records[i] for i in used_records]
+        out._record_keys = [self._record_keys[i] for i in used_records]
+        out._record_index = {key: i for i, key in enumerate(out._record_keys) if key is not None}
+        out._sources = [self._sources[i] for i in used_sources]
+        out._source_records = record_ids.tolist()
+
+        for name in self._columns:
+            setattr(out, name, getattr(self, name)[rows])
+        out._source_ids = source_ids.astype(np.int32)
+        out._size = len(rows)
+
+        if self.compression:
+            # The block stream is append-only, so it is shared; text of
+            # dropped sources is reclaimed once it outweighs the live text
+            out._blocks = self._blocks
+            live = sum(length for _, length in out._sources)
+            if out._blocks.size > 2 * live + 4 * self.block_size:
+                out._compact()
+        else:
+            shared = np.unique(out._source_ids[out._chunk_index >= 0])
+            out._source_index = {id(out._sources[i]): int(i) for i in shared}
+        return out
+
+    def _compact(self):
+        """Copy the live sources into a fresh block stream (compressed mode)"""
+        blocks = TextBlocks(self.compression, self.block_size)
+        shift = np.empty(len(self._sources), dtype=np.int64)
+        sources = []
+        for source_id, (base, length) in enumerate(self._sources):
+            new_base = blocks.append(self._blocks.read(base, base + length))
+            sources.append((new_base, length))
+            shift[source_id] = new_base - base
+
+        row_shift = shift[self._source_ids[:self._size]]
+        self._byte_starts = self._byte_starts[:self._size] + row_shift
+        self._byte_ends = self._byte_ends[:self._size] + row_shift
+        self._sources = sources
+        self._blocks = blocks
+        self._open = None
+        self._last_source = (None, None)
+
+    def to_dict(self, size: int = None) -> Dict:
+        """Plain data for pickling, limited to the first size rows"""
+        store = self if size is None or size == self._size else self.take(np.arange(size))
+        if store.compression and store._blocks.size > sum(length for _, length in store._sources):
+            # Leave the text of deleted sources out of the file
+            if store is self:
+                store = self.take(np.arange(self._size))
+            if store._blocks.size > sum(length for _, length in store._sources):
+                store._compact()
+
+        n = store._size
+        data = {
+            'sources': list(store._sources),
+            'source_records': list(store._source_records),
+            'records': list(store._records),
+            'source_ids': store._source_ids[:n].copy(),
+            'starts': store._starts[:n].copy(),
+            'ends': store._ends[:n].copy(),
+            'chunk_index': store._chunk_index[:n].copy()
+        }
+        if store.compression:
+            data['text_blocks'] = store._blocks.to_dict()
+            data['byte_starts'] = store._byte_starts[:n].copy()
+            data['byte_ends'] = store._byte_ends[:n].copy()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ChunkStore':
+        """Rebuild a store written by to_dict()"""
+        text_blocks = data.get('text_blocks')
+        if text_blocks is not None:
+            store = cls(text_blocks['compression'], text_blocks['block_size'])
+            store._blocks = TextBlocks.from_dict(text_blocks)
+            store._byte_starts = np.asarray(data['byte_starts'], dtype=np.int64)
+            store._byte_ends = np.asarray(data['byte_ends'], dtype=np.int64)
+        else:
+            store = cls()
+
+        for record in data['records']:
+            key = _record_key(record)
+            if key is not None:
+                store._record_index.setdefault(key, len(store._records))
+            store._records.append(record)
+            store._record_keys.append(key)
+        store._sources = list(data['sources'])
+        store._source_records = list(data['source_records'])
+
+        store._source_ids = np.asarray(data['source_ids'], dtype=np.int32)
+        store._starts = np.asarray(data['starts'], dtype=np.int64)
+        store._ends = np.asarray(data['ends'], dtype=np.int64)
+        store._chunk_index = np.asarray(data['chunk_index'], dtype=np.int32)
+        store._size = len(store._starts)
+
+        if not store.compression:
+            shared = np.unique(store._source_ids[store._chunk_index >= 0])
+            store._source_index = {id(store._sources[i]): int(i) for i in shared}
+        return store
+
+    @classmethod
+    def from_lists(cls, documents: List[str], metadata: List[Dict], compression: str = None) -> 'ChunkStore':
+        """
+        Build a store from parallel text / metadata lists
+
+        Metadata carrying source, chunk_index, start_char and end_char is
+        kept as-is in standalone rows: without the source text the span
+        offsets cannot be used for slicing. Identical records still intern.
+        """
+        store = cls(compression)
+        store._reserve(len(documents))
+        for doc, meta in zip(documents, metadata):
+            store.add_text(doc, meta)
+        return store
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by columns, source texts and metadata records"""
+        total = sum(getattr(self, name).nbytes for name in self._columns)
+        total += sys.getsizeof(self._sources) + sum(sys.getsizeof(s) for s in self._sources)
+        if self.compression:
+            total += self._blocks.nbytes + 2 * sys.getsizeof(1 << 40) * len(self._sources)
+        total += sys.getsizeof(self._source_records) + sys.getsizeof(self._records)
+        for record in self._records:
+            total += sys.getsizeof(record)
+            total += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in record.items())
+        return total
@@ -0,0 +1,366 @@
+import heapq
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
+from document_processor import DocumentProcessor
+from embedding_cache import EmbeddingCache
+from embedding_provider import EmbeddingProvider, get_provider
+from metrics import Metrics
+from vector_store import VectorStore
+
+# Collection names double as file names under the root directory
+_NAME = re.compile(r'[A-Za-z0-9][A-Za-z0-9_.-]*')
+
+
+class _Collection:
+    """Registry entry: where a collection lives and whether it is in memory"""
+
+    __slots__ = ('name', 'path', 'store', 'last_used')
+
+    def __init__(self, name: str, path: Optional[str]):
+        self.name = name
+        self.path = path
+        self.store: Optional[VectorStore] = None
+        self.last_used = 0.0
+
+    @property
+    def dirty(self) -> bool:
+        """In memory with changes not on disk; never forces a lazy load"""
+        store = self.store
+        return store is not None and store.is_loaded and store.file_state != (self.path, store.generation)
+
+
+class CollectionStore:
+    """
+    Many named vector stores in one process
+
+    Each collection is an index file `<root>/<name>.pkl` (plus its
+    .vectors.npy), opened lazily on first use. Collections share one
+    embedding provider and one query embedding cache per embedding model,
+    so a question fanned out to several collections is embedded once.
+    Collections left unused for idle_seconds, or the least recently used
+    ones beyond max_loaded, are dropped from memory; ones with unsaved
+    changes stay until saved.
+
+    Fan-out merges results by cosine score. Scores are only comparable
+    between collections embedded with the same model.
+    """
+
+    def __init__(
+        self,
+        root: str = None,
+        embedding_model: str = 'nomic-embed-text',
+        ollama_host: str = 'http://localhost:11434',
+        dtype: str = 'float64',
+        text_compression: str = None,
+        keep_alive=None,
+        idle_seconds: float = 600,
+        max_loaded: int = 0,
+        query_cache_size: int = 4096,
+        metrics: Metrics = None
+    ):
+        """
+        Initialize collection store
+
+        Args:
+            root: Directory holding the collection index files (None = in memory only)
+            embedding_model: Model for new collections, see get_provider()
+            ollama_host: Ollama server host
+            dtype: Vector storage dtype of new collections
+            text_compression: Text compression of new collections
+            keep_alive: How long Ollama keeps embedding models loaded
+            idle_seconds: Drop collections unused this long (0 = never)
+            max_loaded: Collections kept in memory at most (0 = no limit)
+            query_cache_size: Query embeddings cached per model
+            metrics: Metrics receiving 'embed' / 'search' spans (None = off)
+        """
+        self.root = root
+        self.embedding_model = embedding_model
+        self.ollama_host = ollama_host
+        self.dtype = dtype
+        self.text_compression = text_compression
+        self.keep_alive = keep_alive
+        self.idle_seconds = idle_seconds
+        self.max_loaded = max_loaded
+        self.query_cache_size = query_cache_size
+        self.metrics = metrics or Metrics(enabled=False)
+
+        self._collections: Dict[str, _Collection] = {}
+        self._providers: Dict[str, EmbeddingProvider] = {}
+        self._query_caches: Dict[str, EmbeddingCache] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+        if root:
+            os.makedirs(root, exist_ok=True)
+            self._scan()
+
+    def _path(self, name: str) -> Optional[str]:
+        return os.path.join(self.root, f"{name}.pkl") if self.root else None
+
+    def _scan(self):
+        """Register collections found under root"""
+        with self._lock:
+            for entry in sorted(os.listdir(self.root)):
+                if entry.endswith('.pkl'):
+                    name = entry[:-4]
+                    if _NAME.fullmatch(name) and name not in self._collections:
+                        self._collections[name] = _Collection(name, self._path(name))
+
+    def names(self) -> List[str]:
+        """Names of all known collections, loaded or not"""
+        if self.root:
+            self._scan()
+        return sorted(self._collections)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._collections
+
+    def __len__(self):
+        return len(self._collections)
+
+    def provider(self, embedding_model: str) -> EmbeddingProvider:
+        """The provider every collection of this model shares"""
+        with self._lock:
+            return self._provider(embedding_model)
+
+    def _provider(self, embedding_model: str) -> EmbeddingProvider:
+        provider = self._providers.get(embedding_model)
+        if provider is None:
+            provider = get_provider(embedding_model, self.ollama_host, self.keep_alive)
+            self._providers[embedding_model] = provider
+            self._query_caches[embedding_model] = EmbeddingCache(
+                embedding_model, self.ollama_host, max_entries=self.query_cache_size, embedder=provider
+            )
+        return provider
+
+    def _share_provider(self, store: VectorStore):
+        """Point a store at the shared provider of its embedding model"""
+        store.embedder = self._provider(store.embedding_model)
+
+    def create(self, name: str, embedding_model: str = None) -> VectorStore:
+        """Create an empty collection, replacing one of the same name"""
+        if not _NAME.fullmatch(name):
+            raise ValueError(f"Invalid collection name '{name}' (letters, digits, '_', '.', '-')")
+        with self._lock:
+            store = VectorStore(
+                ollama_host=self.ollama_host,
+                dtype=self.dtype,
+                text_compression=self.text_compression,
+                embedder=self._provider(embedding_model or self.embedding_model)
+            )
+            collection = self._collections.get(name) or _Collection(name, self._path(name))
+            collection.store = store
+            collection.last_used = time.time()
+            self._collections[name] = collection
+            self._evict_over_limit(keep=name)
+        return store
+
+    def add(self, name: str, store: VectorStore):
+        """Register an existing vector store as a collection"""
+        if not _NAME.fullmatch(name):
+            raise ValueError(f"Invalid collection name '{name}' (letters, digits, '_', '.', '-')")
+        with self._lock:
+            self._share_provider(store)
+            collection = self._collections.get(name) or _Collection(name, self._path(name))
+            collection.store = store
+            collection.last_used = time.time()
+            self._collections[name] = collection
+            self._evict_over_limit(keep=name)
+
+    def get(self, name: str) -> VectorStore:
+        """
+        Vector store of a collection, opening its index file if needed
+
+        The index is opened lazily: its chunks are read and its embeddings
+        memory-mapped by the first search.
+        """
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None and self.root and os.path.exists(self._path(name)):
+                collection = self._collections[name] = _Collection(name, self._path(name))
+            if collection is None:
+                raise KeyError(f"Unknown collection '{name}'")
+
+            collection.last_used = time.time()
+            if collection.store is None:
+                store = VectorStore(ollama_host=self.ollama_host, dtype=self.dtype,
+                                    text_compression=self.text_compression,
+                                    embedder=self._provider(self.embedding_model))
+                store.load(collection.path, lazy=True)
+                self._share_provider(store)
+                collection.store = store
+                self.loads += 1
+                self._evict_over_limit(keep=name)
+            return collection.store
+
+    def save(self, name: str = None):
+        """Save one collection, or every collection with unsaved changes"""
+        if not self.root:
+            raise ValueError("Collection store has no root directory to save to")
+        with self._lock:
+            targets = [self._collections[name]] if name is not None else [
+                c for c in self._collections.values() if c.dirty
+            ]
+        for collection in targets:
+            if collection.store is None:
+                continue
+            collection.store.save(collection.path)
+
+    def drop(self, name: str, delete_files: bool = False):
+        """Forget a collection, optionally deleting its index files"""
+        with self._lock:
+            collection = self._collections.pop(name, None)
+        if collection is not None and delete_files and collection.path:
+            for path in (collection.path, VectorStore._vectors_path(collection.path)):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def index_directory(self, name: str, directory: str, pattern='*.txt', processor: DocumentProcessor = None,
+                        batch_size: int = 64, workers: int = None, embedding_model: str = None) -> int:
+        """
+        (Re)build a collection from a directory and save it under root
+
+        The old collection keeps answering until the new one is complete.
+
+        Returns:
+            Number of chunks indexed
+        """
+        processor = processor or DocumentProcessor()
+        with self._lock:
+            store = VectorStore(ollama_host=self.ollama_host, dtype=self.dtype,
+                                text_compression=self.text_compression,
+                                embedder=self._provider(embedding_model or self.embedding_model))
+
+        paths = processor.find_files(directory, pattern)
+        total = 0
+        for spans in processor.iter_span_batches(processor.iter_paths_sources(paths, workers=workers), batch_size):
+            store.add_chunks(spans)
+            total += len(spans)
+
+        self.add(name, store)
+        if self.root:
+            self.save(name)
+        return total
+
+    def _evict_over_limit(self, keep: str = None):
+        """Drop least recently used clean collections beyond max_loaded (lock held)"""
+        if not self.max_loaded:
+            return
+        loaded = [c for c in self._collections.values() if c.store is not None and c.name != keep]
+        excess = len(loaded) + (keep is not None) - self.max_loaded
+        for collection in sorted(loaded, key=lambda c: c.last_used):
+            if excess <= 0:
+                break
+            if collection.path and not collection.dirty:
+                collection.store = None
+                self.evictions += 1
+                excess -= 1
+
+    def evict_idle(self, now: float = None) -> List[str]:
+        """Drop saved collections unused for idle_seconds; returns their names"""
+        if not self.idle_seconds:
+            return []
+        now = now if now is not None else time.time()
+        evicted = []
+        with self._lock:
+            for collection in self._collections.values():
+                if (collection.store is not None and collection.path and not collection.dirty
+                        and now - collection.last_used > self.idle_seconds):
+                    collection.store = None
+                    evicted.append(collection.name)
+            self.evictions += len(evicted)
+        return evicted
+
+    def embed_query(self, query: str, embedding_model: str) -> np.ndarray:
+        """Query embedding from the shared cache of a model"""
+        with self._lock:
+            self._provider(embedding_model)
+            cache = self._query_caches[embedding_model]
+        return cache.embed(query)
+
+    def _resolve(self, names: Union[str, Iterable[str], None]) -> List[str]:
+        if names is None or names == '*':
+            return self.names()
+        if isinstance(names, str):
+            return [names]
+        return list(names)
+
+    def search(self, query: str, names: Union[str, Iterable[str], None] = None,
+               top_k: int = 3) -> List[Tuple[str, float, Dict]]:
+        """
+        Search one collection or fan out across several
+
+        Args:
+            query: Search text
+            names: Collection name, list of names, or None / '*' for all
+            top_k: Results returned in total
+
+        Returns:
+            Merged top_k (document, score, metadata) tuples; metadata has
+            a 'collection' entry naming where the chunk came from
+        """
+        return self.search_detailed(query, names, top_k)[0]
+
+    def search_detailed(self, query: str, names, top_k: int, trace: int = None) -> Tuple[List, List, object, Tuple]:
+        """
+        search() with what the answer cache needs
+
+        Returns:
+            (results, [(collection, chunk ID), ...], query embedding of the
+            first collection's model, version of every searched collection)
+        """
+        self.evict_idle()
+        targets = []
+        for name in self._resolve(names):
+            store = self.get(name)
+            targets.append((name, store, store.snapshot()))
+        targets = [(name, store, snap) for name, store, snap in targets if snap.size]
+        version = tuple((name, id(store), snap.generation) for name, store, snap in targets)
+        if not targets:
+            return [], [], None, version
+
+        with self.metrics.span('embed', trace):
+            embeddings = {}
+            for _, store, _ in targets:
+                model = store.embedding_model
+                if model not in embeddings:
+                    embeddings[model] = self.embed_query(query, model)
+
+        with self.metrics.span('search', trace):
+            candidates = []
+            for name, store, snap in targets:
+                results, ids = store.search_by_embedding(embeddings[store.embedding_model], top_k, snap)
+                for (text, score, meta), chunk_id in zip(results, ids):
+                    candidates.append((score, text, dict(meta, collection=name), (name, chunk_id)))
+            top = heapq.nlargest(top_k, candidates, key=lambda c: c[0])
+
+        results = [(text, score, meta) for score, text, meta, _ in top]
+        keys = [key for _, _, _, key in top]
+        return results, keys, embeddings[targets[0][1].embedding_model], version
+
+    def stats(self) -> Dict:
+        """Per-collection state plus shared cache statistics"""
+        now = time.time()
+        with self._lock:
+            collections = {
+                c.name: {
+                    'loaded': c.store is not None,
+                    'documents': len(c.store) if c.store is not None and c.store.is_loaded else None,
+                    'unsaved': c.dirty,
+                    'idle_seconds': now - c.last_used if c.last_used else None
+                }
+                for c in self._collections.values()
+            }
+            caches = {model: cache.stats() for model, cache in self._query_caches.items()}
+        return {
+            'collections': collections,
+            'loaded': sum(1 for c in collections.values() if c['loaded']),
+            'loads': self.loads,
+            'evictions': self.evictions,
+            'query_caches': caches
+        }
@@ -4,7 +4,8 @@ import os
 # Default to K8s service if in cluster, otherwise localhost
 OLLAMA_HOST = os.getenv('OLLAMA_HOST', 'http://localhost:11434')
 
-# Model Configuration
+# Model Configuration. EMBEDDING_MODEL 'hash' or 'hash-<dim>' embeds locally by
+# feature hashing (deterministic, no Ollama needed for indexing and retrieval)
 LLM_MODEL = os.getenv('MODEL_NAME', 'llama3.1')
 EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'nomic-embed-text')
 
@@ -12,8 +13,92 @@ EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'nomic-embed-text')
 DEFAULT_CHUNK_SIZE = int(os.getenv('CHUNK_SIZE', '500'))
 DEFAULT_CHUNK_OVERLAP = int(os.getenv('CHUNK_OVERLAP', '50'))
 DEFAULT_TOP_K = int(os.getenv('TOP_K', '3'))
+# Adaptive top-k: TOP_K becomes the maximum and retrieval stops where a score
+# falls more than SCORE_GAP (fraction) below the previous one or below
+# MIN_SCORE, keeping at least TOP_K_MIN chunks (0 = test off)
+TOP_K_MIN = int(os.getenv('TOP_K_MIN', '1'))
+SCORE_GAP = float(os.getenv('SCORE_GAP', '0'))
+MIN_SCORE = float(os.getenv('MIN_SCORE', '0'))
+DEFAULT_INDEX_BATCH_SIZE = int(os.getenv('INDEX_BATCH_SIZE', '64'))
+# Processes loading and chunking files while indexing (0 = all CPUs)
+INDEX_WORKERS = int(os.getenv('INDEX_WORKERS', '0'))
 
-print(f"RAG Config:")
-print(f"  Ollama Host: {OLLAMA_HOST}")
-print(f"  LLM Model: {LLM_MODEL}")
-print(f"  Embedding Model: {EMBEDDING_MODEL}")
+# Chunk size unit: 'chars' or 'tokens'. With 'tokens', CHUNK_SIZE / CHUNK_OVERLAP
+# count tokens of TOKENIZER (Hugging Face repo id or tokenizer.json path of the
+# target model; empty = built-in approximation)
+CHUNK_UNIT = os.getenv('CHUNK_UNIT', 'chars')
+TOKENIZER = os.getenv('TOKENIZER', '')
+
+# Chunk strategy: 'fixed' windows or 'semantic' (break where adjacent sentence
+# embeddings diverge, CHUNK_SIZE is then the maximum chunk size)
+CHUNK_STRATEGY = os.getenv('CHUNK_STRATEGY', 'fixed')
+
+# Vector storage dtype: float64, float32, float16 or bfloat16 (needs ml_dtypes)
+VECTOR_DTYPE = os.getenv('VECTOR_DTYPE', 'float64')
+
+# Document text storage: none, zlib or zstd (needs zstandard) compressed blocks
+TEXT_COMPRESSION = os.getenv('TEXT_COMPRESSION', 'none')
+
+# Index migration: documents re-embedded per second (0 = unlimited)
+MIGRATION_RATE = float(os.getenv('MIGRATION_RATE', '5'))
+
+# Directory watcher: seconds of quiet before applying a batch of changes,
+# longest a change may wait, and stat polling interval without inotify
+WATCH_DEBOUNCE = float(os.getenv('WATCH_DEBOUNCE', '1.0'))
+WATCH_MAX_DELAY = float(os.getenv('WATCH_MAX_DELAY', '10'))
+WATCH_POLL_INTERVAL = float(os.getenv('WATCH_POLL_INTERVAL', '1.0'))
+
+# Answer cache: answers kept (0 = off), question cosine similarity needed to
+# reuse one (the retrieved chunks must match too), and seconds they stay valid
+ANSWER_CACHE_SIZE = int(os.getenv('ANSWER_CACHE_SIZE', '256'))
+ANSWER_CACHE_THRESHOLD = float(os.getenv('ANSWER_CACHE_THRESHOLD', '0.95'))
+ANSWER_CACHE_TTL = float(os.getenv('ANSWER_CACHE_TTL', '3600'))
+
+# Prompt context: maximum tokens of retrieved text (0 = unlimited); overlapping
+# chunks of the same source are merged before the budget is filled by score
+CONTEXT_BUDGET = int(os.getenv('CONTEXT_BUDGET', '0'))
+
+# Context compression: tokens of retrieved context kept by picking the
+# sentences most similar to the question (0 = off, whole passages are sent)
+COMPRESSION_BUDGET = int(os.getenv('COMPRESSION_BUDGET', '0'))
+
+# Model residency: how long Ollama keeps models after a request ('30m', seconds,
+# -1 = forever), warm-up at startup, keep-alive ping interval (0 = no pings)
+# and seconds without queries after which pings stop (0 = never)
+KEEP_ALIVE = os.getenv('KEEP_ALIVE', '30m')
+MODEL_WARMUP = os.getenv('MODEL_WARMUP', '1') != '0'
+WARMUP_PING_INTERVAL = float(os.getenv('WARMUP_PING_INTERVAL', '240'))
+WARMUP_IDLE_LIMIT = float(os.getenv('WARMUP_IDLE_LIMIT', '0'))
+
+# Batch QA: generation requests in flight and questions embedded per batch
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '4'))
+BATCH_SIZE = int(os.getenv('BATCH_SIZE', '32'))
+
+# HTTP service: listen address (no authentication, so loopback by default),
+# generations at once, requests waiting for a generation slot before 503,
+# query embedding batching window, and the directory POST /index may index
+# below (empty = directory indexing off)
+SERVER_HOST = os.getenv('SERVER_HOST', '127.0.0.1')
+SERVER_PORT = int(os.getenv('SERVER_PORT', '8000'))
+SERVER_MAX_CONCURRENT = int(os.getenv('SERVER_MAX_CONCURRENT', '4'))
+SERVER_MAX_QUEUE = int(os.getenv('SERVER_MAX_QUEUE', '32'))
+SERVER_BATCH_WINDOW_MS = float(os.getenv('SERVER_BATCH_WINDOW_MS', '5'))
+SERVER_INDEX_ROOT = os.getenv('SERVER_INDEX_ROOT', '')
+
+# Per-stage latency histograms (0 = off) and a JSONL file every span is
+# appended to (empty = no trace)
+METRICS = os.getenv('METRICS', '1') != '0'
+TRACE_FILE = os.getenv('TRACE_FILE', '')
+
+# Index file opened lazily at bot startup (empty = start without an index)
+INDEX_FILE = os.getenv('INDEX_FILE', '')
+
+# Named collections: directory of per-collection index files (empty = off),
+# seconds unused before a collection is dropped from memory (0 = never) and
+# collections kept in memory at most (0 = no limit)
+COLLECTIONS_DIR = os.getenv('COLLECTIONS_DIR', '')
+COLLECTION_IDLE_SECONDS = float(os.getenv('COLLECTION_IDLE_SECONDS', '600'))
+COLLECTION_MAX_LOADED = int(os.getenv('COLLECTION_MAX_LOADED', '0'))
+
+# Cold-start benchmark: import + engine construction + index open budget (ms)
+STARTUP_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', '300'))
@@ -0,0 +1,117 @@
+from collections import defaultdict
+from typing import Dict, List, Tuple
+from tokenizer import get_tokenizer
+
+
+class ContextBuilder:
+    """
+    Packs retrieved chunks into the context of a RAG prompt
+
+    Chunks cut from the same source whose character spans overlap or touch
+    (start_char / end_char metadata) are merged into one passage, so the
+    overlap neighbouring chunks share is sent once. Passages are then added
+    greedily by score while they fit the token budget; passages that do not
+    fit are skipped in favour of smaller lower-scored ones, and identical
+    texts are kept once.
+    """
+
+    def __init__(self, token_budget: int = 0, tokenizer: str = None):
+        """
+        Initialize context builder
+
+        Args:
+            token_budget: Maximum tokens of context text (0 = unlimited)
+            tokenizer: Tokenizer name used to count tokens (None = approximate)
+        """
+        self.token_budget = token_budget
+        self.tokenizer = tokenizer
+
+    @staticmethod
+    def _join(first: str, second: str, overlap: int) -> str:
+        """
+        Concatenate two texts, dropping the prefix of `second` that repeats
+        the end of `first`
+
+        Chunk texts are stripped, so the repeated part is found by text,
+        looking no further than the `overlap` characters their spans share.
+        """
+        for k in range(min(overlap, len(first), len(second)), 0, -1):
+            if first.endswith(second[:k]):
+                return first + second[k:]
+        return first + ('\n' if overlap <= 0 else ' ') + second
+
+    def merge(self, context_docs: List[Tuple[str, float, Dict]]) -> List[Tuple[str, float, Dict]]:
+        """
+        Merge overlapping or adjacent chunks of the same source
+
+        Returns:
+            (text, score, metadata) passages ordered by score; a merged
+            passage scores as its best chunk and its metadata spans all of
+            them, with 'merged_chunks' set to how many it holds
+        """
+        by_source = defaultdict(list)
+        passages = []
+        for doc in context_docs:
+            metadata = doc[2]
+            if 'start_char' in metadata and 'source' in metadata:
+                by_source[metadata['source']].append(doc)
+            else:
+                passages.append(doc)
+
+        for docs in by_source.values():
+            docs.sort(key=lambda doc: doc[2]['start_char'])
+            text, score, metadata = docs[0]
+            merged = 1
+            for next_text, next_score, next_meta in docs[1:]:
+                end = metadata['end_char']
+                if next_meta['start_char'] <= end:
+                    text = self._join(text, next_text, end - next_meta['start_char'])
+                    score = max(score, next_score)
+                    metadata = dict(metadata, end_char=max(end, next_meta['end_char']))
+                    merged += 1
+                    continue
+                passages.append((text, score, dict(metadata, merged_chunks=merged) if merged > 1 else metadata))
+                text, score, metadata, merged = next_text, next_score, next_meta, 1
+            passages.append((text, score, dict(metadata, merged_chunks=merged) if merged > 1 else metadata))
+
+        passages.sort(key=lambda doc: -doc[1])
+        return passages
+
+    def _truncate(self, text: str, tokens: int) -> str:
+        """First `tokens` tokens of text"""
+        _, ends = get_tokenizer(self.tokenizer).offsets(text)
+        return text[:ends[tokens - 1]] if tokens > 0 and ends else ''
+
+    def build(self, context_docs: List[Tuple[str, float, Dict]]) -> List[Tuple[str, float, Dict]]:
+        """
+        Merge retrieved chunks and fill the token budget greedily by score
+
+        Args:
+            context_docs: (document, score, metadata) tuples from retrieval
+
+        Returns:
+            (text, score, metadata) passages for the prompt, best first
+        """
+        tokenizer = get_tokenizer(self.tokenizer)
+        packed = []
+        seen = set()
+        remaining = self.token_budget
+
+        for text, score, metadata in self.merge(context_docs):
+            if text in seen:
+                continue
+
+            if self.token_budget > 0:
+                tokens = tokenizer.count(text)
+                if tokens > remaining:
+                    # Keep the best passage even when it alone exceeds the budget
+                    if packed or remaining <= 0:
+                        continue
+                    text = self._truncate(text, remaining)
+                    tokens = remaining
+                remaining -= tokens
+
+            seen.add(text)
+            packed.append((text, score, metadata))
+
+        return packed
@@ -0,0 +1,139 @@
+import re
+import threading
+from typing import Dict, List, Tuple
+import numpy as np
+from document_processor import DocumentProcessor
+from embedding_cache import EmbeddingCache
+from embedding_provider import EmbeddingProvider
+from tokenizer import get_tokenizer
+
+_NON_SPACE = re.compile(r'\S')
+
+
+def split_sentences(text: str) -> List[str]:
+    """Non-blank sentences of text, cut where the chunker may end a chunk"""
+    sentences = []
+    prev = 0
+    for end in DocumentProcessor.boundary_ends(text) + [len(text)]:
+        if end > prev and _NON_SPACE.search(text, prev, end):
+            sentences.append(text[prev:end].strip())
+        prev = max(prev, end)
+    return sentences
+
+
+class SentenceCompressor:
+    """
+    Extractive compression of retrieved context
+
+    Every sentence of the packed passages is embedded in one batch and
+    scored by cosine similarity to the question. The best sentences are
+    kept while they fit the token budget; each passage keeps its kept
+    sentences in their original order and passages left without any are
+    dropped. Sentence embeddings are cached, so passages retrieved again
+    by later questions cost no embedding request.
+    """
+
+    def __init__(self, token_budget: int, tokenizer: str = None, cache_size: int = 50000):
+        """
+        Initialize sentence compressor
+
+        Args:
+            token_budget: Maximum tokens of compressed context
+            tokenizer: Tokenizer name used to count tokens (None = approximate)
+            cache_size: Sentence embeddings cached
+        """
+        self.token_budget = token_budget
+        self.tokenizer = tokenizer
+        self.cache_size = cache_size
+        self._cache = None
+        self._stats_lock = threading.Lock()
+        self.calls = 0
+        self.sentences_in = 0
+        self.sentences_kept = 0
+        self.tokens_in = 0
+        self.tokens_kept = 0
+
+    def _embedding_cache(self, embedder: EmbeddingProvider) -> EmbeddingCache:
+        # One cache per provider; a migration to another model starts a new one
+        cache = self._cache
+        if cache is None or cache.embedder is not embedder:
+            cache = self._cache = EmbeddingCache(embedder.model, max_entries=self.cache_size, embedder=embedder)
+        return cache
+
+    def compress(self, question: str, passages: List[Tuple[str, float, Dict]], embedder: EmbeddingProvider,
+                 query_embedding: np.ndarray = None) -> List[Tuple[str, float, Dict]]:
+        """
+        Keep the sentences of the passages that best match the question
+
+        Args:
+            question: User's question
+            passages: (text, score, metadata) context from ContextBuilder.build()
+            embedder: Provider the sentences are embedded with
+            query_embedding: Question embedding from the same provider
+                (None = embed the question with the sentences)
+
+        Returns:
+            (text, score, metadata) passages in the same order, metadata
+            recording 'sentences_kept' / 'sentences_total'
+        """
+        split = [split_sentences(text) for text, _, _ in passages]
+        sentences = [sentence for parts in split for sentence in parts]
+        if not sentences:
+            return passages
+
+        cache = self._embedding_cache(embedder)
+        texts = sentences if query_embedding is not None else [question] + sentences
+        vectors = cache.embed_batch(texts)
+        if query_embedding is None:
+            query_embedding, vectors = vectors[0], vectors[1:]
+        elif len(query_embedding) != vectors.shape[1]:
+            # The index switched models since the question was embedded
+            query_embedding = cache.embed(question)
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query) or 1.0)
+        scores = (vectors @ query) / np.where(norms > 0, norms, 1.0)
+
+        tokenizer = get_tokenizer(self.tokenizer)
+        counts = [tokenizer.count(sentence) for sentence in sentences]
+        keep = np.zeros(len(sentences), dtype=bool)
+        remaining = self.token_budget
+        for i in np.argsort(-scores, kind='stable'):
+            if counts[i] <= remaining:
+                keep[i] = True
+                remaining -= counts[i]
+            elif not keep.any():
+                # The best sentence stays even when it alone is over budget
+                keep[i] = True
+                remaining = 0
+
+        compressed = []
+        offset = 0
+        for (text, score, metadata), parts in zip(passages, split):
+            kept = [s for j, s in enumerate(parts) if keep[offset + j]]
+            offset += len(parts)
+            if kept:
+                compressed.append((' '.join(kept), score, dict(
+                    metadata, sentences_kept=len(kept), sentences_total=len(parts)
+                )))
+
+        with self._stats_lock:
+            self.calls += 1
+            self.sentences_in += len(sentences)
+            self.sentences_kept += int(keep.sum())
+            self.tokens_in += sum(counts)
+            self.tokens_kept += sum(c for c, k in zip(counts, keep) if k)
+        return compressed
+
+    def stats(self) -> Dict:
+        """Compression totals since creation"""
+        return {
+            'token_budget': self.token_budget,
+            'calls': self.calls,
+            'sentences_in': self.sentences_in,
+            'sentences_kept': self.sentences_kept,
+            'tokens_in': self.tokens_in,
+            'tokens_kept': self.tokens_kept,
+            'token_ratio': self.tokens_kept / self.tokens_in if self.tokens_in else None,
+            'embedding_cache': self._cache.stats() if self._cache else None
+        }
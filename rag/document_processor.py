@@ -1,20 +1,88 @@
+import hashlib
 import os
-from typing import List, Dict
+import re
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Iterable, Iterator, NamedTuple, Tuple, Union
 from pathlib import Path
+import numpy as np
+from embedding_cache import get_embedding_cache
+from tokenizer import get_tokenizer
+
+CHUNK_UNITS = ('chars', 'tokens')
+CHUNK_STRATEGIES = ('fixed', 'semantic')
+
+# Places a chunk may end: after '. ', '! ', '? ' or a newline. Each is a
+# literal pattern so the regex engine can use its fast substring search.
+_BOUNDARY_PATTERNS = [re.compile(re.escape(sep)) for sep in ('. ', '! ', '? ', '\n')]
+_NON_SPACE = re.compile(r'\S')
+
+
+class SourceChunks(NamedTuple):
+    """A source text with the spans of its chunks, see DocumentProcessor.chunk_source"""
+    text: str
+    metadata: Dict
+    starts: List[int]
+    ends: List[int]
+    file_stat: Dict = None  # Size, mtime and hash of the bytes read, see read_text_file
+
+    def spans(self) -> Iterator[Tuple[str, Dict, int, int, int]]:
+        """(text, metadata, start, end, chunk_index) per chunk, as taken by VectorStore.add_chunks"""
+        for index, (start, end) in enumerate(zip(self.starts, self.ends)):
+            yield self.text, self.metadata, start, end, index
+
 
 class DocumentProcessor:
     """Process documents for RAG system - chunking and loading"""
 
-    def __init__(self, chunk_size=500, chunk_overlap=50):
+    def __init__(
+        self,
+        chunk_size=500,
+        chunk_overlap=50,
+        chunk_unit='chars',
+        tokenizer=None,
+        strategy='fixed',
+        embedding_model='nomic-embed-text',
+        ollama_host='http://localhost:11434',
+        breakpoint_percentile=10
+    ):
         """
         Initialize document processor
 
         Args:
-            chunk_size: Target size of each chunk in characters
-            chunk_overlap: Number of characters to overlap between chunks
+            chunk_size: Target size of each chunk in chunk_unit (the maximum
+                size with the semantic strategy)
+            chunk_overlap: Amount of chunk_unit to overlap between chunks
+                (fixed strategy only)
+            chunk_unit: 'chars' or 'tokens' (counted with the target model's tokenizer)
+            tokenizer: Tokenizer name for 'tokens' (see tokenizer.get_tokenizer)
+            strategy: 'fixed' windows, or 'semantic' chunks that end where the
+                similarity of adjacent sentence embeddings drops
+            embedding_model: Model embedding sentences for 'semantic'
+            ollama_host: Ollama server host for 'semantic'
+            breakpoint_percentile: Adjacent-sentence similarities below this
+                percentile of the text's similarities become chunk breaks
         """
+        if chunk_unit not in CHUNK_UNITS:
+            raise ValueError(f"Unsupported chunk unit '{chunk_unit}', expected one of {CHUNK_UNITS}")
+        if strategy not in CHUNK_STRATEGIES:
+            raise ValueError(f"Unsupported chunk strategy '{strategy}', expected one of {CHUNK_STRATEGIES}")
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        if chunk_overlap < 0:
+            raise ValueError(f"chunk_overlap must not be negative, got {chunk_overlap}")
+
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.chunk_unit = chunk_unit
+        self.tokenizer_name = tokenizer
+        self.tokenizer = get_tokenizer(tokenizer) if chunk_unit == 'tokens' else None
+        self.strategy = strategy
+        self.embedding_model = embedding_model
+        self.ollama_host = ollama_host
+        self.breakpoint_percentile = breakpoint_percentile
 
     def chunk_text(self, text: str, metadata: Dict = None) -> List[Dict]:
         """
@@ -31,76 +99,427 @@ class DocumentProcessor:
             metadata = {}
 
         chunks = []
-        start = 0
 
-        while start < len(text):
-            end = start + self.chunk_size
+        for start, end, _ in self._spans(text):
+            chunk = self._make_chunk(text[start:end], metadata, len(chunks), start, end)
+            if chunk is not None:
+                chunks.append(chunk)
+
+        return chunks
+
+    def chunk_source(self, text: str, metadata: Dict = None) -> SourceChunks:
+        """
+        Chunk text into offsets only
+
+        Chunk i is text[starts[i]:ends[i]].strip() with the same boundaries
+        as chunk_text(), but no chunk strings or per-chunk metadata dicts are
+        built: the text and metadata are kept once for all chunks.
+
+        Args:
+            text: Text to chunk
+            metadata: Optional metadata shared by all chunks
+
+        Returns:
+            SourceChunks with the span offsets of every non-blank chunk
+        """
+        starts, ends = [], []
+        for start, end, _ in self._spans(text):
+            if _NON_SPACE.search(text, start, end):
+                starts.append(start)
+                ends.append(end)
+        return SourceChunks(text, metadata if metadata is not None else {}, starts, ends)
+
+    @staticmethod
+    def _make_chunk(span_text: str, metadata: Dict, index: int, start: int, end: int) -> Dict:
+        """Build a chunk dict, or None if the span is only whitespace"""
+        chunk_text = span_text.strip()
+        if not chunk_text:
+            return None
+
+        chunk_metadata = metadata.copy()
+        chunk_metadata['chunk_index'] = index
+        chunk_metadata['start_char'] = start
+        chunk_metadata['end_char'] = end
+
+        return {
+            'text': chunk_text,
+            'metadata': chunk_metadata
+        }
+
+    @staticmethod
+    def boundary_ends(text: str) -> List[int]:
+        """Sorted end offsets of every sentence boundary in text"""
+        ends = []
+        for pattern in _BOUNDARY_PATTERNS:
+            ends.extend(m.end() for m in pattern.finditer(text))
+        # Four already-sorted runs: timsort merges them in linear time
+        ends.sort()
+        return ends
+
+    def _next_start(self, start: int, end: int) -> int:
+        """Start of the chunk after (start, end): overlap, but never backwards"""
+        next_start = end - self.chunk_overlap
+        return next_start if next_start > start else end
+
+    @staticmethod
+    def _cut(text: str, start: int, end: int) -> int:
+        """Move end back to just after the last sentence boundary in (start, end]"""
+        # Search the window only, and each later separator only past the
+        # best boundary found so far: no scan of the whole text up front
+        cut = text.rfind('. ', start, end)
+        lo = cut + 1 if cut >= start else start
+        for sep in ('! ', '? ', '\n'):
+            i = text.rfind(sep, lo, end)
+            if i >= 0:
+                cut, lo = i, i + 1
+        if cut > start:
+            return cut + 1
+        return end
+
+    def _spans(self, text: str, start: int = 0) -> Iterator[Tuple[int, int, int]]:
+        """Yield (start, end, next_start) chunk spans with the configured strategy and unit"""
+        if self.strategy == 'semantic':
+            return self._semantic_spans(text, start)
+        return self._fixed_spans(text, start)
+
+    def _fixed_spans(self, text: str, start: int = 0) -> Iterator[Tuple[int, int, int]]:
+        """Fixed-size spans in the configured unit"""
+        if self.chunk_unit == 'tokens':
+            return self._token_spans(text, start)
+        return self._chunk_spans(text, start)
+
+    def _sentences(self, text: str, start: int) -> List[Tuple[int, int]]:
+        """(start, end) of each non-blank sentence; blank runs join the sentence before"""
+        length = len(text)
+        cuts = [end for end in self.boundary_ends(text) if start < end < length]
+
+        sentences = []
+        prev = start
+        for end in cuts + [length]:
+            if end <= prev:
+                continue
+            if _NON_SPACE.search(text, prev, end) or not sentences:
+                sentences.append((prev, end))
+            else:
+                sentences[-1] = (sentences[-1][0], end)
+            prev = end
+        return sentences
+
+    def _semantic_spans(self, text: str, start: int = 0) -> Iterator[Tuple[int, int, int]]:
+        """
+        Yield (start, end, next_start) spans that break where topics shift
+
+        Sentences are embedded in batches through the shared embedding cache
+        and the cosine similarity of every adjacent pair is computed in one
+        vectorized pass. Pairs below breakpoint_percentile of the text's
+        similarities are breaks. Sentences are grouped up to each break,
+        except that a chunk is always cut before it would exceed chunk_size
+        and only breaks once it holds a quarter of chunk_size. A sentence
+        longer than chunk_size is split by the fixed chunker. Chunks do not
+        overlap.
+        """
+        sentences = self._sentences(text, start)
+        if not sentences:
+            return
+
+        try:
+            cache = get_embedding_cache(self.embedding_model, self.ollama_host)
+            vectors = cache.embed_batch([text[a:b].strip() for a, b in sentences])
+        except Exception as e:
+            print(f"⚠️  Sentence embedding failed ({e}), using fixed-size chunks")
+            yield from self._fixed_spans(text, start)
+            return
+
+        norms = np.linalg.norm(vectors, axis=1)
+        norms[norms == 0] = 1.0
+        vectors /= norms[:, None]
+        similarity = np.einsum('ij,ij->i', vectors[:-1], vectors[1:])
+        if len(similarity):
+            breaks = similarity < np.percentile(similarity, self.breakpoint_percentile)
+        else:
+            breaks = similarity.astype(bool)
+
+        if self.chunk_unit == 'tokens':
+            tok_starts, _ = self.tokenizer.offsets(text)
+
+            def size(a, b):
+                return bisect_left(tok_starts, b) - bisect_left(tok_starts, a)
+        else:
+            def size(a, b):
+                return b - a
+        min_size = self.chunk_size // 4
+
+        groups = []
+        group_start, group_end = sentences[0]
+        for i in range(1, len(sentences)):
+            a, b = sentences[i]
+            if (breaks[i - 1] and size(group_start, group_end) >= min_size) \
+                    or size(group_start, b) > self.chunk_size:
+                groups.append((group_start, group_end))
+                group_start = a
+            group_end = b
+        groups.append((group_start, group_end))
+
+        for a, b in groups:
+            if size(a, b) > self.chunk_size:
+                # One sentence over the limit: fixed-size pieces of it
+                pieces = list(self._fixed_spans(text[:b], a))
+                pieces[-1] = (pieces[-1][0], pieces[-1][1], b)
+                yield from pieces
+            else:
+                yield a, b, b
+
+    def _chunk_spans(self, text: str, start: int = 0) -> Iterator[Tuple[int, int, int]]:
+        """
+        Yield (start, end, next_start) character spans of chunks
+
+        Each window of chunk_size characters is cut after the last sentence
+        boundary that fits inside it, searched for within the window only.
+        The next window starts chunk_overlap characters
+        before the cut, but always strictly after the previous start, so the
+        whole pass is linear in the text length.
+        """
+        length = len(text)
+
+        while start < length:
+            end = min(start + self.chunk_size, length)
 
             # Try to break at sentence boundaries
-            if end < len(text):
-                # Look for sentence endings
-                sentence_end = max(
-                    text.rfind('. ', start, end),
-                    text.rfind('! ', start, end),
-                    text.rfind('? ', start, end),
-                    text.rfind('\n', start, end)
-                )
-
-                if sentence_end > start:
-                    end = sentence_end + 1
-
-            chunk_text = text[start:end].strip()
-
-            if chunk_text:
-                chunk_metadata = metadata.copy()
-                chunk_metadata['chunk_index'] = len(chunks)
-                chunk_metadata['start_char'] = start
-                chunk_metadata['end_char'] = end
-
-                chunks.append({
-                    'text': chunk_text,
-                    'metadata': chunk_metadata
-                })
+            if end < length:
+                end = self._cut(text, start, end)
 
             # Move to next chunk with overlap
-            start = end - self.chunk_overlap
+            next_start = self._next_start(start, end)
+            yield start, end, next_start
 
-        return chunks
+            if end >= length:
+                break
+
+            start = next_start
+
+    def _token_spans(self, text: str, start: int = 0) -> Iterator[Tuple[int, int, int]]:
+        """
+        Yield (start, end, next_start) character spans holding chunk_size tokens
+
+        The text is tokenized once; windows are then token index ranges, so
+        counting is incremental arithmetic over the precomputed offsets. Cuts
+        snap back to sentence boundaries like the character chunker, and
+        chunk_overlap tokens are repeated, never moving backwards.
+        """
+        tok_starts, tok_ends = self.tokenizer.offsets(text)
+        num_tokens = len(tok_ends)
+        length = len(text)
+
+        first = bisect_right(tok_starts, start - 1)
+
+        while first < num_tokens:
+            last = first + self.chunk_size  # exclusive token index
+            if last < num_tokens:
+                end = self._cut(text, start, tok_ends[last - 1])
+                # Tokens fully inside the cut
+                taken = max(bisect_right(tok_ends, end) - first, 1)
+                end = max(end, tok_ends[first + taken - 1])
+            else:
+                end, taken = length, num_tokens - first
+
+            next_first = first + taken - self.chunk_overlap
+            if next_first <= first:
+                next_first = first + taken
+            next_start = tok_starts[next_first] if next_first < num_tokens else length
+
+            yield start, end, next_start
+
+            if end >= length or next_first >= num_tokens:
+                break
+
+            first, start = next_first, next_start
 
     def load_text_file(self, filepath: str) -> str:
         """Load text from a file"""
         with open(filepath, 'r', encoding='utf-8') as f:
             return f.read()
 
-    def load_directory(self, directory: str, pattern='*.txt') -> List[Dict]:
+    @staticmethod
+    def read_text_file(filepath: str) -> Tuple[str, Dict]:
         """
-        Load all files matching pattern from directory
+        Load text from a file along with the stat and hash of what was read
+
+        The file is stat'ed before it is read and hashed from the same bytes
+        that are decoded, so a write racing the read leaves a newer mtime
+        than the one returned and is picked up by the next sync.
+
+        Returns:
+            (text, {'size', 'mtime_ns', 'sha256'}), text as load_text_file
+        """
+        with open(filepath, 'rb') as f:
+            st = os.fstat(f.fileno())
+            data = f.read()
+        file_stat = {
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'sha256': hashlib.sha256(data).hexdigest()
+        }
+        # Hold the bytes and the text together only while decoding
+        text = data.decode('utf-8')
+        del data
+        if '\r' in text:
+            # Universal newlines, like load_text_file
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text, file_stat
+
+    @staticmethod
+    def find_files(directory: str, pattern: Union[str, List[str]] = '*.txt') -> List[Path]:
+        """
+        Find files under directory matching one or more glob patterns
 
         Args:
             directory: Directory path
-            pattern: File pattern (e.g., '*.txt', '*.md')
+            pattern: Glob pattern, several separated by commas or spaces
+                (e.g. '**/*.md, *.txt'), or a list of patterns. '**/'
+                matches recursively.
 
         Returns:
-            List of dicts with 'text' and 'metadata' keys
+            Sorted, de-duplicated list of file paths
         """
-        documents = []
+        patterns = re.split(r'[,\s]+', pattern.strip()) if isinstance(pattern, str) else pattern
         dir_path = Path(directory)
 
-        for filepath in dir_path.glob(pattern):
-            if filepath.is_file():
+        found = set()
+        for pat in patterns:
+            if pat:
+                found.update(p for p in dir_path.glob(pat) if p.is_file())
+
+        return sorted(found)
+
+    def _settings(self) -> Tuple:
+        """Constructor arguments, used to rebuild this processor in worker processes"""
+        return (self.chunk_size, self.chunk_overlap, self.chunk_unit, self.tokenizer_name,
+                self.strategy, self.embedding_model, self.ollama_host, self.breakpoint_percentile)
+
+    def iter_paths_sources(self, paths: List[Path], workers: int = 1, failed: List[str] = None,
+                           max_pending_bytes: int = 64 << 20) -> Iterator[SourceChunks]:
+        """
+        Read and chunk the given files in order, one SourceChunks per file
+
+        Each file is read whole: the vector store keeps every source text to
+        slice its chunks from (see chunk_source and VectorStore.add_chunks),
+        so indexing holds each file in memory once however it is read, and
+        peak memory grows with the largest file. Only the files in flight are
+        bounded, by count and by max_pending_bytes.
+
+        Args:
+            paths: Files to read
+            workers: Processes reading, decoding and chunking files. 1 reads
+                each file in this process; None uses every CPU. Sources are
+                always yielded in the order of paths.
+            failed: Paths of files that could not be read are appended here
+            max_pending_bytes: On-disk bytes of files submitted to workers but
+                not yet consumed; one file is always allowed
+
+        Yields:
+            SourceChunks whose file_stat describes the bytes read
+        """
+        paths = [Path(p) for p in paths]
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        if workers <= 1 or len(paths) < 2:
+            for filepath in paths:
                 try:
-                    text = self.load_text_file(str(filepath))
-                    metadata = {
-                        'source': str(filepath),
-                        'filename': filepath.name
-                    }
-                    documents.append({
-                        'text': text,
-                        'metadata': metadata
-                    })
-                    print(f"  Loaded: {filepath.name}")
+                    text, file_stat = self.read_text_file(str(filepath))
+                    source = self.chunk_source(text, _file_metadata(filepath))._replace(file_stat=file_stat)
                 except Exception as e:
                     print(f"  Error loading {filepath.name}: {e}")
+                    if failed is not None:
+                        failed.append(str(filepath))
+                    continue
+                yield source
+                print(f"  Loaded: {filepath.name}")
+            return
+
+        def size(filepath):
+            try:
+                return filepath.stat().st_size
+            except OSError:
+                return 0  # The worker reports the error
+
+        # Keep a bounded window of files in flight and consume it in
+        # submission order: deterministic output, bounded memory
+        settings = self._settings()
+        max_pending = workers * 4
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            pending_bytes = 0
+            next_index = 0
+
+            while pending or next_index < len(paths):
+                while next_index < len(paths) and len(pending) < max_pending and (
+                        not pending or pending_bytes < max_pending_bytes):
+                    filepath = paths[next_index]
+                    nbytes = size(filepath)
+                    pending.append((executor.submit(_load_and_chunk_file, settings, str(filepath)), nbytes))
+                    pending_bytes += nbytes
+                    next_index += 1
+
+                future, nbytes = pending.popleft()
+                pending_bytes -= nbytes
+                filepath, source, error = future.result()
+                name = Path(filepath).name
+
+                if error is not None:
+                    print(f"  Error loading {name}: {error}")
+                    if failed is not None:
+                        failed.append(filepath)
+                    continue
+
+                yield source
+                print(f"  Loaded: {name}")
+
+    @staticmethod
+    def iter_span_batches(sources: Iterable[SourceChunks], batch_size: int = 64) -> Iterator[List[Tuple]]:
+        """
+        Group the chunks of a SourceChunks stream into batches of spans
+
+        Spans are (text, metadata, start, end, chunk_index) tuples for
+        VectorStore.add_chunks; a batch may cover several sources. Chunk
+        strings, metadata dicts and embeddings are only built per batch, so
+        their memory follows batch_size; the source texts themselves are
+        kept by the store (see iter_paths_sources).
+        """
+        batch = []
+        for source in sources:
+            for span in source.spans():
+                batch.append(span)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+
+        if batch:
+            yield batch
+
+    def load_directory(self, directory: str, pattern='*.txt') -> List[Dict]:
+        """
+        Load all files matching pattern from directory
+
+        Args:
+            directory: Directory path
+            pattern: File pattern(s) (e.g., '*.txt', '**/*.md, *.txt')
+
+        Returns:
+            List of dicts with 'text' and 'metadata' keys
+        """
+        documents = []
+
+        for filepath in self.find_files(directory, pattern):
+            try:
+                text = self.load_text_file(str(filepath))
+                documents.append({
+                    'text': text,
+                    'metadata': _file_metadata(filepath)
+                })
+                print(f"  Loaded: {filepath.name}")
+            except Exception as e:
+                print(f"  Error loading {filepath.name}: {e}")
 
         return documents
 
@@ -201,3 +620,28 @@ beyond their training data, reducing hallucinations and improving factual accura
                 f.write(content.strip())
 
         print(f"✓ Created {len(samples)} sample documents in {output_dir}")
+
+
+def _file_metadata(filepath: Path) -> Dict:
+    """Metadata attached to every chunk of a file"""
+    return {
+        'source': str(filepath),
+        'filename': filepath.name
+    }
+
+
+@lru_cache(maxsize=4)
+def _worker_processor(settings: Tuple) -> DocumentProcessor:
+    """One processor (and tokenizer) per worker process and settings"""
+    return DocumentProcessor(*settings)
+
+
+def _load_and_chunk_file(settings: Tuple, filepath: str) -> Tuple[str, SourceChunks, str]:
+    """Process pool task: read, decode and chunk one file into offsets"""
+    try:
+        processor = _worker_processor(settings)
+        text, file_stat = processor.read_text_file(filepath)
+        source = processor.chunk_source(text, _file_metadata(Path(filepath)))._replace(file_stat=file_stat)
+        return filepath, source, None
+    except Exception as e:
+        return filepath, None, str(e)
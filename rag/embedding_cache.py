@@ -0,0 +1,108 @@
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List
+import numpy as np
+from embedding_provider import get_provider
+
+
+class EmbeddingCache:
+    """
+    LRU cache of embeddings for one model, filled with batched requests
+
+    Texts missing from the cache are de-duplicated and sent to the
+    embedding provider batch_size at a time, so embedding thousands of
+    sentences costs a handful of requests instead of one per text.
+    """
+
+    def __init__(
+        self,
+        embedding_model='nomic-embed-text',
+        ollama_host='http://localhost:11434',
+        max_entries=50000,
+        batch_size=256,
+        embedder=None
+    ):
+        """
+        Initialize embedding cache
+
+        Args:
+            embedding_model: Model to use for embeddings
+            ollama_host: Ollama server host
+            max_entries: Embeddings kept before least recently used are evicted
+            batch_size: Texts per embed request
+            embedder: Embedding provider to share (default: one for embedding_model)
+        """
+        self.embedding_model = embedding_model
+        self.ollama_host = ollama_host
+        self.embedder = embedder or get_provider(embedding_model, ollama_host)
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+
+        self._entries: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts, using cached embeddings where possible
+
+        Returns:
+            (len(texts), dim) float32 matrix, one row per text
+        """
+        found = {}
+        with self._lock:
+            for text in texts:
+                vector = self._entries.get(text)
+                if vector is not None:
+                    self._entries.move_to_end(text)
+                    found[text] = vector
+
+        missing = [text for text in dict.fromkeys(texts) if text not in found]
+        hits = sum(1 for text in texts if text in found)
+
+        for i in range(0, len(missing), self.batch_size):
+            batch = missing[i:i + self.batch_size]
+            vectors = np.asarray(self.embedder.embed(batch), dtype=np.float32)
+            self.requests += 1
+
+            with self._lock:
+                for text, vector in zip(batch, vectors):
+                    found[text] = vector
+                    self._entries[text] = vector
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        self.hits += hits
+        self.misses += len(texts) - hits
+
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([found[text] for text in texts])
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed one text"""
+        return self.embed_batch([text])[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Cache size and hit statistics"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'requests': self.requests
+        }
+
+
+@lru_cache(maxsize=8)
+def get_embedding_cache(embedding_model: str, ollama_host: str) -> EmbeddingCache:
+    """Shared embedding cache per model and host in this process"""
+    return EmbeddingCache(embedding_model, ollama_host)
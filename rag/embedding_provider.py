@@ -0,0 +1,132 @@
+import re
+import zlib
+from typing import Dict, List, Sequence
+import numpy as np
+from ollama_client import LazyClient
+
+# Embedding model names served by HashingEmbeddings: 'hash' or 'hash-<dim>'
+_HASH_MODEL = re.compile(r'hash(?:-(\d+))?')
+
+
+class EmbeddingProvider:
+    """
+    Turns texts into embedding vectors
+
+    Subclasses implement embed(); `model` is the name stored in index files
+    and compared when queries and indexes meet, so two providers must only
+    share a name if their vectors are interchangeable.
+    """
+
+    model = None
+    keep_alive = None  # Only meaningful for providers backed by a server
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed several texts with one request
+
+        Returns:
+            (len(texts), dim) float32 matrix; raises on failure
+        """
+        raise NotImplementedError
+
+    def embed_one(self, text: str) -> np.ndarray:
+        """Embed one text"""
+        return self.embed([text])[0]
+
+    def ping(self, keep_alive=None) -> Dict:
+        """Load the model ahead of use; the server response, or None if there is nothing to load"""
+        return None
+
+
+class OllamaEmbeddings(EmbeddingProvider):
+    """Embeddings from an Ollama server"""
+
+    def __init__(self, model: str = 'nomic-embed-text', ollama_host: str = 'http://localhost:11434',
+                 keep_alive=None):
+        """
+        Initialize Ollama embeddings
+
+        Args:
+            model: Ollama embedding model
+            ollama_host: Ollama server host
+            keep_alive: How long Ollama keeps the model loaded after a
+                request (None = server default)
+        """
+        self.model = model
+        self.ollama_host = ollama_host
+        self.keep_alive = keep_alive
+        self.client = LazyClient(ollama_host)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        response = self.client.embed(model=self.model, input=list(texts), keep_alive=self.keep_alive)
+        return np.asarray(response['embeddings'], dtype=np.float32)
+
+    def ping(self, keep_alive=None) -> Dict:
+        return self.client.embed(model=self.model, input='ping', keep_alive=keep_alive)
+
+
+class HashingEmbeddings(EmbeddingProvider):
+    """
+    Deterministic local embeddings by feature hashing
+
+    Each lower-cased word and each character trigram of a word is hashed
+    (CRC32, stable across processes) to one of `dim` signed buckets and the
+    counts are L2-normalized. Texts sharing words or word pieces score
+    close, so retrieval behaves sensibly without any model: for CI, load
+    tests and machines without Ollama. It does not capture meaning beyond
+    shared vocabulary.
+    """
+
+    def __init__(self, dim: int = 512, model: str = None):
+        """
+        Initialize hashing embeddings
+
+        Args:
+            dim: Embedding dimension
+            model: Name recorded in indexes (default 'hash-<dim>')
+        """
+        if dim < 2:
+            raise ValueError(f"Hashing embedding dimension must be at least 2, got {dim}")
+        self.dim = dim
+        self.model = model or f"hash-{dim}"
+
+    @staticmethod
+    def _features(text: str) -> List[str]:
+        features = []
+        for word in re.findall(r'\w+', text.lower()):
+            features.append(word)
+            padded = f"<{word}>"
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def _vector(self, text: str) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(f.encode('utf-8')) for f in self._features(text)), dtype=np.int64)
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if len(hashes):
+            # Low bits pick the bucket, the top bit the sign, so collisions cancel out on average
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+            vector += np.bincount(hashes % self.dim, weights=signs, minlength=self.dim).astype(np.float32)
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                vector /= norm
+        return vector
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.stack([self._vector(text) for text in texts])
+
+
+def get_provider(model: str, ollama_host: str = 'http://localhost:11434', keep_alive=None) -> EmbeddingProvider:
+    """
+    Provider for an embedding model name
+
+    'hash' and 'hash-<dim>' (e.g. 'hash-256') are local HashingEmbeddings;
+    every other name is an Ollama model.
+    """
+    match = _HASH_MODEL.fullmatch(model or '')
+    if match:
+        return HashingEmbeddings(int(match.group(1) or 512), model=model)
+    return OllamaEmbeddings(model, ollama_host, keep_alive)
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Sweep retrieval settings against a golden set
+
+Indexes a directory once per (chunk size, chunk overlap) pair, copies each
+index into every vector storage dtype, and retrieves every golden question
+at every top-k. Each configuration gets one table row with recall@k, MRR,
+prompt tokens and search latency; rows no other row beats on all four are
+flagged Pareto-optimal.
+
+With --score-gap / --min-score, every top-k is also evaluated as the
+maximum of adaptive retrieval (see vector_store.adaptive_cutoff), and the
+prompt token savings and recall change against fixed top-k are summarized.
+
+Usage:
+    python eval_harness.py [directory] [--golden data/eval] [--top-k 1,3,5]
+                           [--chunk-size 300,500,800] [--chunk-overlap 0,50,100]
+                           [--dtype float64,float32,float16] [--llm] [-o results.jsonl]
+                           [--score-gap 0,0.2,0.4] [--min-score 0,0.5] [--min-k 1]
+
+Golden set lines are JSON objects:
+    {"question": ..., "sources": [filename, ...], "evidence": [phrase, ...]}
+A retrieved chunk is relevant when it comes from one of the sources and,
+if evidence is given, contains one of the phrases (case-insensitive).
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+from tokenizer import count_tokens
+from vector_store import VectorStore, adaptive_cutoff
+
+# Objectives of the Pareto flag: (row key, True if higher is better)
+OBJECTIVES = (('recall', True), ('mrr', True), ('prompt_tokens', False), ('search_ms', False))
+
+
+def load_golden_set(path: str) -> List[Dict]:
+    """Golden questions from a JSONL file or every *.jsonl file of a directory"""
+    path = Path(path)
+    files = sorted(path.glob('*.jsonl')) if path.is_dir() else [path]
+    items = []
+    for file in files:
+        with open(file, encoding='utf-8') as f:
+            items.extend(json.loads(line) for line in f if line.strip())
+    return items
+
+
+def is_relevant(text: str, metadata: Dict, item: Dict) -> bool:
+    """Whether a retrieved chunk answers a golden question"""
+    names = {os.path.basename(s) for s in item.get('sources', [])}
+    source = metadata.get('filename') or os.path.basename(metadata.get('source', ''))
+    if source not in names:
+        return False
+    evidence = item.get('evidence')
+    if not evidence:
+        return True
+    text = ' '.join(text.lower().split())
+    return any(' '.join(phrase.lower().split()) in text for phrase in evidence)
+
+
+def pareto_flags(rows: Sequence[Dict]) -> List[bool]:
+    """True for each row that no other row matches or beats on every objective"""
+    def dominates(a, b):
+        better = False
+        for key, higher in OBJECTIVES:
+            x, y = (a[key], b[key]) if higher else (b[key], a[key])
+            if x < y:
+                return False
+            better = better or x > y
+        return better
+
+    return [not any(dominates(other, row) for other in rows if other is not row) for row in rows]
+
+
+class RetrievalEval:
+    """
+    Measure retrieval quality, prompt size and latency per configuration
+
+    Query embeddings are computed once and reused for every configuration,
+    so the sweep costs one embedding request per chunk of each (size,
+    overlap) index plus one batch for the questions.
+    """
+
+    def __init__(self, engine, golden: List[Dict], directory: str, pattern: str = '**/*.md, **/*.txt',
+                 repeats: int = 3, index_kwargs: Dict = None):
+        """
+        Initialize evaluation
+
+        Args:
+            engine: RAGEngine used for indexing, prompts and generation
+            golden: Golden set items, see load_golden_set()
+            directory: Directory of documents to index
+            pattern: Glob pattern(s) of the documents
+            repeats: Timed searches per question
+            index_kwargs: Extra index_from_directory() arguments (chunk_unit, ...)
+        """
+        self.engine = engine
+        self.golden = golden
+        self.directory = directory
+        self.pattern = pattern
+        self.repeats = max(1, repeats)
+        self.index_kwargs = index_kwargs or {}
+        self.embed_ms = None  # Mean query embedding time per question
+        self._queries = None
+
+    def _index(self, chunk_size: int, chunk_overlap: int) -> VectorStore:
+        """Index the directory from scratch with one chunking setting"""
+        engine = self.engine
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            engine.clear_index()
+            engine.index_from_directory(self.directory, self.pattern, chunk_size=chunk_size,
+                                        chunk_overlap=chunk_overlap, workers=1, **self.index_kwargs)
+        return engine.vector_store
+
+    @staticmethod
+    def _with_dtype(store: VectorStore, dtype: str) -> VectorStore:
+        """Copy of an index in another storage dtype, without re-embedding"""
+        if dtype == store.dtype:
+            return store
+        copy = VectorStore(embedding_model=store.embedding_model, ollama_host=store.ollama_host, dtype=dtype)
+        snap = store.snapshot()
+        for i in range(snap.size):
+            source, meta, start, end, chunk_index = snap.chunks.row(i)
+            copy._append(snap.chunks.text(i), snap.matrix[i], meta, chunk_id=snap.ids[i],
+                         span=(source, start, end, chunk_index))
+        return copy
+
+    def _query_embeddings(self, store: VectorStore) -> np.ndarray:
+        if self._queries is None:
+            start = time.perf_counter()
+            self._queries = store.embed_queries([item['question'] for item in self.golden])
+            self.embed_ms = (time.perf_counter() - start) * 1000 / max(1, len(self.golden))
+        return self._queries
+
+    def _prompt_eval(self, prompt: str):
+        """(prompt_eval_count, prompt eval ms) reported by Ollama for one generated token"""
+        engine = self.engine
+        response = engine.client.chat(
+            model=engine.llm_model,
+            messages=[{'role': 'user', 'content': prompt}],
+            options={'num_predict': 1},
+            keep_alive=engine.keep_alive
+        )
+        return response.get('prompt_eval_count', 0), response.get('prompt_eval_duration', 0) / 1e6
+
+    def evaluate(self, store: VectorStore, top_k: int, llm: bool = False, min_k: int = 1,
+                 score_gap: float = 0.0, min_score: float = 0.0) -> Dict:
+        """
+        Retrieve every golden question from one index
+
+        Args:
+            store: Index to search
+            top_k: Results retrieved (the maximum with score_gap / min_score)
+            llm: Also measure prompt evaluation with the LLM
+            min_k, score_gap, min_score: Adaptive cutoff, see adaptive_cutoff()
+
+        Returns:
+            recall (share of questions with a relevant chunk in the top k),
+            mrr, retrieved (mean chunks kept), prompt_tokens (mean local
+            estimate), search_ms (median) and search_ms_p95; with llm also
+            prompt_eval_tokens and prompt_eval_ms measured by Ollama
+        """
+        engine = self.engine
+        queries = self._query_embeddings(store)
+        snap = store.snapshot()
+        store.search_by_embedding(queries[0], top_k, snap)  # warm caches before timing
+
+        hits, reciprocal_ranks, kept, tokens, timings, evaluated, eval_ms = [], [], [], [], [], [], []
+        for item, query in zip(self.golden, queries):
+            for _ in range(self.repeats):
+                start = time.perf_counter()
+                results, _ = store.search_by_embedding(query, top_k, snap)
+                if score_gap or min_score:
+                    results = results[:adaptive_cutoff([r[1] for r in results], min_k, score_gap, min_score)]
+                timings.append((time.perf_counter() - start) * 1000)
+            kept.append(len(results))
+
+            rank = next((r for r, (text, _, meta) in enumerate(results, 1) if is_relevant(text, meta, item)), None)
+            hits.append(rank is not None)
+            reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+
+            prompt = engine.create_rag_prompt(item['question'], engine.context_builder.build(results))
+            tokens.append(count_tokens(prompt))
+            if llm:
+                count, ms = self._prompt_eval(prompt)
+                evaluated.append(count)
+                eval_ms.append(ms)
+
+        timings.sort()
+        row = {
+            'recall': statistics.mean(hits),
+            'mrr': statistics.mean(reciprocal_ranks),
+            'retrieved': statistics.mean(kept),
+            'prompt_tokens': statistics.mean(tokens),
+            'search_ms': statistics.median(timings),
+            'search_ms_p95': timings[min(len(timings) - 1, int(0.95 * len(timings)))]
+        }
+        if llm:
+            row['prompt_eval_tokens'] = statistics.mean(evaluated)
+            row['prompt_eval_ms'] = statistics.mean(eval_ms)
+        return row
+
+    def sweep(self, top_ks: Iterable[int], chunk_sizes: Iterable[int], chunk_overlaps: Iterable[int],
+              dtypes: Iterable[str], llm: bool = False, score_gaps: Iterable[float] = (0.0,),
+              min_scores: Iterable[float] = (0.0,), min_k: int = 1) -> List[Dict]:
+        """
+        Evaluate every combination of the given settings
+
+        Overlaps not smaller than the chunk size are skipped. A score gap
+        and minimum score of 0 is plain fixed top-k.
+
+        Returns:
+            One row per configuration, with a 'pareto' flag
+        """
+        rows = []
+        for chunk_size in chunk_sizes:
+            for chunk_overlap in chunk_overlaps:
+                if chunk_overlap >= chunk_size:
+                    continue
+                base = self._index(chunk_size, chunk_overlap)
+                if not len(base):
+                    raise ValueError(f"No documents matching {self.pattern} in {self.directory}")
+                print(f"✓ Indexed chunk_size={chunk_size} overlap={chunk_overlap}: {len(base)} chunks")
+
+                for dtype in dtypes:
+                    store = self._with_dtype(base, dtype)
+                    for top_k in top_ks:
+                        for score_gap in score_gaps:
+                            for min_score in min_scores:
+                                row = {
+                                    'chunk_size': chunk_size,
+                                    'chunk_overlap': chunk_overlap,
+                                    'dtype': dtype,
+                                    'top_k': top_k,
+                                    'score_gap': score_gap,
+                                    'min_score': min_score,
+                                    'chunks': len(store)
+                                }
+                                row.update(self.evaluate(store, top_k, llm, min_k, score_gap, min_score))
+                                rows.append(row)
+
+        for row, pareto in zip(rows, pareto_flags(rows)):
+            row['pareto'] = pareto
+        return rows
+
+
+def adaptive_savings(rows: Sequence[Dict]) -> List[Dict]:
+    """
+    Compare each adaptive row with fixed top-k at the same other settings
+
+    Returns:
+        One dict per (score_gap, min_score) with the mean prompt token
+        saving (fraction), recall and MRR change and chunks kept, averaged
+        over every matching configuration
+    """
+    def setting(row):
+        return row['chunk_size'], row['chunk_overlap'], row['dtype'], row['top_k']
+
+    fixed = {setting(row): row for row in rows if not (row['score_gap'] or row['min_score'])}
+    groups = {}
+    for row in rows:
+        base = fixed.get(setting(row))
+        if base is None or base is row:
+            continue
+        groups.setdefault((row['score_gap'], row['min_score']), []).append((row, base))
+
+    summary = []
+    for (score_gap, min_score), pairs in groups.items():
+        entry = {
+            'score_gap': score_gap,
+            'min_score': min_score,
+            'token_savings': statistics.mean(1 - row['prompt_tokens'] / base['prompt_tokens'] for row, base in pairs),
+            'recall_change': statistics.mean(row['recall'] - base['recall'] for row, base in pairs),
+            'mrr_change': statistics.mean(row['mrr'] - base['mrr'] for row, base in pairs),
+            'retrieved': statistics.mean(row['retrieved'] for row, _ in pairs),
+            'fixed_retrieved': statistics.mean(base['retrieved'] for _, base in pairs)
+        }
+        if 'prompt_eval_ms' in pairs[0][0]:
+            entry['prompt_eval_ms_savings'] = statistics.mean(
+                1 - row['prompt_eval_ms'] / base['prompt_eval_ms'] for row, base in pairs if base['prompt_eval_ms']
+            )
+        summary.append(entry)
+    return summary
+
+
+def print_adaptive_savings(summary: List[Dict]):
+    """Print adaptive_savings() results"""
+    if not summary:
+        return
+    llm = 'prompt_eval_ms_savings' in summary[0]
+    width = 78 if llm else 66
+    print("\n" + "=" * width)
+    print("✂️  Adaptive top-k vs fixed top-k (mean over matching configurations)")
+    print("=" * width)
+    header = f"{'gap':>6}{'min score':>10}{'chunks':>14}{'prompt tok':>12}{'recall':>10}{'MRR':>8}"
+    if llm:
+        header += f"{'eval ms':>12}"
+    print(header)
+    print("-" * width)
+    for entry in summary:
+        chunks = f"{entry['retrieved']:.1f}/{entry['fixed_retrieved']:.1f}"
+        line = (f"{entry['score_gap']:>6.2f}{entry['min_score']:>10.2f}{chunks:>14}"
+                f"{-entry['token_savings']:>+12.0%}{entry['recall_change'] * 100:>+9.1f}p"
+                f"{entry['mrr_change']:>+8.2f}")
+        if llm:
+            line += f"{-entry['prompt_eval_ms_savings']:>+12.0%}"
+        print(line)
+    print("=" * width)
+    print("chunks: mean kept adaptive/fixed; recall change in percentage points")
+
+
+def print_table(rows: List[Dict], embed_ms: float = None):
+    """Print sweep results, Pareto-optimal rows marked with ★"""
+    llm = bool(rows) and 'prompt_eval_tokens' in rows[0]
+    adaptive = any(row['score_gap'] or row['min_score'] for row in rows)
+    width = (104 if llm else 86) + (20 if adaptive else 0)
+    print("\n" + "=" * width)
+    print("📊 Retrieval Evaluation")
+    if embed_ms is not None:
+        print(f"Query embedding: {embed_ms:.1f} ms per question (same for every configuration)")
+    print("=" * width)
+    header = f"{'':2}{'size':>6}{'overlap':>8}{'dtype':>9}{'top_k':>6}"
+    if adaptive:
+        header += f"{'gap':>6}{'min':>6}{'avg k':>8}"
+    header += (f"{'chunks':>7}{'recall@k':>10}{'MRR':>7}{'prompt tok':>12}{'search ms':>11}{'p95 ms':>8}")
+    if llm:
+        header += f"{'eval tok':>10}{'eval ms':>8}"
+    print(header)
+    print("-" * width)
+    for row in rows:
+        line = (f"{'★' if row['pareto'] else '':2}{row['chunk_size']:>6}{row['chunk_overlap']:>8}"
+                f"{row['dtype']:>9}{row['top_k']:>6}")
+        if adaptive:
+            line += f"{row['score_gap']:>6.2f}{row['min_score']:>6.2f}{row['retrieved']:>8.1f}"
+        line += (f"{row['chunks']:>7}{row['recall']:>10.0%}{row['mrr']:>7.2f}"
+                 f"{row['prompt_tokens']:>12.0f}{row['search_ms']:>11.3f}{row['search_ms_p95']:>8.3f}")
+        if llm:
+            line += f"{row['prompt_eval_tokens']:>10.0f}{row['prompt_eval_ms']:>8.0f}"
+        print(line)
+    print("=" * width)
+    print("★ Pareto-optimal: no other row has recall, MRR, prompt tokens and search time all at least as good")
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def _float_list(value: str) -> List[float]:
+    return [float(v) for v in value.split(',') if v.strip()]
+
+
+def main():
+    from rag_engine import RAGEngine
+    from model_warmer import parse_keep_alive
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Sweep retrieval settings against a golden set")
+    parser.add_argument('directory', nargs='?', default=root, help="Documents to index (default: this repo)")
+    parser.add_argument('--pattern', default='**/*.md, **/*.txt', help="Glob pattern(s) of the documents")
+    parser.add_argument('--golden', default=os.path.join(root, 'data', 'eval'), help="Golden set JSONL file or directory")
+    parser.add_argument('--top-k', type=_int_list, default=[1, 3, 5], help="Comma-separated top-k values")
+    parser.add_argument('--chunk-size', type=_int_list, default=[300, 500, 800], help="Comma-separated chunk sizes")
+    parser.add_argument('--chunk-overlap', type=_int_list, default=[0, 50, 100], help="Comma-separated overlaps")
+    parser.add_argument('--dtype', default='float64,float32,float16', help="Comma-separated storage dtypes")
+    parser.add_argument('--score-gap', type=_float_list, default=[0.0],
+                        help="Comma-separated adaptive score gaps (0 = fixed top-k)")
+    parser.add_argument('--min-score', type=_float_list, default=[0.0],
+                        help="Comma-separated adaptive minimum scores (0 = off)")
+    parser.add_argument('--min-k', type=int, default=1, help="Chunks always kept by adaptive retrieval")
+    parser.add_argument('--repeats', type=int, default=3, help="Timed searches per question")
+    parser.add_argument('--llm', action='store_true', help="Also measure prompt evaluation with the LLM")
+    parser.add_argument('-o', '--output', help="Write result rows to this JSONL file")
+    args = parser.parse_args()
+
+    golden = load_golden_set(args.golden)
+    if not golden:
+        print(f"✗ No golden questions in {args.golden}")
+        return 1
+
+    engine = RAGEngine(
+        llm_model=os.getenv('MODEL_NAME', 'llama3.1'),
+        embedding_model=os.getenv('EMBEDDING_MODEL', 'nomic-embed-text'),
+        ollama_host=os.getenv('OLLAMA_HOST', 'http://localhost:11434'),
+        context_budget=int(os.getenv('CONTEXT_BUDGET', '0')),
+        tokenizer=os.getenv('TOKENIZER', '') or None,
+        keep_alive=parse_keep_alive(os.getenv('KEEP_ALIVE', '30m')),
+        metrics=False
+    )
+    harness = RetrievalEval(engine, golden, args.directory, args.pattern, repeats=args.repeats, index_kwargs={
+        'chunk_unit': os.getenv('CHUNK_UNIT', 'chars'),
+        'tokenizer': os.getenv('TOKENIZER', '') or None,
+        'chunk_strategy': os.getenv('CHUNK_STRATEGY', 'fixed')
+    })
+    dtypes = [d.strip() for d in args.dtype.split(',') if d.strip()]
+    score_gaps = sorted(set(args.score_gap) | {0.0})
+    min_scores = sorted(set(args.min_score) | {0.0})
+    rows = harness.sweep(args.top_k, args.chunk_size, args.chunk_overlap, dtypes, llm=args.llm,
+                         score_gaps=score_gaps, min_scores=min_scores, min_k=args.min_k)
+
+    print_table(rows, harness.embed_ms)
+    print_adaptive_savings(adaptive_savings(rows))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row) + '\n')
+        print(f"✓ Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
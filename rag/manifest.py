@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Bump when the manifest layout changes
+MANIFEST_VERSION = 1
+
+
+class FileManifest:
+    """
+    Record of indexed files: path, size, mtime, content hash and chunk IDs
+
+    A file whose size and mtime are unchanged is assumed unchanged without
+    reading it. Otherwise its content hash decides whether it really
+    changed, so touching a file does not trigger re-embedding.
+    """
+
+    def __init__(self):
+        self.files: Dict[str, Dict] = {}  # Absolute path -> entry
+
+    @staticmethod
+    def file_hash(filepath: str, block_size: int = 1 << 20) -> str:
+        """SHA-256 of a file's content, read in blocks"""
+        digest = hashlib.sha256()
+        with open(filepath, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def key(filepath) -> str:
+        """Manifest key of a file: its resolved absolute path"""
+        return str(Path(filepath).resolve())
+
+    def diff(self, directory: str, paths: List[Path]) -> Tuple[List[Path], List[Path], List[str], int]:
+        """
+        Compare files on disk against the manifest
+
+        Args:
+            directory: Directory the paths were discovered in
+            paths: Files currently matching the index pattern
+
+        Returns:
+            (added, changed, removed, unchanged_count). removed holds manifest
+            keys under directory whose file no longer exists or can no
+            longer be read.
+        """
+        added, changed, removed = [], [], []
+        unchanged = 0
+
+        for path in paths:
+            key = self.key(path)
+            entry = self.files.get(key)
+            if entry is None:
+                added.append(path)
+                continue
+
+            try:
+                st = os.stat(key)
+                if st.st_size == entry['size'] and st.st_mtime_ns == entry['mtime_ns']:
+                    unchanged += 1
+                elif self.file_hash(key) == entry['sha256']:
+                    # Touched but identical: just refresh the stat fields
+                    entry['size'], entry['mtime_ns'] = st.st_size, st.st_mtime_ns
+                    unchanged += 1
+                else:
+                    changed.append(path)
+            except OSError:
+                # Deleted (or made unreadable) since the directory was listed
+                removed.append(key)
+
+        root = self.key(directory) + os.sep
+        removed += [
+            key for key in self.files
+            if key.startswith(root) and key not in removed and not os.path.exists(key)
+        ]
+
+        return added, changed, removed, unchanged
+
+    def record(self, filepath, chunk_ids: List[int], file_stat: Dict = None):
+        """
+        Store the stat, hash and chunk IDs of a file
+
+        Args:
+            filepath: Indexed file
+            chunk_ids: Chunk IDs its content produced
+            file_stat: 'size', 'mtime_ns' and 'sha256' of the content that
+                was indexed (see DocumentProcessor.read_text_file). None
+                stats and hashes the file as it is now, which misses writes
+                made since it was read.
+        """
+        key = self.key(filepath)
+        if file_stat is None:
+            st = os.stat(key)
+            file_stat = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': self.file_hash(key)}
+        self.files[key] = {
+            'size': file_stat['size'],
+            'mtime_ns': file_stat['mtime_ns'],
+            'sha256': file_stat['sha256'],
+            'chunk_ids': list(chunk_ids)
+        }
+
+    def chunk_ids(self, filepath) -> List[int]:
+        """Chunk IDs produced by a file, empty if unknown"""
+        entry = self.files.get(self.key(filepath))
+        return entry['chunk_ids'] if entry else []
+
+    def remove(self, filepath) -> List[int]:
+        """Forget a file and return the chunk IDs it produced"""
+        entry = self.files.pop(self.key(filepath), None)
+        return entry['chunk_ids'] if entry else []
+
+    def clear(self):
+        self.files = {}
+
+    def save(self, filepath: str):
+        """Write the manifest as JSON"""
+        data = {'version': MANIFEST_VERSION, 'files': self.files}
+        tmp = filepath + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp, filepath)
+
+    def load(self, filepath: str):
+        """Read a manifest written by save()"""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.files = data['files']
+
+    def __len__(self):
+        return len(self.files)
@@ -0,0 +1,171 @@
+import contextlib
+import itertools
+import json
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Optional
+
+# Histogram bucket upper bounds in seconds: 50 µs to ~2 minutes, each a
+# quarter power of two (~19%) above the previous one
+BUCKET_BOUNDS = tuple(5e-5 * 2 ** (i / 4) for i in range(85))
+
+# Shared no-op context returned by disabled spans
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram
+
+    Memory and observe() cost stay constant however many samples arrive.
+    Percentiles are interpolated within a bucket, so they are accurate to
+    a bucket width (about 19%).
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Approximate q-quantile in seconds (0.0 when empty)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = BUCKET_BOUNDS[i - 1] if i > 0 else 0.0
+                upper = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max
+                value = lower + (upper - lower) * (rank - seen) / n
+                return min(value, self.max)
+            seen += n
+        return self.max
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'max': self.max
+        }
+
+
+class _Span:
+    """Times one stage and records it when the block exits"""
+
+    __slots__ = ('metrics', 'stage', 'trace', 'start')
+
+    def __init__(self, metrics: 'Metrics', stage: str, trace: Optional[int]):
+        self.metrics = metrics
+        self.stage = stage
+        self.trace = trace
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start, self.trace)
+        return False
+
+
+class Metrics:
+    """
+    Per-stage latency histograms with Prometheus and JSONL trace output
+
+    Code wraps each stage in `with metrics.span('embed', trace):`. When
+    disabled, span() hands back a shared no-op context and observe()
+    returns at once, so instrumentation costs a method call per stage.
+    With trace_path set, every span is also appended to that file as one
+    JSON line: {"ts", "trace", "stage", "ms"}, where spans of one query
+    share the trace ID from new_trace().
+    """
+
+    def __init__(self, enabled: bool = True, trace_path: str = None, namespace: str = 'rag'):
+        """
+        Initialize metrics
+
+        Args:
+            enabled: Record spans at all
+            trace_path: JSONL file to append every span to (None = no trace)
+            namespace: Prefix of the Prometheus metric names
+        """
+        self.enabled = enabled
+        self.trace_path = trace_path
+        self.namespace = namespace
+
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self._trace_ids = itertools.count(1)
+        self._trace_file = open(trace_path, 'a', encoding='utf-8', buffering=1) if trace_path and enabled else None
+
+    def new_trace(self) -> Optional[int]:
+        """ID tying the spans of one request together in the trace log"""
+        return next(self._trace_ids) if self._trace_file is not None else None
+
+    def span(self, stage: str, trace: Optional[int] = None):
+        """Context manager timing a stage"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage, trace)
+
+    def observe(self, stage: str, seconds: float, trace: Optional[int] = None):
+        """Record a duration measured elsewhere"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.observe(seconds)
+            if self._trace_file is not None:
+                self._trace_file.write(json.dumps({
+                    'ts': round(time.time() - seconds, 6),
+                    'trace': trace,
+                    'stage': stage,
+                    'ms': round(seconds * 1000, 3)
+                }) + '\n')
+
+    def percentiles(self) -> Dict[str, Dict]:
+        """count / mean / p50 / p95 / p99 / max seconds per stage"""
+        with self._lock:
+            return {stage: histogram.summary() for stage, histogram in self._histograms.items()}
+
+    def prometheus(self) -> str:
+        """Histograms in the Prometheus text exposition format"""
+        name = f"{self.namespace}_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Time spent per RAG pipeline stage",
+            f"# TYPE {name} histogram"
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, n in zip(BUCKET_BOUNDS, histogram.counts):
+                    cumulative += n
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound:.6g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def close(self):
+        if self._trace_file is not None:
+            self._trace_file.close()
+            self._trace_file = None
@@ -0,0 +1,147 @@
+import threading
+import time
+from typing import Optional
+from vector_store import VectorStore
+
+
+class IndexMigration:
+    """
+    Re-embed an existing index with a new embedding model in the background
+
+    The old vector store keeps serving queries while a new store is built
+    from its documents. Embedding is paced to at most `rate` documents per
+    second so live queries still get Ollama time. Once the new store has
+    caught up with the old one (including documents indexed while the
+    migration was running) the engine swaps to it atomically.
+    """
+
+    def __init__(self, engine, new_model: str, rate: Optional[float] = None):
+        """
+        Initialize migration
+
+        Args:
+            engine: RAGEngine whose index is migrated
+            new_model: Embedding model for the new index
+            rate: Maximum documents embedded per second (None = unlimited)
+        """
+        self.engine = engine
+        self.new_model = new_model
+        self.rate = rate
+        self.old_model = engine.vector_store.embedding_model
+        self.new_store = VectorStore(
+            embedding_model=new_model,
+            ollama_host=engine.ollama_host,
+            dtype=engine.vector_store.dtype,
+            text_compression=engine.vector_store.text_compression
+        )
+
+        self.state = 'pending'  # pending, running, completed, cancelled, failed
+        self.error = None
+        self.processed = 0
+        self.started_at = None
+        self.finished_at = None
+
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the migration in a background thread"""
+        self.state = 'running'
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name='index-migration', daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """Stop the migration; the old index keeps serving"""
+        self._cancel.set()
+
+    def join(self, timeout: Optional[float] = None):
+        """Wait for the migration thread to finish"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def is_running(self) -> bool:
+        return self.state == 'running'
+
+    def _migrate_one(self, old_store: VectorStore, index: int, migrated: set) -> bool:
+        """Embed one old document into the new store under the same chunk ID"""
+        snap = old_store.snapshot()
+        if index >= snap.size:
+            return False
+        chunk_id = snap.ids[index]
+        if chunk_id in migrated:
+            return False
+
+        source, meta, start, end, chunk_index = snap.chunks.row(index)
+        doc = snap.chunks.text(index)
+        embedding = self.new_store._get_embedding(doc)
+        self.processed += 1
+        if embedding is None:
+            return False
+        # Shares the old store's source text instead of copying it
+        self.new_store._append(doc, embedding, meta, chunk_id=chunk_id, span=(source, start, end, chunk_index))
+        migrated.add(chunk_id)
+        return True
+
+    def _run(self):
+        old_store = self.engine.vector_store
+        interval = 1.0 / self.rate if self.rate else 0.0
+        next_time = time.monotonic()
+        migrated = set()
+        position = 0
+
+        try:
+            # Background phase: catch up with the old store at the paced rate.
+            # Deletes may shift positions; the final phase reconciles by ID.
+            while position < len(old_store):
+                if self._cancel.is_set():
+                    self.state = 'cancelled'
+                    return
+
+                if interval:
+                    delay = next_time - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    next_time = max(next_time, time.monotonic()) + interval
+
+                self._migrate_one(old_store, position, migrated)
+                position += 1
+
+            # Final phase: block writers, reconcile by chunk ID, then swap
+            with self.engine._index_lock:
+                if self._cancel.is_set():
+                    self.state = 'cancelled'
+                    return
+                if old_store is not self.engine.vector_store:
+                    raise RuntimeError("Index was replaced during migration")
+
+                old_ids = set(old_store.ids)
+                self.new_store.delete(migrated - old_ids)
+                for index in range(len(old_store)):
+                    self._migrate_one(old_store, index, migrated)
+
+                self.engine._swap_vector_store(self.new_store)
+
+            self.state = 'completed'
+        except Exception as e:
+            self.state = 'failed'
+            self.error = str(e)
+        finally:
+            self.finished_at = time.time()
+
+    def status(self) -> dict:
+        """Get migration progress"""
+        total = len(self.engine.vector_store) if self.is_running else self.processed
+        elapsed = (self.finished_at or time.time()) - self.started_at if self.started_at else 0.0
+        return {
+            'state': self.state,
+            'old_model': self.old_model,
+            'new_model': self.new_model,
+            'processed': self.processed,
+            'total': total,
+            'migrated': len(self.new_store.documents),
+            'elapsed_sec': elapsed,
+            'rate_limit': self.rate,
+            'error': self.error
+        }
@@ -0,0 +1,155 @@
+import threading
+import time
+from typing import Dict
+
+# A request whose load_duration exceeds this had to load the model from disk
+COLD_LOAD_SECONDS = 0.5
+
+
+def parse_keep_alive(value: str):
+    """keep_alive from a config string: '30m' stays a duration, '-1' / '600' become seconds, '' is None"""
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+class ModelWarmer:
+    """
+    Load the LLM and embedding model ahead of queries and keep them resident
+
+    warm_up() sends each model a minimal request with `keep_alive`, so
+    Ollama loads it now instead of on the first query. start() then pings
+    both models every `interval` seconds in a background thread, renewing
+    keep_alive before Ollama unloads them. With idle_limit set, pings stop
+    once the engine has not been queried for that many seconds and the
+    models are released when keep_alive runs out; the next query warms them
+    up again.
+    """
+
+    def __init__(self, engine, keep_alive=None, interval: float = 240, idle_limit: float = 0):
+        """
+        Initialize model warmer
+
+        Args:
+            engine: RAGEngine whose models are kept warm
+            keep_alive: How long Ollama keeps a model after a request
+                (duration string like '30m', seconds, -1 = forever,
+                None = server default of 5 minutes)
+            interval: Seconds between pings; keep it below keep_alive
+            idle_limit: Stop pinging after this many seconds without a
+                query (0 = always ping)
+        """
+        self.engine = engine
+        self.keep_alive = keep_alive
+        self.interval = interval
+        self.idle_limit = idle_limit
+
+        self.pings = 0
+        self.failures = 0
+        self.last_ping = None
+        self.last_error = None
+        self.models: Dict[str, Dict] = {}  # model -> load statistics
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _record_load(self, model: str, response, elapsed: float):
+        """Track the load_duration Ollama reported for a ping"""
+        load = (response.get('load_duration') or 0) / 1_000_000_000
+        stats = self.models.setdefault(model, {'pings': 0, 'cold_loads': 0, 'load_seconds': 0.0,
+                                               'last_load_seconds': 0.0, 'last_ping_seconds': 0.0})
+        stats['pings'] += 1
+        stats['load_seconds'] += load
+        stats['last_load_seconds'] = load
+        stats['last_ping_seconds'] = elapsed
+        if load >= COLD_LOAD_SECONDS:
+            stats['cold_loads'] += 1
+
+    def ping(self) -> bool:
+        """Send both models a minimal keep_alive request; False if one failed"""
+        engine = self.engine
+        embedder = engine.vector_store.embedder
+        ok = True
+
+        for model, is_embedding in ((engine.llm_model, False), (embedder.model, True)):
+            start = time.perf_counter()
+            try:
+                if is_embedding:
+                    # Local providers have nothing to load and return None
+                    response = embedder.ping(self.keep_alive)
+                    if response is None:
+                        continue
+                else:
+                    # An empty prompt loads the model without generating
+                    response = engine.client.generate(model=model, prompt='', keep_alive=self.keep_alive)
+            except Exception as e:
+                self.failures += 1
+                self.last_error = f"{model}: {e}"
+                ok = False
+                continue
+            self._record_load(model, response, time.perf_counter() - start)
+
+        self.pings += 1
+        self.last_ping = time.time()
+        return ok
+
+    def warm_up(self) -> bool:
+        """Load both models now, printing how long it took"""
+        start = time.perf_counter()
+        ok = self.ping()
+        elapsed = time.perf_counter() - start
+
+        if ok:
+            loads = ", ".join(f"{model} {stats['last_load_seconds']:.2f}s" for model, stats in self.models.items())
+            print(f"✓ Models warmed up in {elapsed:.2f}s (load: {loads})")
+        else:
+            print(f"⚠️  Model warm-up failed: {self.last_error}")
+        return ok
+
+    def start(self):
+        """Start pinging in a background thread"""
+        if self.is_running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='model-warmer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop pinging; models stay loaded until keep_alive runs out"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _idle(self) -> bool:
+        """Whether the engine has gone unqueried for longer than idle_limit"""
+        if not self.idle_limit:
+            return False
+        last_used = self.engine.last_query_at or self.engine.started_at
+        return time.time() - last_used > self.idle_limit
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self._idle():
+                self.ping()
+
+    def stats(self) -> Dict:
+        """Ping counts and model load statistics"""
+        return {
+            'running': self.is_running,
+            'keep_alive': self.keep_alive,
+            'interval': self.interval,
+            'idle_limit': self.idle_limit,
+            'pings': self.pings,
+            'failures': self.failures,
+            'last_ping': self.last_ping,
+            'last_error': self.last_error,
+            'models': {model: dict(stats) for model, stats in self.models.items()}
+        }
@@ -0,0 +1,53 @@
+import json
+import threading
+
+
+class LazyClient:
+    """
+    ollama.Client created on first use
+
+    Importing the ollama package (httpx, pydantic) takes about half a second,
+    longer than the rest of the RAG modules together. Engines and stores hold
+    a LazyClient so constructing them stays cheap; the package is imported by
+    the first request, or ahead of it in the background by prefetch().
+    """
+
+    def __init__(self, host: str = None):
+        self.host = host
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        client = self._client
+        if client is None:
+            with self._lock:
+                if self._client is None:
+                    import ollama
+                    self._client = ollama.Client(host=self.host)
+                client = self._client
+        return client
+
+    def __getattr__(self, name):
+        # Only called for attributes not found on the proxy itself
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self._get(), name)
+
+
+def prefetch():
+    """Import the ollama package in a background thread"""
+    def load():
+        try:
+            import ollama  # noqa: F401
+        except ImportError:
+            pass
+    thread = threading.Thread(target=load, name='ollama-import', daemon=True)
+    thread.start()
+    return thread
+
+
+def server_version(host: str, timeout: float = 2.0) -> str:
+    """Ollama server version, checked over plain HTTP without importing ollama"""
+    import urllib.request
+    with urllib.request.urlopen(f"{host.rstrip('/')}/api/version", timeout=timeout) as response:
+        return json.loads(response.read()).get('version', '')
@@ -3,33 +3,98 @@ import sys
 import time
 from rag_engine import RAGEngine
 from document_processor import DocumentProcessor
+from watcher import DirectoryWatcher
+from collection_store import CollectionStore
+from model_warmer import parse_keep_alive
+from ollama_client import prefetch, server_version
 
 OLLAMA_HOST = os.getenv('OLLAMA_HOST', 'http://localhost:11434')
 MODEL_NAME = os.getenv('MODEL_NAME', 'llama3.1')
 EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'nomic-embed-text')
+VECTOR_DTYPE = os.getenv('VECTOR_DTYPE', 'float64')
+TEXT_COMPRESSION = os.getenv('TEXT_COMPRESSION', 'none')
+CHUNK_SIZE = int(os.getenv('CHUNK_SIZE', '500'))
+TOP_K_MIN = int(os.getenv('TOP_K_MIN', '1'))
+SCORE_GAP = float(os.getenv('SCORE_GAP', '0'))
+MIN_SCORE = float(os.getenv('MIN_SCORE', '0'))
+CHUNK_OVERLAP = int(os.getenv('CHUNK_OVERLAP', '50'))
+CHUNK_UNIT = os.getenv('CHUNK_UNIT', 'chars')
+TOKENIZER = os.getenv('TOKENIZER', '') or None
+CHUNK_STRATEGY = os.getenv('CHUNK_STRATEGY', 'fixed')
+INDEX_BATCH_SIZE = int(os.getenv('INDEX_BATCH_SIZE', '64'))
+INDEX_WORKERS = int(os.getenv('INDEX_WORKERS', '0')) or None
+MIGRATION_RATE = float(os.getenv('MIGRATION_RATE', '5'))
+WATCH_DEBOUNCE = float(os.getenv('WATCH_DEBOUNCE', '1.0'))
+WATCH_MAX_DELAY = float(os.getenv('WATCH_MAX_DELAY', '10'))
+WATCH_POLL_INTERVAL = float(os.getenv('WATCH_POLL_INTERVAL', '1.0'))
+ANSWER_CACHE_SIZE = int(os.getenv('ANSWER_CACHE_SIZE', '256'))
+ANSWER_CACHE_THRESHOLD = float(os.getenv('ANSWER_CACHE_THRESHOLD', '0.95'))
+ANSWER_CACHE_TTL = float(os.getenv('ANSWER_CACHE_TTL', '3600'))
+CONTEXT_BUDGET = int(os.getenv('CONTEXT_BUDGET', '0'))
+COMPRESSION_BUDGET = int(os.getenv('COMPRESSION_BUDGET', '0'))
+KEEP_ALIVE = parse_keep_alive(os.getenv('KEEP_ALIVE', '30m'))
+MODEL_WARMUP = os.getenv('MODEL_WARMUP', '1') != '0'
+WARMUP_PING_INTERVAL = float(os.getenv('WARMUP_PING_INTERVAL', '240'))
+WARMUP_IDLE_LIMIT = float(os.getenv('WARMUP_IDLE_LIMIT', '0'))
+METRICS = os.getenv('METRICS', '1') != '0'
+TRACE_FILE = os.getenv('TRACE_FILE', '') or None
+INDEX_FILE = os.getenv('INDEX_FILE', '')
+COLLECTIONS_DIR = os.getenv('COLLECTIONS_DIR', '')
+COLLECTION_IDLE_SECONDS = float(os.getenv('COLLECTION_IDLE_SECONDS', '600'))
+COLLECTION_MAX_LOADED = int(os.getenv('COLLECTION_MAX_LOADED', '0'))
 
 
 class RAGBot:
     """Interactive RAG chatbot"""
 
     def __init__(self, top_k=3):
+        collections = CollectionStore(
+            COLLECTIONS_DIR,
+            embedding_model=EMBEDDING_MODEL,
+            ollama_host=OLLAMA_HOST,
+            dtype=VECTOR_DTYPE,
+            text_compression=TEXT_COMPRESSION,
+            keep_alive=KEEP_ALIVE,
+            idle_seconds=COLLECTION_IDLE_SECONDS,
+            max_loaded=COLLECTION_MAX_LOADED
+        ) if COLLECTIONS_DIR else None
         self.engine = RAGEngine(
             llm_model=MODEL_NAME,
             embedding_model=EMBEDDING_MODEL,
             ollama_host=OLLAMA_HOST,
-            top_k=top_k
+            top_k=top_k,
+            min_k=TOP_K_MIN,
+            score_gap=SCORE_GAP,
+            min_score=MIN_SCORE,
+            vector_dtype=VECTOR_DTYPE,
+            text_compression=TEXT_COMPRESSION,
+            answer_cache_size=ANSWER_CACHE_SIZE,
+            answer_cache_threshold=ANSWER_CACHE_THRESHOLD,
+            answer_cache_ttl=ANSWER_CACHE_TTL,
+            context_budget=CONTEXT_BUDGET,
+            compression_budget=COMPRESSION_BUDGET,
+            tokenizer=TOKENIZER,
+            keep_alive=KEEP_ALIVE,
+            metrics=METRICS,
+            trace_path=TRACE_FILE,
+            collections=collections
         )
         self.index_loaded = False
+        self.watcher = None
+        # Collection(s) questions go to instead of the main index (None = main index)
+        self.collection = None
 
     def connect(self, max_retries=30):
         """Connect to Ollama service"""
         print(f"Connecting to Ollama at {OLLAMA_HOST}...")
 
+        # The ollama package loads in the background while we check the
+        # server over plain HTTP
+        prefetch()
         for i in range(max_retries):
             try:
-                # Test connection by getting stats
-                self.engine.client.list()
-                print(f"✓ Connected to Ollama")
+                version = server_version(OLLAMA_HOST)
+                print(f"✓ Connected to Ollama {version}")
                 return True
             except Exception as e:
                 if i < max_retries - 1:
@@ -39,20 +104,39 @@ class RAGBot:
                     print(f"✗ Failed to connect: {e}")
                     return False
 
+    def warm_up(self):
+        """Load the models before the first question and keep them loaded"""
+        print(f"Warming up {MODEL_NAME} and {EMBEDDING_MODEL} (keep_alive: {KEEP_ALIVE})...")
+        self.engine.warm_up(interval=WARMUP_PING_INTERVAL, idle_limit=WARMUP_IDLE_LIMIT)
+
     def ask(self, question: str, show_context=False):
         """Ask a question using RAG"""
-        if not self.index_loaded:
+        if not self.index_loaded and self.collection is None:
             print("\n⚠️  Warning: No documents indexed yet. Use /index to add documents.")
             print("Answering without context...\n")
 
-        result = self.engine.query(
-            question,
-            show_context=show_context,
-            show_stats=True
-        )
-
-        if result['answer']:
-            print(f"\n🤖 Assistant: {result['answer']}")
+        try:
+            stream = self.engine.query_stream(
+                question,
+                show_context=show_context,
+                show_stats=False,
+                collection=self.collection
+            )
+        except ValueError as e:
+            print(f"\n✗ {e}")
+            return None
+
+        # Print tokens as they arrive; statistics follow the full answer
+        print("\n🤖 Assistant: ", end='', flush=True)
+        for token in stream:
+            print(token, end='', flush=True)
+        print()
+
+        result = stream.result()
+        if result['cached']:
+            print("\n💾 Answer reused from cache for a similar earlier question")
+        elif result['answer']:
+            self.engine.print_response_stats(result['response_data'], len(stream.context), stream.time_to_first_token)
         else:
             print("\n✗ Failed to generate answer")
 
@@ -65,7 +149,17 @@ class RAGBot:
             return False
 
         try:
-            self.engine.index_from_directory(directory, pattern)
+            self.engine.index_from_directory(
+                directory,
+                pattern,
+                chunk_size=CHUNK_SIZE,
+                chunk_overlap=CHUNK_OVERLAP,
+                batch_size=INDEX_BATCH_SIZE,
+                chunk_unit=CHUNK_UNIT,
+                tokenizer=TOKENIZER,
+                chunk_strategy=CHUNK_STRATEGY,
+                workers=INDEX_WORKERS
+            )
             self.index_loaded = True
             return True
         except Exception as e:
@@ -82,9 +176,9 @@ class RAGBot:
             return False
 
     def load_index(self, filepath: str):
-        """Load index from file"""
+        """Open an index file; it is read on the first question"""
         try:
-            self.engine.load_index(filepath)
+            self.engine.load_index(filepath, lazy=True)
             self.index_loaded = True
             return True
         except Exception as e:
@@ -96,6 +190,165 @@ class RAGBot:
         self.engine.clear_index()
         self.index_loaded = False
 
+    def migrate(self, new_model: str, rate: float = None):
+        """Start re-embedding the index with a new embedding model"""
+        if rate is None:
+            rate = MIGRATION_RATE or None
+        try:
+            self.engine.start_migration(new_model, rate=rate)
+        except (RuntimeError, ValueError) as e:
+            print(f"✗ {e}")
+            return False
+
+        limit = f"{rate:g} docs/sec" if rate else "unlimited"
+        print(f"✓ Migrating index to '{new_model}' in the background ({limit})")
+        print("  The current index keeps serving queries. Use /migrate status to check progress.")
+        return True
+
+    def migration_status(self):
+        """Print progress of the current migration"""
+        if self.engine.migration is None:
+            print("No migration started")
+            return
+
+        status = self.engine.migration.status()
+        print(f"Migration {status['old_model']} → {status['new_model']}: {status['state']}")
+        print(f"  Progress: {status['processed']}/{status['total']} "
+              f"({status['elapsed_sec']:.1f}s elapsed)")
+        if status['error']:
+            print(f"  Error: {status['error']}")
+
+    def watch(self, directory: str, pattern='*.txt'):
+        """Index a directory, then keep the index in sync with it"""
+        if self.watcher is not None and self.watcher.is_running:
+            print(f"✗ Already watching {self.watcher.directory}. Use /watch stop first.")
+            return False
+        if not self.index_directory(directory, pattern):
+            return False
+
+        self.watcher = DirectoryWatcher(
+            self.engine,
+            directory,
+            pattern,
+            debounce=WATCH_DEBOUNCE,
+            max_delay=WATCH_MAX_DELAY,
+            poll_interval=WATCH_POLL_INTERVAL,
+            index_kwargs={
+                'chunk_size': CHUNK_SIZE,
+                'chunk_overlap': CHUNK_OVERLAP,
+                'batch_size': INDEX_BATCH_SIZE,
+                'chunk_unit': CHUNK_UNIT,
+                'tokenizer': TOKENIZER,
+                'chunk_strategy': CHUNK_STRATEGY,
+                'workers': INDEX_WORKERS
+            }
+        )
+        self.watcher.start()
+        print(f"✓ Watching {directory} for changes ({self.watcher.backend})")
+        return True
+
+    def stop_watch(self):
+        """Stop the directory watcher"""
+        if self.watcher is None or not self.watcher.is_running:
+            print("Not watching any directory")
+            return
+        self.watcher.stop()
+        print(f"✓ Stopped watching {self.watcher.directory}")
+
+    def watch_status(self):
+        """Print directory watcher statistics"""
+        if self.watcher is None:
+            print("Not watching any directory")
+            return
+
+        stats = self.watcher.stats()
+        state = 'running' if stats['running'] else 'stopped'
+        print(f"Watching {stats['directory']} ({stats['pattern']}): {state}, {stats['backend']}")
+        print(f"  Updates applied: {stats['updates']} ({stats['files_changed']} file changes)")
+        print(f"  Change → searchable lag: last {stats['lag_last_sec']:.2f}s, "
+              f"p50 {stats['lag_p50_sec']:.2f}s, p95 {stats['lag_p95_sec']:.2f}s, "
+              f"max {stats['lag_max_sec']:.2f}s")
+        if stats['last_error']:
+            print(f"  Last error: {stats['last_error']}")
+
+    def list_collections(self):
+        """Print the named collections and which are in memory"""
+        collections = self.engine.collections
+        if collections is None:
+            print("No collections configured. Set COLLECTIONS_DIR to enable them.")
+            return
+
+        stats = collections.stats()['collections']
+        names = collections.names()
+        if not names:
+            print(f"No collections in {collections.root} yet. Use /collections index <name> <dir>.")
+            return
+        for name in names:
+            entry = stats.get(name, {})
+            state = 'loaded' if entry.get('loaded') else 'on disk'
+            if entry.get('documents') is not None:
+                state += f", {entry['documents']} chunks"
+            marker = '*' if self.collection == '*' or name in (self.collection or []) else ' '
+            print(f" {marker} {name} ({state})")
+        target = 'all collections' if self.collection == '*' else ', '.join(self.collection or []) or 'main index'
+        print(f"Questions go to: {target}")
+
+    def use_collections(self, selection: str):
+        """Route questions to collections: 'name[,name...]', 'all' or 'none' (main index)"""
+        collections = self.engine.collections
+        if collections is None:
+            print("No collections configured. Set COLLECTIONS_DIR to enable them.")
+            return False
+
+        if selection == 'none':
+            self.collection = None
+            print("✓ Questions go to the main index")
+            return True
+        if selection == 'all':
+            self.collection = '*'
+            print("✓ Questions fan out across all collections")
+            return True
+
+        names = [name.strip() for name in selection.split(',') if name.strip()]
+        unknown = [name for name in names if name not in collections.names()]
+        if unknown:
+            print(f"✗ Unknown collection(s): {', '.join(unknown)}")
+            return False
+        self.collection = names
+        print(f"✓ Questions go to: {', '.join(names)}")
+        return True
+
+    def index_collection(self, name: str, directory: str, pattern='*.txt'):
+        """Build a named collection from a directory"""
+        collections = self.engine.collections
+        if collections is None:
+            print("No collections configured. Set COLLECTIONS_DIR to enable them.")
+            return False
+        if not os.path.exists(directory):
+            print(f"✗ Directory not found: {directory}")
+            return False
+
+        try:
+            processor = DocumentProcessor(
+                chunk_size=CHUNK_SIZE,
+                chunk_overlap=CHUNK_OVERLAP,
+                chunk_unit=CHUNK_UNIT,
+                tokenizer=TOKENIZER,
+                strategy=CHUNK_STRATEGY,
+                embedding_model=EMBEDDING_MODEL,
+                ollama_host=OLLAMA_HOST
+            )
+            start = time.perf_counter()
+            chunks = collections.index_directory(
+                name, directory, pattern, processor=processor,
+                batch_size=INDEX_BATCH_SIZE, workers=INDEX_WORKERS
+            )
+            print(f"✓ Collection '{name}': {chunks} chunks in {time.perf_counter() - start:.1f}s")
+            return True
+        except Exception as e:
+            print(f"✗ Error indexing collection: {e}")
+            return False
+
     def show_stats(self):
         """Show RAG system statistics"""
         self.engine.print_stats()
@@ -108,13 +361,21 @@ def print_help():
     print("=" * 70)
     print("  /help              - Show this help message")
     print("  /stats             - Show RAG system statistics")
-    print("  /index <dir>       - Index documents from directory")
-    print("  /index <dir> <pat> - Index documents matching pattern (e.g., *.md)")
-    print("  /save <file>       - Save index to file")
+    print("  /index <dir>       - Index documents from directory (only new/changed files)")
+    print("  /index <dir> <pat> - Index documents matching pattern(s) (e.g., **/*.md *.txt)")
+    print("  /save <file>       - Save index (and file manifest) to file")
     print("  /load <file>       - Load index from file")
     print("  /clear             - Clear current index")
     print("  /context on|off    - Toggle context display")
     print("  /topk <n>          - Set number of documents to retrieve (default: 3)")
+    print("  /adaptive <gap> [min-score]|off - Stop retrieving at a relative score drop / threshold")
+    print("  /migrate <model> [rate] - Re-embed index with a new model in the background")
+    print("  /migrate status|cancel  - Show or cancel the running migration")
+    print("  /watch <dir> [pattern]  - Index a directory and keep it in sync")
+    print("  /watch status|stop      - Show or stop the directory watcher")
+    print("  /collections            - List named collections (needs COLLECTIONS_DIR)")
+    print("  /collections index <name> <dir> [pattern] - Build a collection from a directory")
+    print("  /use <name[,name]>|all|none - Ask collection(s), all of them, or the main index")
     print("  /sample <dir>      - Create sample documents in directory")
     print("  /quit or /exit     - Exit the chatbot")
     print("=" * 70 + "\n")
@@ -136,6 +397,12 @@ def main():
     if not bot.connect():
         sys.exit(1)
 
+    if INDEX_FILE:
+        bot.load_index(INDEX_FILE)
+
+    if MODEL_WARMUP:
+        bot.warm_up()
+
     print("\nType '/help' for available commands")
     print("=" * 70 + "\n")
 
@@ -171,6 +438,7 @@ def main():
                     print("Usage: /index <directory> [pattern]")
                     print("Example: /index ./documents")
                     print("Example: /index ./documents *.md")
+                    print("Example: /index ./documents **/*.md *.txt")
                 else:
                     directory = parts[1]
                     pattern = parts[2] if len(parts) > 2 else '*.txt'
@@ -224,6 +492,80 @@ def main():
                     except ValueError:
                         print("✗ Invalid number")
 
+            elif cmd == '/adaptive':
+                engine = bot.engine
+                if len(parts) < 2:
+                    state = (f"score gap {engine.score_gap:.0%}, min score {engine.min_score:.2f}, "
+                             f"{engine.min_k}-{engine.top_k} chunks"
+                             if engine.score_gap or engine.min_score else "off")
+                    print(f"Adaptive top-k: {state}")
+                    print("Usage: /adaptive <score-gap> [min-score] | off")
+                elif parts[1].lower() == 'off':
+                    engine.score_gap = engine.min_score = 0.0
+                    print(f"✓ Adaptive top-k disabled, always retrieving {engine.top_k}")
+                else:
+                    try:
+                        gap = float(parts[1])
+                        min_score = float(parts[2]) if len(parts) > 2 else engine.min_score
+                        if not 0 <= gap < 1:
+                            print("✗ Score gap must be a fraction between 0 and 1")
+                        else:
+                            engine.score_gap, engine.min_score = gap, min_score
+                            print(f"✓ Retrieving {engine.min_k}-{engine.top_k} chunks, stopping at a "
+                                  f"{gap:.0%} score drop or below {min_score:.2f}")
+                    except ValueError:
+                        print("✗ Invalid number")
+
+            elif cmd == '/migrate':
+                if len(parts) < 2:
+                    print("Usage: /migrate <embedding-model> [docs-per-sec]")
+                    print("Example: /migrate mxbai-embed-large 10")
+                    print("         /migrate status")
+                elif parts[1] == 'status':
+                    bot.migration_status()
+                elif parts[1] == 'cancel':
+                    bot.engine.cancel_migration()
+                    print("✓ Migration cancelled")
+                else:
+                    try:
+                        rate = float(parts[2]) if len(parts) > 2 else None
+                        bot.migrate(parts[1], rate)
+                    except ValueError:
+                        print("✗ Invalid rate")
+
+            elif cmd == '/watch':
+                if len(parts) < 2:
+                    print("Usage: /watch <directory> [pattern]")
+                    print("Example: /watch ./docs *.md")
+                    print("         /watch status")
+                elif parts[1] == 'status':
+                    bot.watch_status()
+                elif parts[1] == 'stop':
+                    bot.stop_watch()
+                else:
+                    pattern = parts[2] if len(parts) > 2 else '*.txt'
+                    bot.watch(parts[1], pattern)
+
+            elif cmd == '/collections':
+                if len(parts) < 2:
+                    bot.list_collections()
+                elif parts[1] == 'index':
+                    args = parts[2].split(maxsplit=2) if len(parts) > 2 else []
+                    if len(args) < 2:
+                        print("Usage: /collections index <name> <directory> [pattern]")
+                        print("Example: /collections index handbook ./docs/handbook *.md")
+                    else:
+                        bot.index_collection(args[0], args[1], args[2] if len(args) > 2 else '*.txt')
+                else:
+                    print("Usage: /collections [index <name> <directory> [pattern]]")
+
+            elif cmd == '/use':
+                if len(parts) < 2:
+                    print("Usage: /use <name[,name...]>|all|none")
+                    print("Example: /use handbook,faq")
+                else:
+                    bot.use_collections(parts[1])
+
             elif cmd == '/sample':
                 if len(parts) < 2:
                     print("Usage: /sample <directory>")
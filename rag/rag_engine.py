@@ -1,7 +1,18 @@
-import ollama
+import os
+import threading
+import time
+from collections import defaultdict
 from typing import List, Dict, Tuple
-from vector_store import VectorStore
+from vector_store import VectorStore, adaptive_cutoff
 from document_processor import DocumentProcessor
+from manifest import FileManifest
+from migration import IndexMigration
+from answer_cache import AnswerCache
+from context_builder import ContextBuilder
+from context_compressor import SentenceCompressor
+from model_warmer import ModelWarmer, COLD_LOAD_SECONDS
+from metrics import Metrics
+from ollama_client import LazyClient
 
 class RAGEngine:
     """RAG Engine that combines retrieval and generation"""
@@ -11,7 +22,23 @@ class RAGEngine:
         llm_model='llama3.1',
         embedding_model='nomic-embed-text',
         ollama_host='http://localhost:11434',
-        top_k=3
+        top_k=3,
+        min_k=1,
+        score_gap=0.0,
+        min_score=0.0,
+        vector_dtype='float64',
+        text_compression=None,
+        answer_cache_size=0,
+        answer_cache_threshold=0.95,
+        answer_cache_ttl=3600.0,
+        context_budget=0,
+        compression_budget=0,
+        tokenizer=None,
+        keep_alive=None,
+        metrics=True,
+        trace_path=None,
+        embedder=None,
+        collections=None
     ):
         """
         Initialize RAG Engine
@@ -20,65 +47,360 @@ class RAGEngine:
             llm_model: Model to use for generation
             embedding_model: Model to use for embeddings
             ollama_host: Ollama server host
-            top_k: Number of documents to retrieve
+            top_k: Number of documents to retrieve (the maximum when
+                score_gap or min_score is set)
+            min_k: Documents always kept when retrieval is adaptive
+            score_gap: Stop retrieving where a score falls more than this
+                fraction below the one before it, e.g. 0.3 (0 = off)
+            min_score: Stop retrieving below this similarity score (0 = off)
+            vector_dtype: Storage dtype for embeddings (float64, float32, float16, bfloat16)
+            text_compression: Keep document text in 'zlib' / 'zstd' compressed blocks (None = plain)
+            answer_cache_size: Answers cached for similar questions (0 = no answer cache)
+            answer_cache_threshold: Cosine similarity a question needs to reuse a cached answer
+            answer_cache_ttl: Seconds a cached answer stays valid
+            context_budget: Maximum tokens of retrieved context in the prompt (0 = unlimited)
+            compression_budget: Keep only the sentences of the retrieved context
+                most similar to the question, up to this many tokens (0 = off)
+            tokenizer: Tokenizer name for counting context tokens (None = approximate)
+            keep_alive: How long Ollama keeps the models loaded after each
+                request, e.g. '30m' (None = server default)
+            metrics: Record per-stage latency histograms
+            trace_path: JSONL file to append every timing span to (None = no trace)
+            embedder: EmbeddingProvider to use instead of the one named by
+                embedding_model (e.g. HashingEmbeddings for offline use)
+            collections: CollectionStore of named indexes that queries can
+                target with collection= instead of the engine's own index
         """
         self.llm_model = llm_model
-        self.embedding_model = embedding_model
+        self.embedding_model = embedder.model if embedder is not None else embedding_model
         self.ollama_host = ollama_host
         self.top_k = top_k
+        self.min_k = min_k
+        self.score_gap = score_gap
+        self.min_score = min_score
+        self.vector_dtype = vector_dtype
+        self.text_compression = text_compression
+        self.keep_alive = keep_alive
 
         # Initialize components
         self.vector_store = VectorStore(
             embedding_model=embedding_model,
-            ollama_host=ollama_host
+            ollama_host=ollama_host,
+            dtype=vector_dtype,
+            text_compression=text_compression,
+            keep_alive=keep_alive,
+            embedder=embedder
         )
-        self.client = ollama.Client(host=ollama_host)
-
-        # Statistics
+        self.client = LazyClient(ollama_host)
+        self.warmer = None
+
+        # Merges overlapping retrieved chunks and keeps the context in budget
+        self.context_builder = ContextBuilder(context_budget, tokenizer)
+
+        # Drops context sentences unrelated to the question before generation
+        self.compressor = SentenceCompressor(compression_budget, tokenizer) if compression_budget > 0 else None
+
+        # Answers of earlier questions, reused for close paraphrases that
+        # retrieve the same chunks; emptied whenever the index changes
+        self.answer_cache = AnswerCache(
+            answer_cache_size, answer_cache_threshold, answer_cache_ttl
+        ) if answer_cache_size > 0 else None
+
+        # Writers hold _index_lock; readers take the (store, model) pair in
+        # _serving with one attribute read so they never wait on a lock
+        self._index_lock = threading.Lock()
+        self._serving = (self.vector_store, self.vector_store.embedding_model)
+        self.migration = None
+
+        # Files indexed from directories, for incremental re-indexing;
+        # _sync_lock keeps concurrent directory syncs from racing on it
+        self.manifest = FileManifest()
+        self._sync_lock = threading.Lock()
+
+        # Per-stage latency histograms (embed, search, context, prompt, generate, ...)
+        self.metrics = Metrics(enabled=metrics, trace_path=trace_path)
+
+        # Named indexes besides the engine's own; their searches time into the same metrics
+        self.collections = collections
+        if collections is not None:
+            collections.metrics = self.metrics
+
+        # Statistics; _stats_lock guards updates from concurrent generations
+        self._stats_lock = threading.Lock()
         self.total_queries = 0
         self.total_tokens = 0
-
-    def index_documents(self, documents: List[str], metadata: List[Dict] = None):
-        """Add documents to the vector store"""
-        self.vector_store.add_documents(documents, metadata)
+        self.total_time_to_first_token = 0.0
+        self.timed_queries = 0
+        self.total_load_time = 0.0
+        self.max_load_time = 0.0
+        self.cold_loads = 0
+        self.started_at = time.time()
+        self.last_query_at = None
+
+    def index_documents(self, documents: List[str], metadata: List[Dict] = None) -> List[int]:
+        """Add documents to the vector store, returning their chunk IDs"""
+        with self._index_lock:
+            return self.vector_store.add_documents(documents, metadata)
+
+    def index_chunks(self, spans: List[Tuple]) -> List[int]:
+        """Add chunks given as source spans (see VectorStore.add_chunks), returning their chunk IDs"""
+        with self._index_lock:
+            return self.vector_store.add_chunks(spans)
+
+    def delete_documents(self, ids: List[int]) -> int:
+        """Remove chunks from the vector store by ID"""
+        with self._index_lock:
+            return self.vector_store.delete(ids)
 
     def index_from_directory(
         self,
         directory: str,
         pattern='*.txt',
         chunk_size=500,
-        chunk_overlap=50
+        chunk_overlap=50,
+        batch_size=64,
+        chunk_unit='chars',
+        tokenizer=None,
+        workers=None,
+        chunk_strategy='fixed'
     ):
         """
         Load and index documents from a directory
 
+        Indexing is incremental: files already in the manifest with the same
+        size and mtime (or content hash) are skipped, changed files are
+        re-chunked and their old chunks deleted, and chunks of files that
+        disappeared are removed. Files are read and chunked in a process
+        pool into chunk offsets and embedded batch by batch. The store keeps
+        each file's text once and slices chunk texts out of it, instead of a
+        string and a metadata dict per chunk.
+
         Args:
             directory: Directory containing documents
-            pattern: File pattern to match
+            pattern: File pattern(s) to match, e.g. '**/*.md, *.txt'
             chunk_size: Size of document chunks
             chunk_overlap: Overlap between chunks
+            batch_size: Chunks embedded per batch
+            chunk_unit: 'chars' or 'tokens' for chunk_size / chunk_overlap
+            tokenizer: Tokenizer name when chunk_unit is 'tokens'
+            workers: Loader processes (None = all CPUs, 1 = in-process)
+            chunk_strategy: 'fixed' or 'semantic' (breaks where adjacent
+                sentence embeddings diverge; chunk_size is then the maximum)
+
+        Returns:
+            Dict summarizing added / changed / removed / unchanged files
         """
         processor = DocumentProcessor(
             chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap
+            chunk_overlap=chunk_overlap,
+            chunk_unit=chunk_unit,
+            tokenizer=tokenizer,
+            strategy=chunk_strategy,
+            embedding_model=self.vector_store.embedding_model,
+            ollama_host=self.ollama_host
         )
 
-        chunk_texts, chunk_metadata = processor.load_and_process_directory(
-            directory, pattern
-        )
+        with self._sync_lock:
+            return self._sync_directory(processor, directory, pattern, batch_size, workers)
+
+    def _sync_directory(self, processor: DocumentProcessor, directory: str, pattern, batch_size: int, workers) -> Dict:
+        """Bring the index in line with directory, see index_from_directory"""
+        start_time = time.perf_counter()
+        print(f"Scanning {directory} (pattern: {pattern})")
+        paths = processor.find_files(directory, pattern)
+        added, changed, removed, unchanged = self.manifest.diff(directory, paths)
+        print(f"  {len(added)} new, {len(changed)} changed, "
+              f"{len(removed)} removed, {unchanged} unchanged")
+
+        # Embed new and changed files; old chunks of changed files keep
+        # serving until their replacements are in
+        to_process = added + changed
+        failed = []
+        new_ids = defaultdict(list)
+        file_stats = {}
+
+        def read(sources):
+            # Remember what each file looked like when it was read
+            for source in sources:
+                file_stats[FileManifest.key(source.metadata['source'])] = source.file_stat
+                yield source
+
+        sources = read(processor.iter_paths_sources(to_process, workers=workers, failed=failed))
+
+        total = 0
+        for spans in processor.iter_span_batches(sources, batch_size):
+            ids = self.index_chunks(spans)
+            for chunk_id, (_, meta, _, _, _) in zip(ids, spans):
+                if chunk_id is not None:
+                    new_ids[FileManifest.key(meta['source'])].append(chunk_id)
+            total += len(spans)
+
+        failed = {FileManifest.key(path) for path in failed}
+        stale = []
+        for path in to_process:
+            key = FileManifest.key(path)
+            if key in failed:
+                continue
+            stale.extend(self.manifest.chunk_ids(key))
+            self.manifest.record(key, new_ids.get(key, []), file_stats.get(key))
+
+        for key in removed:
+            stale.extend(self.manifest.remove(key))
+
+        deleted = self.delete_documents(stale) if stale else 0
+
+        elapsed = time.perf_counter() - start_time
+        print(f"Indexed {total} chunks, deleted {deleted} stale chunks in {elapsed:.2f}s")
 
-        self.vector_store.add_documents(chunk_texts, chunk_metadata)
+        return {
+            'added': len(added),
+            'changed': len(changed),
+            'removed': len(removed),
+            'unchanged': unchanged,
+            'failed': len(failed),
+            'chunks_added': total,
+            'chunks_deleted': deleted,
+            'elapsed_sec': elapsed
+        }
 
-    def retrieve(self, query: str) -> List[Tuple[str, float, Dict]]:
+    def retrieve(self, query: str, collection=None) -> List[Tuple[str, float, Dict]]:
         """
         Retrieve relevant documents for a query
 
+        Args:
+            query: Search text
+            collection: None for the engine's own index; a collection name,
+                list of names or '*' to search named collections instead
+
         Returns:
             List of (document, score, metadata) tuples
         """
-        return self.vector_store.search(query, top_k=self.top_k)
+        return self.retrieve_detailed(query, collection=collection)[0]
 
-    def _create_rag_prompt(self, query: str, context_docs: List[Tuple[str, float, Dict]]) -> str:
+    def retrieve_detailed(self, query: str, trace: int = None, collection=None) -> Tuple[List[Tuple[str, float, Dict]], List, object, Tuple]:
+        """
+        Embed and search one query, timing both stages
+
+        retrieve() plus what callers that generate on their own need to
+        build the answer cache key.
+
+        Returns:
+            (results, chunk IDs, query embedding, index version); with
+            collection set the IDs are (collection, chunk ID) pairs
+        """
+        if collection is not None:
+            if self.collections is None:
+                raise ValueError("No collections configured for this engine")
+            results, ids, embedding, version = self.collections.search_detailed(query, collection, self.top_k, trace)
+            results, ids = self._cutoff(results, ids)
+            return results, ids, embedding, version
+
+        store, model = self._serving
+        snap = store.snapshot()
+        version = (id(store), snap.generation)
+        if not snap.size:
+            return [], [], None, version
+
+        with self.metrics.span('embed', trace):
+            embedding = store.embed_query(query, embedding_model=model)
+        with self.metrics.span('search', trace):
+            results, ids = store.search_by_embedding(embedding, self.top_k, snap)
+        results, ids = self._cutoff(results, ids)
+        return results, ids, embedding, version
+
+    def _cutoff(self, results: List[Tuple[str, float, Dict]], ids: List) -> Tuple[List[Tuple[str, float, Dict]], List]:
+        """Drop the tail of a ranked result list past a score gap or below min_score"""
+        if not (self.score_gap or self.min_score):
+            return results, ids
+        keep = adaptive_cutoff([score for _, score, _ in results], self.min_k, self.score_gap, self.min_score)
+        return results[:keep], ids[:keep]
+
+    def retrieve_batch(self, queries: List[str]) -> List[List[Tuple[str, float, Dict]]]:
+        """
+        Retrieve documents for several queries with one embed request and
+        one scoring pass over the index
+
+        Returns:
+            One list of (document, score, metadata) tuples per query
+        """
+        return [context for context, _ in self.retrieve_batch_with_keys(queries)]
+
+    def retrieve_batch_with_keys(self, queries: List[str]) -> List[Tuple[List[Tuple[str, float, Dict]], Tuple]]:
+        """retrieve_batch() with each query's answer cache key (None when the cache is off)"""
+        store, model = self._serving
+        snap = store.snapshot()
+        with self.metrics.span('embed_batch'):
+            embeddings = store.embed_queries(queries, embedding_model=model)
+        with self.metrics.span('search_batch'):
+            batch = store.search_batch(embeddings, self.top_k, snap)
+        version = (id(store), snap.generation)
+        batch = [self._cutoff(results, ids) for results, ids in batch]
+        return [
+            (results, (embedding, ids, version) if self.answer_cache is not None else None)
+            for embedding, (results, ids) in zip(embeddings, batch)
+        ]
+
+    def _swap_vector_store(self, store: VectorStore):
+        """Atomically replace the serving vector store"""
+        store.keep_alive = self.keep_alive
+        self._serving = (store, store.embedding_model)
+        self.vector_store = store
+        self.embedding_model = store.embedding_model
+
+    def start_migration(self, new_model: str, rate: float = None) -> IndexMigration:
+        """
+        Re-embed the current index with a new embedding model in the background
+
+        The current index keeps answering queries until the new one has caught
+        up, then the engine switches to it.
+
+        Args:
+            new_model: Embedding model for the new index
+            rate: Maximum documents embedded per second (None = unlimited)
+        """
+        if self.migration is not None and self.migration.is_running:
+            raise RuntimeError(f"Migration to '{self.migration.new_model}' already running")
+        if new_model == self.embedding_model:
+            raise ValueError(f"Index already uses embedding model '{new_model}'")
+
+        self.migration = IndexMigration(self, new_model, rate=rate)
+        self.migration.start()
+        return self.migration
+
+    def cancel_migration(self):
+        """Cancel a running migration"""
+        if self.migration is not None and self.migration.is_running:
+            self.migration.cancel()
+            self.migration.join()
+
+    def warm_up(self, interval: float = 0, idle_limit: float = 0) -> bool:
+        """
+        Load the LLM and embedding model now and optionally keep them loaded
+
+        Args:
+            interval: Seconds between keep-alive pings (0 = warm up only)
+            idle_limit: Stop pinging after this many seconds without a query
+                (0 = always ping)
+
+        Returns:
+            Whether both models answered the warm-up request
+        """
+        if self.warmer is None:
+            self.warmer = ModelWarmer(self, self.keep_alive, interval, idle_limit)
+        else:
+            self.warmer.interval, self.warmer.idle_limit = interval, idle_limit
+
+        ok = self.warmer.warm_up()
+        if interval > 0:
+            self.warmer.start()
+        return ok
+
+    def stop_warmer(self):
+        """Stop keep-alive pings"""
+        if self.warmer is not None:
+            self.warmer.stop()
+
+    def create_rag_prompt(self, query: str, context_docs: List[Tuple[str, float, Dict]]) -> str:
         """Create a prompt with retrieved context"""
         if not context_docs:
             return f"""You are a helpful assistant. Answer the following question:
@@ -106,11 +428,97 @@ Answer:"""
 
         return prompt
 
+    def _retrieve_context(self, question: str, show_context: bool, trace: int = None,
+                          collection=None) -> Tuple[List[Tuple[str, float, Dict]], Tuple]:
+        """
+        Retrieve context for a question and pack it with the context
+        builder, printing it if asked
+
+        Returns:
+            (context_docs, cache_key): cache_key is the (question embedding,
+            chunk IDs, index version) used for the answer cache, or None
+            when the cache is off
+        """
+        context_docs, ids, embedding, version = self.retrieve_detailed(question, trace, collection)
+        use_cache = self.answer_cache is not None and embedding is not None
+        cache_key = (embedding, ids, version) if use_cache else None
+
+        with self.metrics.span('context', trace):
+            context_docs = self.context_builder.build(context_docs)
+        context_docs = self.compress_context(question, context_docs, embedding if collection is None else None, trace)
+
+        if show_context and context_docs:
+            print("\n" + "─" * 70)
+            print("📚 Retrieved Context:")
+            print("─" * 70)
+            for i, (doc, score, metadata) in enumerate(context_docs, 1):
+                source = metadata.get('filename', metadata.get('source', 'Unknown'))
+                if 'collection' in metadata:
+                    source = f"{metadata['collection']}/{source}"
+                print(f"\n[{i}] {source} (score: {score:.3f})")
+                print(f"{doc[:200]}..." if len(doc) > 200 else doc)
+            print("─" * 70)
+
+        return context_docs, cache_key
+
+    def compress_context(self, question: str, context_docs: List[Tuple[str, float, Dict]], embedding=None,
+                         trace: int = None) -> List[Tuple[str, float, Dict]]:
+        """
+        Sentence compression of packed context, if enabled
+
+        embedding must come from the serving store's provider; without it
+        the question is embedded together with the sentences.
+        """
+        if self.compressor is None or not context_docs:
+            return context_docs
+        with self.metrics.span('compress', trace):
+            return self.compressor.compress(question, context_docs, self._serving[0].embedder, embedding)
+
+    def cached_answer(self, cache_key: Tuple, show_stats: bool) -> Dict:
+        """Answer of a similar earlier question with the same context, or None"""
+        if cache_key is None:
+            return None
+        cached = self.answer_cache.lookup(*cache_key)
+        if cached is not None and show_stats:
+            print(f"\n💾 Answer reused from cache (question similarity: {cached['similarity']:.3f})")
+        return cached
+
+    def cache_answer(self, cache_key: Tuple, answer: str, response: Dict):
+        """Remember a generated answer under its cache key (no-op without a key)"""
+        if cache_key is not None and answer:
+            self.answer_cache.store(*cache_key, {'answer': answer, 'response_data': response})
+
+    def record_response(self, response: Dict, time_to_first_token: float, generation_sec: float = None, trace: int = None):
+        """Add a finished response to the running statistics and latency histograms"""
+        metrics = self.metrics
+        if metrics.enabled:
+            metrics.observe('first_token', time_to_first_token, trace)
+            if generation_sec is not None:
+                metrics.observe('generate', generation_sec, trace)
+            # Where Ollama spent the generation time
+            for stage, field in (('ollama_load', 'load_duration'), ('ollama_prompt_eval', 'prompt_eval_duration'),
+                                 ('ollama_eval', 'eval_duration')):
+                if response.get(field):
+                    metrics.observe(stage, response[field] / 1_000_000_000, trace)
+
+        with self._stats_lock:
+            if 'eval_count' in response:
+                self.total_tokens += response['eval_count']
+            if response.get('load_duration'):
+                load = response['load_duration'] / 1_000_000_000
+                self.total_load_time += load
+                self.max_load_time = max(self.max_load_time, load)
+                if load >= COLD_LOAD_SECONDS:
+                    self.cold_loads += 1
+            self.total_time_to_first_token += time_to_first_token
+            self.timed_queries += 1
+
     def query(
         self,
         question: str,
         show_context=False,
-        show_stats=True
+        show_stats=True,
+        collection=None
     ) -> Dict:
         """
         Query the RAG system
@@ -119,48 +527,58 @@ Answer:"""
             question: User's question
             show_context: Whether to print retrieved context
             show_stats: Whether to print statistics
+            collection: Named collection(s) to answer from, see retrieve()
 
         Returns:
-            Dict with 'answer', 'context', 'response_data'
+            Dict with 'answer', 'context', 'response_data', 'cached'
         """
         self.total_queries += 1
+        self.last_query_at = time.time()
+        trace = self.metrics.new_trace()
+        query_start = time.perf_counter()
 
         # Retrieve relevant documents
-        context_docs = self.retrieve(question)
+        context_docs, cache_key = self._retrieve_context(question, show_context, trace, collection)
 
-        if show_context and context_docs:
-            print("\n" + "─" * 70)
-            print("📚 Retrieved Context:")
-            print("─" * 70)
-            for i, (doc, score, metadata) in enumerate(context_docs, 1):
-                source = metadata.get('filename', metadata.get('source', 'Unknown'))
-                print(f"\n[{i}] {source} (score: {score:.3f})")
-                print(f"{doc[:200]}..." if len(doc) > 200 else doc)
-            print("─" * 70)
+        cached = self.cached_answer(cache_key, show_stats)
+        if cached is not None:
+            self.metrics.observe('query', time.perf_counter() - query_start, trace)
+            return {
+                'answer': cached['answer'],
+                'context': context_docs,
+                'response_data': cached['response_data'],
+                'cached': True
+            }
 
         # Create prompt with context
-        prompt = self._create_rag_prompt(question, context_docs)
+        with self.metrics.span('prompt', trace):
+            prompt = self.create_rag_prompt(question, context_docs)
 
         # Generate answer
         try:
+            start = time.perf_counter()
             response = self.client.chat(
                 model=self.llm_model,
-                messages=[{'role': 'user', 'content': prompt}]
+                messages=[{'role': 'user', 'content': prompt}],
+                keep_alive=self.keep_alive
             )
 
             answer = response['message']['content']
 
-            # Update statistics
-            if 'eval_count' in response:
-                self.total_tokens += response['eval_count']
+            # Without streaming the first token arrives with the whole answer
+            time_to_first_token = time.perf_counter() - start
+            self.record_response(response, time_to_first_token, time_to_first_token, trace)
+            self.cache_answer(cache_key, answer, response)
+            self.metrics.observe('query', time.perf_counter() - query_start, trace)
 
             if show_stats:
-                self._print_stats(response, len(context_docs))
+                self.print_response_stats(response, len(context_docs), time_to_first_token)
 
             return {
                 'answer': answer,
                 'context': context_docs,
-                'response_data': response
+                'response_data': response,
+                'cached': False
             }
 
         except Exception as e:
@@ -168,10 +586,50 @@ Answer:"""
             return {
                 'answer': None,
                 'context': context_docs,
-                'response_data': None
+                'response_data': None,
+                'cached': False
             }
 
-    def _print_stats(self, response: Dict, num_context_docs: int):
+    def query_stream(
+        self,
+        question: str,
+        show_context=False,
+        show_stats=True,
+        collection=None
+    ) -> 'StreamingAnswer':
+        """
+        Query the RAG system, streaming the answer
+
+        Retrieval happens before this returns, so the context is available
+        right away; the answer is generated while the result is iterated.
+
+        Args:
+            question: User's question
+            show_context: Whether to print retrieved context
+            show_stats: Whether to print statistics once the answer is done
+            collection: Named collection(s) to answer from, see retrieve()
+
+        Returns:
+            StreamingAnswer: iterate it for answer tokens; 'context' is set
+            up front, 'answer' and 'response_data' once iteration finishes
+        """
+        self.total_queries += 1
+        self.last_query_at = time.time()
+        trace = self.metrics.new_trace()
+        query_start = time.perf_counter()
+
+        context_docs, cache_key = self._retrieve_context(question, show_context, trace, collection)
+        cached = self.cached_answer(cache_key, show_stats)
+        prompt = None
+        if cached is None:
+            with self.metrics.span('prompt', trace):
+                prompt = self.create_rag_prompt(question, context_docs)
+
+        stream = StreamingAnswer(self, prompt, context_docs, show_stats, cache_key, cached)
+        stream.trace, stream.query_start = trace, query_start
+        return stream
+
+    def print_response_stats(self, response: Dict, num_context_docs: int, time_to_first_token: float = None):
         """Print query statistics"""
         print("\n" + "─" * 70)
         print("📊 Query Statistics:")
@@ -185,6 +643,12 @@ Answer:"""
         if 'eval_count' in response:
             print(f"Response tokens: {response['eval_count']}")
 
+        if time_to_first_token is not None:
+            print(f"Time to first token: {time_to_first_token:.2f}s")
+
+        if response.get('load_duration'):
+            print(f"Model load time: {response['load_duration'] / 1_000_000_000:.2f}s")
+
         if 'eval_duration' in response:
             duration_sec = response['eval_duration'] / 1_000_000_000
             print(f"Generation time: {duration_sec:.2f}s")
@@ -196,16 +660,55 @@ Answer:"""
         print("─" * 70)
 
     def save_index(self, filepath: str):
-        """Save the vector store index"""
+        """Save the vector store index and its file manifest"""
         self.vector_store.save(filepath)
+        self.manifest.save(self._manifest_path(filepath))
 
-    def load_index(self, filepath: str):
-        """Load a vector store index"""
-        self.vector_store.load(filepath)
+    @staticmethod
+    def _manifest_path(index_path: str) -> str:
+        """The manifest is stored next to the index file"""
+        return index_path + '.manifest.json'
+
+    def load_index(self, filepath: str, lazy: bool = False):
+        """
+        Load a vector store index
+
+        Args:
+            filepath: Index file written by save_index()
+            lazy: Only open the index now; it is read on the first query
+        """
+        self.cancel_migration()
+        store = VectorStore(
+            embedding_model=self.embedding_model,
+            ollama_host=self.ollama_host,
+            dtype=self.vector_dtype,
+            text_compression=self.text_compression,
+            embedder=self.vector_store.embedder
+        )
+        store.load(filepath, lazy=lazy)
+
+        if store.embedding_model != self.embedding_model:
+            print(f"⚠️  Index was built with '{store.embedding_model}', "
+                  f"queries will use it instead of '{self.embedding_model}'")
+
+        manifest = FileManifest()
+        manifest_path = self._manifest_path(filepath)
+        if os.path.exists(manifest_path):
+            manifest.load(manifest_path)
+        else:
+            print("⚠️  No file manifest next to this index; "
+                  "indexing a directory will re-add its files")
+
+        with self._index_lock:
+            self._swap_vector_store(store)
+            self.manifest = manifest
 
     def clear_index(self):
         """Clear all indexed documents"""
-        self.vector_store.clear()
+        self.cancel_migration()
+        with self._index_lock:
+            self.vector_store.clear()
+            self.manifest.clear()
 
     def get_stats(self) -> Dict:
         """Get RAG engine statistics"""
@@ -213,10 +716,35 @@ Answer:"""
         return {
             'total_queries': self.total_queries,
             'total_tokens_generated': self.total_tokens,
+            'answer_cache': self.answer_cache.stats() if self.answer_cache else None,
+            'model_load': {
+                'total_seconds': self.total_load_time,
+                'avg_seconds': self.total_load_time / self.timed_queries if self.timed_queries else None,
+                'max_seconds': self.max_load_time,
+                'cold_loads': self.cold_loads
+            },
+            'warmer': self.warmer.stats() if self.warmer else None,
+            'latency': self.metrics.percentiles(),
+            'avg_time_to_first_token': (
+                self.total_time_to_first_token / self.timed_queries if self.timed_queries else None
+            ),
             'num_indexed_documents': vs_stats['num_documents'],
+            'num_indexed_files': len(self.manifest),
             'embedding_model': vs_stats['embedding_model'],
+            'vector_dtype': vs_stats['dtype'],
+            'embedding_memory_bytes': vs_stats['embedding_bytes'],
+            'chunk_memory_bytes': vs_stats['chunk_bytes'],
+            'text_compression': vs_stats['text_compression'],
             'llm_model': self.llm_model,
-            'top_k': self.top_k
+            'top_k': self.top_k,
+            'compression': self.compressor.stats() if self.compressor else None,
+            'adaptive_k': {
+                'min_k': self.min_k,
+                'score_gap': self.score_gap,
+                'min_score': self.min_score
+            } if self.score_gap or self.min_score else None,
+            'migration': self.migration.status() if self.migration else None,
+            'collections': self.collections.stats() if self.collections is not None else None
         }
 
     def print_stats(self):
@@ -227,9 +755,150 @@ Answer:"""
         print("📈 RAG Engine Statistics")
         print("=" * 70)
         print(f"Indexed documents: {stats['num_indexed_documents']}")
+        print(f"Indexed files: {stats['num_indexed_files']}")
         print(f"Total queries: {stats['total_queries']}")
         print(f"Total tokens generated: {stats['total_tokens_generated']}")
+        if stats['avg_time_to_first_token'] is not None:
+            print(f"Avg time to first token: {stats['avg_time_to_first_token']:.2f}s")
+        load = stats['model_load']
+        if load['avg_seconds'] is not None:
+            print(f"Model load time: avg {load['avg_seconds']:.2f}s, max {load['max_seconds']:.2f}s, "
+                  f"{load['cold_loads']} cold loads")
+        warmer = stats['warmer']
+        if warmer:
+            state = f"every {warmer['interval']:.0f}s" if warmer['running'] else 'off'
+            print(f"Keep-alive pings: {state}, keep_alive {warmer['keep_alive']}, "
+                  f"{warmer['pings']} pings, {warmer['failures']} failures")
+        cache = stats['answer_cache']
+        if cache:
+            print(f"Answer cache: {cache['entries']} answers, hit rate {cache['hit_rate']:.0%} "
+                  f"({cache['hits']}/{cache['hits'] + cache['misses']})")
         print(f"LLM model: {stats['llm_model']}")
         print(f"Embedding model: {stats['embedding_model']}")
-        print(f"Top-K retrieval: {stats['top_k']}")
+        print(f"Vector storage: {stats['vector_dtype']} "
+              f"({stats['embedding_memory_bytes'] / 1024 / 1024:.2f} MB)")
+        per_chunk = stats['chunk_memory_bytes'] / max(stats['num_indexed_documents'], 1)
+        print(f"Chunk storage: {stats['chunk_memory_bytes'] / 1024 / 1024:.2f} MB "
+              f"({per_chunk:.0f} bytes/chunk, compression: {stats['text_compression']})")
+        adaptive = stats['adaptive_k']
+        if adaptive:
+            print(f"Top-K retrieval: {adaptive['min_k']}-{stats['top_k']} adaptive "
+                  f"(score gap {adaptive['score_gap']:.0%}, min score {adaptive['min_score']:.2f})")
+        else:
+            print(f"Top-K retrieval: {stats['top_k']}")
+        compression = stats['compression']
+        if compression and compression['tokens_in']:
+            print(f"Context compression: budget {compression['token_budget']} tokens, kept "
+                  f"{compression['token_ratio']:.0%} of {compression['tokens_in']} tokens "
+                  f"({compression['sentences_kept']}/{compression['sentences_in']} sentences)")
+
+        collections = stats['collections']
+        if collections:
+            print(f"Collections: {len(collections['collections'])} known, {collections['loaded']} loaded, "
+                  f"{collections['loads']} loads, {collections['evictions']} evictions")
+
+        migration = stats['migration']
+        if migration:
+            print(f"Migration: {migration['old_model']} → {migration['new_model']} "
+                  f"[{migration['state']}] {migration['processed']}/{migration['total']}")
+
+        if stats['latency']:
+            print("─" * 70)
+            print(f"{'Stage latency (ms)':<22}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}")
+            for stage, summary in stats['latency'].items():
+                print(f"{stage:<22}{summary['count']:>8}{summary['p50'] * 1000:>10.1f}"
+                      f"{summary['p95'] * 1000:>10.1f}{summary['p99'] * 1000:>10.1f}")
         print("=" * 70 + "\n")
+
+
+class StreamingAnswer:
+    """
+    Answer being generated by RAGEngine.query_stream
+
+    Iterating yields answer text pieces as Ollama produces them. The
+    retrieved context is available immediately; the full answer, the final
+    response (eval counts and durations) and the time to first token are
+    filled in when the stream ends. A stream can be iterated once.
+
+    An answer reused from the answer cache is yielded in one piece and
+    `cached` is True.
+    """
+
+    def __init__(
+        self,
+        engine: RAGEngine,
+        prompt: str,
+        context: List[Tuple[str, float, Dict]],
+        show_stats: bool,
+        cache_key: Tuple = None,
+        cached: Dict = None
+    ):
+        self.engine = engine
+        self.prompt = prompt
+        self.context = context
+        self.show_stats = show_stats
+        self.cache_key = cache_key
+
+        self.cached = cached is not None
+        self.answer = cached['answer'] if cached else None
+        self.response_data = cached['response_data'] if cached else None
+        self.time_to_first_token = None
+        self.error = None
+        self.trace = None
+        self.query_start = time.perf_counter()
+        self._started = False
+
+    def __iter__(self):
+        if self._started:
+            raise RuntimeError("StreamingAnswer can only be iterated once")
+        self._started = True
+
+        if self.cached:
+            self.engine.metrics.observe('query', time.perf_counter() - self.query_start, self.trace)
+            yield self.answer
+            return
+
+        engine = self.engine
+        pieces = []
+        start = time.perf_counter()
+        try:
+            for chunk in engine.client.chat(
+                model=engine.llm_model,
+                messages=[{'role': 'user', 'content': self.prompt}],
+                stream=True,
+                keep_alive=engine.keep_alive
+            ):
+                token = chunk['message']['content']
+                if token:
+                    if self.time_to_first_token is None:
+                        self.time_to_first_token = time.perf_counter() - start
+                    pieces.append(token)
+                    yield token
+                if chunk.get('done'):
+                    self.response_data = dict(chunk)
+        except Exception as e:
+            self.error = e
+            print(f"\n✗ Error generating response: {e}")
+            return
+
+        self.answer = ''.join(pieces)
+        if self.time_to_first_token is None:
+            self.time_to_first_token = time.perf_counter() - start
+        response = self.response_data or {}
+        response['message'] = {'role': 'assistant', 'content': self.answer}
+        self.response_data = response
+
+        engine.record_response(response, self.time_to_first_token, time.perf_counter() - start, self.trace)
+        engine.cache_answer(self.cache_key, self.answer, response)
+        engine.metrics.observe('query', time.perf_counter() - self.query_start, self.trace)
+        if self.show_stats:
+            engine.print_response_stats(response, len(self.context), self.time_to_first_token)
+
+    def result(self) -> Dict:
+        """Dict with 'answer', 'context', 'response_data', 'cached' like RAGEngine.query"""
+        return {
+            'answer': self.answer,
+            'context': self.context,
+            'response_data': self.response_data,
+            'cached': self.cached
+        }
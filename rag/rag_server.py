@@ -0,0 +1,645 @@
+#!/usr/bin/env python3
+"""
+Asyncio HTTP service for the RAG engine
+
+Serves queries to other applications using only the standard library and
+the ollama client. Query embeddings of concurrent requests are collected
+for a few milliseconds and embedded and retrieved as one batch, and the
+number of generations in flight is capped: requests beyond the cap wait in
+a bounded queue, and requests beyond the queue get 503 right away.
+
+Endpoints:
+    GET  /health         liveness check
+    GET  /stats          engine and server statistics
+    GET  /metrics        stage latency histograms in Prometheus text format
+    POST /query          {"question": ...} -> answer, context and statistics
+    POST /query/stream   {"question": ...} -> NDJSON lines: context first,
+                         then {"token": ...} as generated, then final stats
+                         Both take an optional "collection": a name, a list
+                         of names or "*" to answer from named collections
+    POST /index          {"directory": ..., "pattern": ...} or
+                         {"documents": [...], "metadata": [...]}
+                         Directories are only accepted with --index-root,
+                         relative to it and never outside it
+
+The service has no authentication and listens on 127.0.0.1 by default;
+bind another interface only behind something that controls access.
+
+Usage:
+    python rag_server.py [--host 127.0.0.1] [--port 8000] [--index my_index.pkl] [--collections dir]
+                         [--index-root ./docs]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from http import HTTPStatus
+from typing import Dict, List, Tuple
+
+# Largest request body accepted
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+
+class HTTPError(Exception):
+    """Error answered with an HTTP status and a JSON message"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batch query retrieval across concurrent requests
+
+    The first waiting query opens a window of `window` seconds; every query
+    arriving before it closes (up to max_batch) is embedded with one request
+    and scored in one pass by RAGEngine.retrieve_batch. Queries arriving
+    while a batch is being retrieved form the next batch.
+    """
+
+    def __init__(self, engine, window: float = 0.005, max_batch: int = 64):
+        """
+        Initialize batcher
+
+        Args:
+            engine: RAGEngine to retrieve from
+            window: Seconds to wait for more queries after the first
+            max_batch: Most queries retrieved together
+        """
+        self.engine = engine
+        self.window = window
+        self.max_batch = max_batch
+
+        self.batches = 0
+        self.queries = 0
+        self.largest_batch = 0
+
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        """Start collecting batches on the running event loop"""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def retrieve(self, question: str) -> Tuple[List[Tuple[str, float, Dict]], Tuple]:
+        """(context, answer cache key) for one question, retrieved in a batch"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((question, future))
+        return await future
+
+    async def _collect(self) -> list:
+        """Wait for a query, then gather more until the window closes"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            questions = [question for question, _ in batch]
+            try:
+                results = await loop.run_in_executor(None, self.engine.retrieve_batch_with_keys, questions)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.queries += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> Dict:
+        return {
+            'batches': self.batches,
+            'queries': self.queries,
+            'avg_batch_size': self.queries / self.batches if self.batches else 0.0,
+            'largest_batch': self.largest_batch,
+            'window_ms': self.window * 1000
+        }
+
+
+class RAGServer:
+    """HTTP front end for a RAGEngine on asyncio streams"""
+
+    def __init__(
+        self,
+        engine,
+        host='127.0.0.1',
+        port=8000,
+        max_concurrent=4,
+        max_queue=32,
+        batch_window_ms=5.0,
+        max_batch=64,
+        index_root=None
+    ):
+        """
+        Initialize server
+
+        Args:
+            engine: RAGEngine serving the queries
+            host: Interface to listen on
+            port: TCP port
+            max_concurrent: Generations running at once
+            max_queue: Requests allowed to wait for a generation slot;
+                further requests are rejected with 503
+            batch_window_ms: Milliseconds to collect query embeddings into a batch
+            max_batch: Most query embeddings per batch
+            index_root: Directory POST /index may index below (None = no
+                directory indexing, documents only)
+        """
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.index_root = os.path.realpath(index_root) if index_root else None
+        self.batcher = EmbeddingBatcher(engine, batch_window_ms / 1000, max_batch)
+
+        self.requests = 0
+        self.rejected = 0
+        self.errors = 0
+        self.active = 0  # Admitted query and index requests, running or waiting
+
+        self._slots = None
+        self._client = None
+        self._server = None
+        self._index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='rag-index')
+        self._routes = {
+            ('GET', '/health'): self._health,
+            ('GET', '/stats'): self._stats,
+            ('GET', '/metrics'): self._metrics,
+            ('POST', '/query'): self._query,
+            ('POST', '/query/stream'): self._query_stream,
+            ('POST', '/index'): self._index,
+        }
+
+    async def start(self):
+        """Start listening; the returned server is already accepting connections"""
+        # Imported here, not at module level: see ollama_client.LazyClient
+        from ollama import AsyncClient
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        self._client = AsyncClient(host=self.engine.ollama_host)
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+        self._index_executor.shutdown(wait=False)
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"✓ Serving RAG on http://{self.host}:{self.port} "
+              f"(max {self.max_concurrent} generations, queue {self.max_queue})")
+        async with self._server:
+            await self._server.serve_forever()
+
+    # HTTP plumbing
+
+    async def _read_request(self, reader) -> Tuple[str, str, Dict[str, str], bytes]:
+        """(method, path, headers, body) of the next request, or None at end of stream"""
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', '0') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"Request body larger than {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), target.split('?', 1)[0], headers, body
+
+    @staticmethod
+    def _head(status: int, content_type: str, extra: Dict[str, str]) -> bytes:
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}", f"Content-Type: {content_type}"]
+        lines += [f"{name}: {value}" for name, value in extra.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+
+    async def _send_json(self, writer, status: int, payload, keep_alive: bool):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        writer.write(self._head(status, 'application/json', {
+            'Content-Length': str(len(body)),
+            'Connection': 'keep-alive' if keep_alive else 'close'
+        }) + body)
+        await writer.drain()
+
+    async def _send_text(self, writer, status: int, text: str, keep_alive: bool):
+        body = text.encode('utf-8')
+        writer.write(self._head(status, 'text/plain; version=0.0.4; charset=utf-8', {
+            'Content-Length': str(len(body)),
+            'Connection': 'keep-alive' if keep_alive else 'close'
+        }) + body)
+        await writer.drain()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await self._send_json(writer, e.status, {'error': e.message}, False)
+                    break
+                if request is None:
+                    break
+
+                method, path, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self.requests += 1
+
+                handler = self._routes.get((method, path))
+                # Error responses are sent here; result None skips the reply
+                # below but still closes the connection without keep-alive
+                try:
+                    if handler is None:
+                        known = any(route_path == path for _, route_path in self._routes)
+                        raise HTTPError(405 if known else 404, f"No route for {method} {path}")
+                    payload = json.loads(body) if body else {}
+                    result = await handler(payload, writer)
+                except HTTPError as e:
+                    if e.status == 503:
+                        self.rejected += 1
+                    await self._send_json(writer, e.status, {'error': e.message}, keep_alive)
+                    result = None
+                except json.JSONDecodeError as e:
+                    await self._send_json(writer, 400, {'error': f"Invalid JSON: {e}"}, keep_alive)
+                    result = None
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception as e:
+                    self.errors += 1
+                    await self._send_json(writer, 500, {'error': str(e)}, keep_alive)
+                    result = None
+
+                # Streaming handlers write their own response and return None
+                if isinstance(result, str):
+                    await self._send_text(writer, 200, result, keep_alive)
+                elif result is not None:
+                    await self._send_json(writer, 200, result, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    # Query pipeline
+
+    @asynccontextmanager
+    async def _admit(self):
+        """Admit a query or index request, or reject it when running and waiting slots are full"""
+        if self.active >= self.max_concurrent + self.max_queue:
+            raise HTTPError(503, "Server busy, retry later")
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+
+    @staticmethod
+    def _question(payload: Dict) -> str:
+        question = payload.get('question') if isinstance(payload, dict) else None
+        if not isinstance(question, str) or not question.strip():
+            raise HTTPError(400, "Body must be a JSON object with a non-empty 'question'")
+        return question
+
+    def _collection(self, payload: Dict):
+        collection = payload.get('collection')
+        if collection is None:
+            return None
+        if self.engine.collections is None:
+            raise HTTPError(400, "No collections configured on this server")
+        if not (isinstance(collection, str) or
+                (isinstance(collection, list) and collection and all(isinstance(c, str) for c in collection))):
+            raise HTTPError(400, "'collection' must be a name, a list of names or \"*\"")
+        known = self.engine.collections.names()
+        unknown = [c for c in ([collection] if isinstance(collection, str) else collection)
+                   if c != '*' and c not in known]
+        if unknown:
+            raise HTTPError(404, f"Unknown collection(s): {', '.join(unknown)}")
+        return collection
+
+    async def _prepare(self, question: str, collection=None):
+        """(context, prompt, cache key, cached result) for a question"""
+        engine = self.engine
+        engine.total_queries += 1
+        engine.last_query_at = time.time()
+
+        if collection is None:
+            context, cache_key = await self.batcher.retrieve(question)
+        else:
+            # Collection searches span several indexes and skip the batcher
+            context, ids, embedding, version = await asyncio.get_running_loop().run_in_executor(
+                None, engine.retrieve_detailed, question, None, collection
+            )
+            use_cache = engine.answer_cache is not None and embedding is not None
+            cache_key = (embedding, ids, version) if use_cache else None
+        with engine.metrics.span('context'):
+            context = engine.context_builder.build(context)
+        if engine.compressor is not None:
+            # Sentence embeddings may need a request to Ollama
+            embedding = cache_key[0] if cache_key is not None and collection is None else None
+            context = await asyncio.get_running_loop().run_in_executor(
+                None, engine.compress_context, question, context, embedding
+            )
+        cached = engine.cached_answer(cache_key, False)
+        prompt = None
+        if cached is None:
+            with engine.metrics.span('prompt'):
+                prompt = engine.create_rag_prompt(question, context)
+        return context, prompt, cache_key, cached
+
+    async def _generate(self, prompt: str, cache_key, on_token=None) -> Tuple[str, Dict, float]:
+        """Generate an answer within a generation slot; (answer, final response, time to first token)"""
+        engine = self.engine
+        async with self._slots:
+            start = time.perf_counter()
+            time_to_first_token = None
+            pieces = []
+            final = {}
+            async for chunk in await self._client.chat(
+                model=engine.llm_model,
+                messages=[{'role': 'user', 'content': prompt}],
+                stream=True,
+                keep_alive=engine.keep_alive
+            ):
+                token = chunk['message']['content']
+                if token:
+                    if time_to_first_token is None:
+                        time_to_first_token = time.perf_counter() - start
+                    pieces.append(token)
+                    if on_token is not None:
+                        await on_token(token)
+                if chunk.get('done'):
+                    final = dict(chunk)
+
+        answer = ''.join(pieces)
+        if time_to_first_token is None:
+            time_to_first_token = time.perf_counter() - start
+        final['message'] = {'role': 'assistant', 'content': answer}
+        engine.record_response(final, time_to_first_token, time.perf_counter() - start)
+        engine.cache_answer(cache_key, answer, final)
+        return answer, final, time_to_first_token
+
+    @staticmethod
+    def _context_json(context: List[Tuple[str, float, Dict]]) -> List[Dict]:
+        return [{'text': doc, 'score': score, 'metadata': metadata} for doc, score, metadata in context]
+
+    @staticmethod
+    def _response_stats(response: Dict, time_to_first_token: float = None) -> Dict:
+        stats = {
+            'prompt_tokens': response.get('prompt_eval_count'),
+            'response_tokens': response.get('eval_count'),
+            'generation_sec': (response.get('eval_duration') or 0) / 1_000_000_000,
+            'load_sec': (response.get('load_duration') or 0) / 1_000_000_000
+        }
+        if time_to_first_token is not None:
+            stats['time_to_first_token_sec'] = time_to_first_token
+        return stats
+
+    # Handlers
+
+    async def _health(self, payload, writer):
+        # Counting documents finishes a lazy index load: keep it off the loop
+        documents = await asyncio.get_running_loop().run_in_executor(None, len, self.engine.vector_store)
+        return {'status': 'ok', 'documents': documents}
+
+    async def _stats(self, payload, writer):
+        engine_stats = await asyncio.get_running_loop().run_in_executor(None, self.engine.get_stats)
+        return {'engine': engine_stats, 'server': self.stats()}
+
+    async def _metrics(self, payload, writer):
+        return self.engine.metrics.prometheus()
+
+    async def _query(self, payload, writer):
+        question = self._question(payload)
+        collection = self._collection(payload)
+        async with self._admit():
+            context, prompt, cache_key, cached = await self._prepare(question, collection)
+            if cached is not None:
+                return {'answer': cached['answer'], 'context': self._context_json(context), 'cached': True,
+                        'stats': self._response_stats(cached['response_data'])}
+
+            answer, response, time_to_first_token = await self._generate(prompt, cache_key)
+            return {'answer': answer, 'context': self._context_json(context), 'cached': False,
+                    'stats': self._response_stats(response, time_to_first_token)}
+
+    async def _query_stream(self, payload, writer):
+        question = self._question(payload)
+        collection = self._collection(payload)
+        async with self._admit():
+            context, prompt, cache_key, cached = await self._prepare(question, collection)
+
+            writer.write(self._head(200, 'application/x-ndjson', {
+                'Transfer-Encoding': 'chunked',
+                'Cache-Control': 'no-cache'
+            }))
+
+            async def send(line: Dict):
+                data = (json.dumps(line, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+                writer.write(f"{len(data):x}\r\n".encode('latin-1') + data + b"\r\n")
+                await writer.drain()
+
+            async def send_token(token: str):
+                await send({'token': token})
+
+            # Context goes out before generation starts
+            await send({'context': self._context_json(context), 'cached': cached is not None})
+            try:
+                if cached is not None:
+                    await send_token(cached['answer'])
+                    await send({'done': True, 'stats': self._response_stats(cached['response_data'])})
+                else:
+                    _, response, time_to_first_token = await self._generate(prompt, cache_key, send_token)
+                    await send({'done': True, 'stats': self._response_stats(response, time_to_first_token)})
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception as e:
+                # Headers are gone already; report the error in the stream
+                self.errors += 1
+                await send({'error': str(e)})
+
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        return None
+
+    async def _index(self, payload, writer):
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+
+        if 'directory' in payload:
+            directory = self._index_directory(payload['directory'])
+            pattern = payload.get('pattern', '*.txt')
+            if not isinstance(pattern, str) or os.path.isabs(pattern) or '..' in re.split(r'[/\\,\s]+', pattern):
+                raise HTTPError(400, "'pattern' must be relative glob pattern(s) without '..'")
+            job = (self.engine.index_from_directory, directory, pattern)
+        else:
+            documents = payload.get('documents')
+            if not isinstance(documents, list) or not all(isinstance(d, str) for d in documents):
+                raise HTTPError(400, "Body needs 'directory' or a list of 'documents'")
+            job = (self.engine.index_documents, documents, payload.get('metadata'))
+
+        # Index jobs count against admission and run one at a time on their
+        # own thread, so they never take the executor the batcher relies on
+        async with self._admit():
+            result = await asyncio.get_running_loop().run_in_executor(self._index_executor, *job)
+        return {'summary': result} if 'directory' in payload else {'ids': result}
+
+    def _index_directory(self, directory) -> str:
+        """Resolve a requested directory inside index_root, or reject it"""
+        if self.index_root is None:
+            raise HTTPError(403, "Directory indexing is disabled (start the server with --index-root)")
+        if not isinstance(directory, str):
+            raise HTTPError(400, "'directory' must be a string")
+        path = os.path.realpath(os.path.join(self.index_root, directory))
+        if os.path.commonpath([path, self.index_root]) != self.index_root:
+            raise HTTPError(403, f"Directory outside the index root: {directory}")
+        if not os.path.isdir(path):
+            raise HTTPError(400, f"Directory not found: {directory}")
+        return path
+
+    def stats(self) -> Dict:
+        """Request, admission and batching counters"""
+        return {
+            'requests': self.requests,
+            'rejected': self.rejected,
+            'errors': self.errors,
+            'active': self.active,
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+            'embedding_batches': self.batcher.stats()
+        }
+
+
+def main():
+    import config
+    from rag_engine import RAGEngine
+    from collection_store import CollectionStore
+    from model_warmer import parse_keep_alive
+
+    parser = argparse.ArgumentParser(description="Serve the RAG engine over HTTP")
+    parser.add_argument('--host', default=config.SERVER_HOST, help="Interface to listen on")
+    parser.add_argument('--port', type=int, default=config.SERVER_PORT, help="TCP port")
+    parser.add_argument('--index', help="Index file to load at start")
+    parser.add_argument('--index-root', default=config.SERVER_INDEX_ROOT,
+                        help="Directory POST /index may index below (default: directory indexing off)")
+    parser.add_argument('--collections', default=config.COLLECTIONS_DIR,
+                        help="Directory of named collection indexes")
+    parser.add_argument('--max-concurrent', type=int, default=config.SERVER_MAX_CONCURRENT,
+                        help="Generations running at once")
+    parser.add_argument('--max-queue', type=int, default=config.SERVER_MAX_QUEUE,
+                        help="Requests waiting for a generation slot before 503")
+    parser.add_argument('--batch-window-ms', type=float, default=config.SERVER_BATCH_WINDOW_MS,
+                        help="Milliseconds to collect query embeddings into one batch")
+    args = parser.parse_args()
+
+    keep_alive = parse_keep_alive(config.KEEP_ALIVE)
+    collections = CollectionStore(
+        args.collections,
+        embedding_model=config.EMBEDDING_MODEL,
+        ollama_host=config.OLLAMA_HOST,
+        dtype=config.VECTOR_DTYPE,
+        text_compression=config.TEXT_COMPRESSION,
+        keep_alive=keep_alive,
+        idle_seconds=config.COLLECTION_IDLE_SECONDS,
+        max_loaded=config.COLLECTION_MAX_LOADED
+    ) if args.collections else None
+
+    engine = RAGEngine(
+        llm_model=config.LLM_MODEL,
+        embedding_model=config.EMBEDDING_MODEL,
+        ollama_host=config.OLLAMA_HOST,
+        top_k=config.DEFAULT_TOP_K,
+        min_k=config.TOP_K_MIN,
+        score_gap=config.SCORE_GAP,
+        min_score=config.MIN_SCORE,
+        vector_dtype=config.VECTOR_DTYPE,
+        text_compression=config.TEXT_COMPRESSION,
+        answer_cache_size=config.ANSWER_CACHE_SIZE,
+        answer_cache_threshold=config.ANSWER_CACHE_THRESHOLD,
+        answer_cache_ttl=config.ANSWER_CACHE_TTL,
+        context_budget=config.CONTEXT_BUDGET,
+        compression_budget=config.COMPRESSION_BUDGET,
+        tokenizer=config.TOKENIZER or None,
+        keep_alive=keep_alive,
+        metrics=config.METRICS,
+        trace_path=config.TRACE_FILE or None,
+        collections=collections
+    )
+    if args.index:
+        if not os.path.exists(args.index):
+            print(f"✗ Index file not found: {args.index}")
+            return 1
+        engine.load_index(args.index)
+
+    if config.MODEL_WARMUP:
+        engine.warm_up(interval=config.WARMUP_PING_INTERVAL, idle_limit=config.WARMUP_IDLE_LIMIT)
+
+    server = RAGServer(
+        engine,
+        host=args.host,
+        port=args.port,
+        max_concurrent=args.max_concurrent,
+        max_queue=args.max_queue,
+        batch_window_ms=args.batch_window_ms,
+        index_root=args.index_root or None
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\nStopped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
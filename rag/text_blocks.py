@@ -0,0 +1,138 @@
+import threading
+import zlib
+from typing import Dict, List, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIONS = ('zlib', 'zstd')
+
+
+class TextBlocks:
+    """
+    Append-only byte stream stored as independently compressed blocks
+
+    The stream is cut into blocks of block_size uncompressed bytes, so the
+    block holding byte offset p is simply p // block_size and a range read
+    only decompresses the blocks it overlaps. The unfinished last block is
+    kept uncompressed until it fills up. A few recently decompressed blocks
+    are cached, since top-k results often share blocks.
+
+    Readers take the published (num_blocks, tail) state once per read, so
+    appends never disturb them.
+    """
+
+    def __init__(self, compression: str = 'zlib', block_size: int = 1 << 14, level: int = None, cache_blocks: int = 16):
+        """
+        Initialize block store
+
+        Args:
+            compression: 'zlib' or 'zstd' (needs the zstandard package)
+            block_size: Uncompressed bytes per block
+            level: Compression level (None = codec default)
+            cache_blocks: Decompressed blocks kept for repeated reads
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported text compression '{compression}', expected one of {COMPRESSIONS}")
+        if compression == 'zstd' and zstandard is None:
+            raise ValueError("zstd text compression requires the zstandard package (pip install zstandard)")
+
+        self.compression = compression
+        self.block_size = block_size
+        self.level = level
+        self.cache_blocks = cache_blocks
+
+        if compression == 'zstd':
+            self._compressor = zstandard.ZstdCompressor(level=level if level is not None else 3)
+        else:
+            self._compressor = None
+
+        self._blocks: List[bytes] = []  # Compressed full blocks
+        self._state: Tuple[int, bytes] = (0, b'')  # (num_blocks, uncompressed tail)
+        self._cache: Dict[int, bytes] = {}
+        self._cache_lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Uncompressed bytes in the stream"""
+        num_blocks, tail = self._state
+        return num_blocks * self.block_size + len(tail)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held: compressed blocks plus the uncompressed tail"""
+        num_blocks, tail = self._state
+        return sum(len(block) for block in self._blocks[:num_blocks]) + len(tail)
+
+    def _compress(self, data: bytes) -> bytes:
+        if self._compressor is not None:
+            return self._compressor.compress(data)
+        return zlib.compress(data, self.level if self.level is not None else 6)
+
+    def _decompress(self, data: bytes) -> bytes:
+        if self.compression == 'zstd':
+            # Decompressor objects are not thread-safe; they are cheap to create
+            return zstandard.ZstdDecompressor().decompress(data)
+        return zlib.decompress(data)
+
+    def append(self, data: bytes) -> int:
+        """Append bytes (single writer) and return their start offset"""
+        num_blocks, tail = self._state
+        offset = num_blocks * self.block_size + len(tail)
+
+        buf = memoryview(tail + data)
+        pos = 0
+        while len(buf) - pos >= self.block_size:
+            self._blocks.append(self._compress(buf[pos:pos + self.block_size]))
+            pos += self.block_size
+
+        self._state = (len(self._blocks), bytes(buf[pos:]))
+        return offset
+
+    def _block(self, index: int) -> bytes:
+        """Decompressed block, cached"""
+        block = self._cache.get(index)
+        if block is None:
+            block = self._decompress(self._blocks[index])
+            with self._cache_lock:
+                if len(self._cache) >= self.cache_blocks:
+                    self._cache.pop(next(iter(self._cache)))
+                self._cache[index] = block
+        return block
+
+    def read(self, start: int, end: int) -> bytes:
+        """Bytes [start, end) of the stream, decompressing only the overlapped blocks"""
+        num_blocks, tail = self._state
+        sealed = num_blocks * self.block_size
+        size = self.block_size
+
+        parts = []
+        if start < sealed:
+            for index in range(start // size, min((end - 1) // size + 1, num_blocks)):
+                base = index * size
+                parts.append(self._block(index)[max(start - base, 0):end - base])
+        if end > sealed:
+            parts.append(tail[max(start - sealed, 0):end - sealed])
+
+        return parts[0] if len(parts) == 1 else b''.join(parts)
+
+    def to_dict(self) -> Dict:
+        """Plain data for pickling; blocks stay compressed"""
+        num_blocks, tail = self._state
+        return {
+            'compression': self.compression,
+            'block_size': self.block_size,
+            'level': self.level,
+            'blocks': self._blocks[:num_blocks],
+            'tail': tail
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TextBlocks':
+        """Rebuild a block store written by to_dict()"""
+        blocks = cls(data['compression'], data['block_size'], data['level'])
+        blocks._blocks = list(data['blocks'])
+        blocks._state = (len(blocks._blocks), data['tail'])
+        return blocks
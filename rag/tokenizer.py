@@ -0,0 +1,86 @@
+import os
+import re
+from functools import lru_cache
+from typing import List, Tuple
+
+try:
+    from tokenizers import Tokenizer as HFTokenizer
+except ImportError:
+    HFTokenizer = None
+
+# One token per CJK character, short pieces of words, digits in groups of
+# three and single punctuation marks. Close to BPE counts for English and
+# far closer than characters for Chinese / Japanese / Korean.
+_CJK = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff'
+_APPROX_TOKEN_RE = re.compile(
+    rf'[{_CJK}]'
+    rf'|[^\W\d_{_CJK}]{{1,4}}'
+    r'|\d{1,3}'
+    r'|[^\w\s]'
+)
+
+
+class ApproxTokenizer:
+    """Dependency-free tokenizer approximating subword token counts"""
+
+    name = 'approx'
+
+    def offsets(self, text: str) -> Tuple[List[int], List[int]]:
+        """Character (starts, ends) of every token in text"""
+        starts, ends = [], []
+        for m in _APPROX_TOKEN_RE.finditer(text):
+            starts.append(m.start())
+            ends.append(m.end())
+        return starts, ends
+
+    def count(self, text: str) -> int:
+        """Number of tokens in text"""
+        return sum(1 for _ in _APPROX_TOKEN_RE.finditer(text))
+
+
+class HuggingFaceTokenizer:
+    """Exact token offsets from a Hugging Face `tokenizers` tokenizer"""
+
+    def __init__(self, name: str):
+        if HFTokenizer is None:
+            raise ImportError("Install the tokenizers package to use model tokenizers (pip install tokenizers)")
+        self.name = name
+        if os.path.exists(name):
+            self._tokenizer = HFTokenizer.from_file(name)
+        else:
+            self._tokenizer = HFTokenizer.from_pretrained(name)
+
+    def offsets(self, text: str) -> Tuple[List[int], List[int]]:
+        """Character (starts, ends) of every token in text"""
+        encoding = self._tokenizer.encode(text, add_special_tokens=False)
+        starts = [start for start, _ in encoding.offsets]
+        ends = [end for _, end in encoding.offsets]
+        return starts, ends
+
+    def count(self, text: str) -> int:
+        """Number of tokens in text"""
+        return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+@lru_cache(maxsize=8)
+def get_tokenizer(name: str = None):
+    """
+    Get a cached tokenizer
+
+    Args:
+        name: Hugging Face repo id or path to a tokenizer.json for the target
+            model. Empty / None selects the built-in approximate tokenizer.
+    """
+    if not name or name == ApproxTokenizer.name:
+        return ApproxTokenizer()
+
+    try:
+        return HuggingFaceTokenizer(name)
+    except Exception as e:
+        print(f"⚠️  Could not load tokenizer '{name}' ({e}), using approximate token counts")
+        return ApproxTokenizer()
+
+
+def count_tokens(text: str, tokenizer: str = None) -> int:
+    """Count tokens in text with the named (cached) tokenizer"""
+    return get_tokenizer(tokenizer).count(text)
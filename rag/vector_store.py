@@ -1,120 +1,820 @@
 import numpy as np
 import pickle
 import os
-from typing import List, Tuple, Dict
-import ollama
+import threading
+from collections.abc import Sequence
+from typing import List, Tuple, Dict, NamedTuple, Optional
+from chunk_store import ChunkStore
+from embedding_provider import EmbeddingProvider, get_provider
+
+try:
+    from ml_dtypes import bfloat16
+except ImportError:
+    bfloat16 = None
+
+# Index file layout version written by save()
+INDEX_FORMAT_VERSION = 4
+
+STORAGE_DTYPES = ('float64', 'float32', 'float16', 'bfloat16')
+
+
+class _Snapshot(NamedTuple):
+    """Immutable view of the store published by writers and read by searches"""
+    generation: int
+    size: int
+    matrix: np.ndarray  # may have spare capacity rows beyond size
+    norms: np.ndarray
+    chunks: ChunkStore  # texts and metadata, may hold rows beyond size while a writer appends
+    ids: list  # stable chunk IDs, one per row
+
+
+class _PrefixView(Sequence):
+    """Read-only view of the first `size` items of a list that may keep growing"""
+
+    def __init__(self, items: list, size: int):
+        self._items = items
+        self._size = size
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._items[i] for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("index out of range")
+        return self._items[index]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+def _resolve_dtype(name: str) -> np.dtype:
+    """Map a storage dtype name to a numpy dtype"""
+    if name not in STORAGE_DTYPES:
+        raise ValueError(f"Unsupported storage dtype '{name}', expected one of {STORAGE_DTYPES}")
+    if name == 'bfloat16':
+        if bfloat16 is None:
+            raise ValueError("bfloat16 storage requires the ml_dtypes package (pip install ml_dtypes)")
+        return np.dtype(bfloat16)
+    return np.dtype(name)
+
+
+def _replace_file(path: str, write):
+    """Write a file through a temporary name and rename it over `path`"""
+    tmp = f"{path}.tmp{os.getpid()}"
+    try:
+        with open(tmp, 'wb') as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def adaptive_cutoff(scores: Sequence, min_k: int = 1, score_gap: float = 0.0, min_score: float = 0.0) -> int:
+    """
+    How many of a ranked result list to keep
+
+    Results are kept in order until one scores below min_score or falls
+    more than score_gap (a fraction, e.g. 0.3) below the result before it;
+    that result and everything after it are dropped. The first min_k
+    results are always kept. 0 disables either test.
+
+    Args:
+        scores: Similarity scores in descending order
+        min_k: Results kept regardless of score
+        score_gap: Largest relative drop between neighbours still kept
+        min_score: Lowest score kept
+
+    Returns:
+        Number of leading results to keep
+    """
+    keep = min(max(min_k, 0), len(scores))
+    while keep < len(scores):
+        score = scores[keep]
+        if min_score and score < min_score:
+            break
+        if score_gap and keep and score < scores[keep - 1] - score_gap * abs(scores[keep - 1]):
+            break
+        keep += 1
+    return keep
+
 
 class VectorStore:
-    """Simple vector store using cosine similarity for document retrieval"""
+    """
+    Simple vector store using cosine similarity for document retrieval
 
-    def __init__(self, embedding_model='nomic-embed-text', ollama_host='http://localhost:11434'):
-        self.embedding_model = embedding_model
+    Searches read an immutable snapshot (generation, row count and array
+    references) taken when they start, so they never lock or block on
+    writers. Writers serialize on a private lock, append past the published
+    row count, and then publish a new snapshot with a single assignment.
+    """
+
+    def __init__(
+        self,
+        embedding_model='nomic-embed-text',
+        ollama_host='http://localhost:11434',
+        dtype='float64',
+        block_size=4096,
+        text_compression=None,
+        keep_alive=None,
+        embedder: EmbeddingProvider = None,
+        scoring_copy=True
+    ):
+        """
+        Initialize vector store
+
+        Args:
+            embedding_model: Model to use for embeddings, see get_provider()
+            ollama_host: Ollama server host
+            dtype: Storage dtype for embeddings (float64, float32, float16, bfloat16).
+                Half-precision vectors are scored in float32, see scoring_copy.
+            block_size: Rows upcast per block when scoring without a copy
+            text_compression: None, 'zlib' or 'zstd' (needs zstandard) to keep
+                document text in compressed blocks, see ChunkStore
+            keep_alive: How long Ollama keeps the embedding model loaded
+                after a request (None = server default)
+            embedder: Embedding provider to use instead of the one named by
+                embedding_model
+            scoring_copy: Keep a float32 copy of half-precision embeddings
+                for scoring, extended as rows are added. Searches then cost
+                the same as float32 storage, at 4 more bytes per value in
+                memory; False upcasts every block on every search instead.
+        """
         self.ollama_host = ollama_host
-        self.client = ollama.Client(host=ollama_host)
-        self.documents = []  # List of document texts
-        self.embeddings = []  # List of embeddings
-        self.metadata = []  # List of metadata dicts
+        self.embedder = embedder or get_provider(embedding_model, ollama_host, keep_alive)
+        if keep_alive is not None:
+            self.embedder.keep_alive = keep_alive
+        self.dtype = dtype
+        self.block_size = block_size
+        self.scoring_copy = scoring_copy
+        self._np_dtype = _resolve_dtype(dtype)
+        self.text_compression = text_compression if text_compression not in ('', 'none') else None
+
+        # Writer-side state, only touched while holding _write_lock
+        self._write_lock = threading.Lock()
+        self._chunks = ChunkStore(text_compression)  # Columnar chunk texts and metadata
+        self._ids = []  # Stable chunk IDs, survive deletes of other rows
+        self._next_id = 0
+        self._matrix = None  # (capacity, dim) embedding matrix in storage dtype
+        self._norms = None  # Row norms, float32
+        self._size = 0
+        self._generation = 0
+
+        self._snapshot = _Snapshot(0, 0, None, None, self._chunks, self._ids)
+
+        # float32 copy of a half-precision matrix: (matrix, rows copied, copy)
+        self._scoring = None
+        self._scoring_lock = threading.Lock()
+
+        # Index file opened by load(lazy=True) but not read yet
+        self._pending = None
+        self._pending_lock = threading.Lock()
+
+        # (path, generation) of the index file last loaded or saved
+        self._file = None
+
+    @property
+    def embedding_model(self) -> str:
+        """Name of the embedding model, stored in index files"""
+        return self.embedder.model
+
+    @embedding_model.setter
+    def embedding_model(self, model: str):
+        # Loading an index built with another model switches provider
+        if model != self.embedder.model:
+            self.embedder = get_provider(model, self.ollama_host, self.embedder.keep_alive)
+
+    @property
+    def keep_alive(self):
+        return self.embedder.keep_alive
+
+    @keep_alive.setter
+    def keep_alive(self, value):
+        self.embedder.keep_alive = value
+
+    def _publish(self):
+        """Make everything written so far visible to new searches"""
+        if self._scoring is not None and self._scoring[0] is not self._matrix:
+            self._scoring = None  # Replaced matrix: drop the copy of the old one
+        self._generation += 1
+        self._snapshot = _Snapshot(
+            self._generation, self._size, self._matrix, self._norms,
+            self._chunks, self._ids
+        )
+
+    def snapshot(self) -> _Snapshot:
+        """Current immutable snapshot of the store"""
+        if self._pending is not None:
+            self._finish_load()
+        return self._snapshot
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped every time a writer publishes a change"""
+        return self.snapshot().generation
+
+    @property
+    def is_loaded(self) -> bool:
+        """False while an index opened with load(lazy=True) is still unread"""
+        return self._pending is None
+
+    @property
+    def file_state(self) -> Optional[Tuple[str, int]]:
+        """
+        (path, generation) of the index file last loaded or saved
+
+        Equals (path, self.generation) while the store has no changes that
+        are missing from that file; None if it never touched a file.
+        """
+        return self._file
+
+    @property
+    def documents(self) -> Sequence:
+        """Document texts visible in the current snapshot"""
+        snap = self.snapshot()
+        return _PrefixView(snap.chunks.texts, snap.size)
+
+    @property
+    def metadata(self) -> Sequence:
+        """Metadata dicts visible in the current snapshot"""
+        snap = self.snapshot()
+        return _PrefixView(snap.chunks.metadatas, snap.size)
+
+    @property
+    def ids(self) -> Sequence:
+        """Chunk IDs visible in the current snapshot"""
+        snap = self.snapshot()
+        return _PrefixView(snap.ids, snap.size)
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """Embedding matrix (num_documents, dim) in storage dtype"""
+        snap = self.snapshot()
+        if snap.matrix is None:
+            return np.empty((0, 0), dtype=self._np_dtype)
+        return snap.matrix[:snap.size]
+
+    @property
+    def embedding_dim(self) -> int:
+        matrix = self.snapshot().matrix
+        return matrix.shape[1] if matrix is not None else 0
+
+    def __len__(self):
+        return self.snapshot().size
 
     def _get_embedding(self, text: str) -> np.ndarray:
-        """Get embedding for a text using Ollama"""
+        """Get embedding for a text from the provider, None on failure"""
         try:
-            response = self.client.embeddings(
-                model=self.embedding_model,
-                prompt=text
-            )
-            return np.array(response['embedding'])
+            return self.embedder.embed_one(text)
         except Exception as e:
             print(f"Error getting embedding: {e}")
             return None
 
-    def add_documents(self, documents: List[str], metadata: List[Dict] = None):
-        """Add documents to the vector store"""
+    def _get_embeddings(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed texts with one batched request, falling back to one text at a time"""
+        try:
+            return list(self.embedder.embed(texts))
+        except Exception as e:
+            print(f"Batch embedding failed ({e}), embedding one at a time")
+            return [self._get_embedding(text) for text in texts]
+
+    def _reserve(self, rows: int, dim: int):
+        """Make room for `rows` more embeddings, growing capacity geometrically"""
+        if self._matrix is None:
+            capacity = max(rows, 64)
+            self._matrix = np.empty((capacity, dim), dtype=self._np_dtype)
+            self._norms = np.empty(capacity, dtype=np.float32)
+            return
+
+        needed = self._size + rows
+        if needed <= self._matrix.shape[0]:
+            return
+
+        capacity = max(needed, self._matrix.shape[0] * 2)
+        matrix = np.empty((capacity, dim), dtype=self._np_dtype)
+        matrix[:self._size] = self._matrix[:self._size]
+        norms = np.empty(capacity, dtype=np.float32)
+        norms[:self._size] = self._norms[:self._size]
+        self._matrix, self._norms = matrix, norms
+
+    def _append(self, doc: str, embedding: np.ndarray, meta: Dict, chunk_id: int = None, span: Tuple = None) -> int:
+        """
+        Append one already-embedded document, publish it and return its chunk ID
+
+        With span = (source, start, end, chunk_index) the document is stored
+        as a slice of source and meta is the source metadata, see
+        ChunkStore.add_span.
+        """
+        if self._pending is not None:
+            self._finish_load()
+        with self._write_lock:
+            if self._matrix is not None and len(embedding) != self._matrix.shape[1]:
+                raise ValueError(
+                    f"Embedding dimension {len(embedding)} does not match "
+                    f"index dimension {self._matrix.shape[1]}"
+                )
+            self._reserve(1, len(embedding))
+
+            # Rows and list entries past the published size are invisible to readers
+            row = np.asarray(embedding).astype(self._np_dtype)
+            self._matrix[self._size] = row
+            self._norms[self._size] = np.linalg.norm(row.astype(np.float32))
+            if chunk_id is None:
+                chunk_id = self._next_id
+            self._next_id = max(self._next_id, chunk_id + 1)
+
+            if span is None:
+                self._chunks.add_text(doc, meta)
+            else:
+                source, start, end, chunk_index = span
+                self._chunks.add_span(source, meta, start, end, chunk_index)
+            self._ids.append(chunk_id)
+            self._size += 1
+
+            self._publish()
+            return chunk_id
+
+    def add_documents(self, documents: List[str], metadata: List[Dict] = None) -> List[int]:
+        """
+        Add documents to the vector store
+
+        Returns:
+            Chunk ID of each document, None where embedding failed
+        """
         if metadata is None:
             metadata = [{}] * len(documents)
 
         print(f"Adding {len(documents)} documents to vector store...")
 
-        for i, (doc, meta) in enumerate(zip(documents, metadata)):
-            embedding = self._get_embedding(doc)
+        embeddings = self._get_embeddings(list(documents)) if documents else []
+        ids = []
+        for i, (doc, meta, embedding) in enumerate(zip(documents, metadata, embeddings)):
             if embedding is not None:
-                self.documents.append(doc)
-                self.embeddings.append(embedding)
-                self.metadata.append(meta)
+                ids.append(self._append(doc, embedding, meta))
+            else:
+                ids.append(None)
 
             if (i + 1) % 10 == 0:
                 print(f"  Processed {i + 1}/{len(documents)} documents")
 
         print(f"✓ Added {len(self.documents)} documents successfully")
+        return ids
+
+    def add_chunks(self, spans: List[Tuple[str, Dict, int, int, int]]) -> List[int]:
+        """
+        Add chunks given as spans of their source texts
+
+        Each span is (source_text, source_metadata, start, end, chunk_index)
+        and its chunk text is source_text[start:end].strip(). The source text
+        and metadata are stored once for all chunks of a source.
+
+        Returns:
+            Chunk ID of each chunk, None where embedding failed
+        """
+        print(f"Adding {len(spans)} documents to vector store...")
+
+        docs = [source[start:end].strip() for source, _, start, end, _ in spans]
+        embeddings = self._get_embeddings(docs) if docs else []
+        ids = []
+        for i, ((source, meta, start, end, chunk_index), doc, embedding) in enumerate(zip(spans, docs, embeddings)):
+            if embedding is not None:
+                ids.append(self._append(doc, embedding, meta, span=(source, start, end, chunk_index)))
+            else:
+                ids.append(None)
+
+            if (i + 1) % 10 == 0:
+                print(f"  Processed {i + 1}/{len(spans)} documents")
+
+        print(f"✓ Added {len(self.documents)} documents successfully")
+        return ids
+
+    def delete(self, ids: List[int]) -> int:
+        """
+        Remove chunks by ID
 
-    def _cosine_similarity(self, a: np.ndarray, b: np.ndarray) -> float:
-        """Calculate cosine similarity between two vectors"""
-        return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+        The surviving rows are compacted into new arrays and published as a
+        new snapshot; searches still holding the old one are unaffected.
 
-    def search(self, query: str, top_k: int = 3) -> List[Tuple[str, float, Dict]]:
+        Returns:
+            Number of chunks removed
+        """
+        remove = set(ids)
+        if not remove:
+            return 0
+        if self._pending is not None:
+            self._finish_load()
+
+        with self._write_lock:
+            keep = [i for i, chunk_id in enumerate(self._ids[:self._size]) if chunk_id not in remove]
+            removed = self._size - len(keep)
+            if not removed:
+                return 0
+
+            rows = np.array(keep, dtype=np.intp)
+            if keep:
+                self._matrix = self._matrix[rows]
+                self._norms = self._norms[rows]
+            else:
+                self._matrix, self._norms = None, None
+            self._chunks = self._chunks.take(rows)
+            self._ids = [self._ids[i] for i in keep]
+            self._size = len(keep)
+
+            self._publish()
+            return removed
+
+    def _score(self, query_embedding: np.ndarray, snap: _Snapshot = None) -> np.ndarray:
+        """Cosine similarity of the query against every row of a snapshot, block by block"""
+        return self._score_many(np.asarray(query_embedding)[None, :], snap)[0]
+
+    def _score_many(self, query_embeddings: np.ndarray, snap: _Snapshot = None) -> np.ndarray:
+        """(num_queries, size) cosine similarities of several queries, one pass over the matrix"""
+        if snap is None:
+            snap = self.snapshot()
+        size, matrix = snap.size, snap.matrix
+
+        # float64 storage is scored in float64, everything else in float32
+        compute = np.dtype(np.float64) if matrix.dtype == np.float64 else np.dtype(np.float32)
+        queries = np.asarray(query_embeddings, dtype=compute)
+        if matrix.dtype == compute:
+            scores = queries @ matrix[:size].T
+        elif self.scoring_copy:
+            scores = queries @ self._scoring_matrix(snap).T
+        else:
+            # Upcast one block at a time into a reused scratch buffer
+            scores = np.empty((len(queries), size), dtype=compute)
+            buf = np.empty((min(self.block_size, size), matrix.shape[1]), dtype=compute)
+            for start in range(0, size, self.block_size):
+                end = min(start + self.block_size, size)
+                block = buf[:end - start]
+                np.copyto(block, matrix[start:end])
+                scores[:, start:end] = queries @ block.T
+
+        denom = np.linalg.norm(queries, axis=1)[:, None] * snap.norms[:size].astype(compute)[None, :]
+        np.divide(scores, denom, out=scores, where=denom > 0)
+        scores[denom == 0] = 0.0
+        return scores
+
+    def _scoring_matrix(self, snap: _Snapshot) -> np.ndarray:
+        """
+        float32 copy of a half-precision snapshot matrix, first snap.size rows
+
+        Published rows of a matrix never change (deletes and growth build a
+        new matrix), so the copy is only extended by the rows appended since
+        the last search and rebuilt when the matrix is replaced.
+        """
+        scoring = self._scoring
+        if scoring is None or scoring[0] is not snap.matrix or scoring[1] < snap.size:
+            # One search converts; concurrent ones wait instead of repeating it
+            with self._scoring_lock:
+                scoring = self._scoring
+                if scoring is None or scoring[0] is not snap.matrix:
+                    scoring = (snap.matrix, 0, np.empty(snap.matrix.shape, dtype=np.float32))
+                matrix, rows, copy = scoring
+                if rows < snap.size:
+                    np.copyto(copy[rows:snap.size], matrix[rows:snap.size])
+                    scoring = (matrix, snap.size, copy)
+                self._scoring = scoring
+        return scoring[2][:snap.size]
+
+    def _check_model(self, embedding_model: str):
+        """Reject queries embedded with a different model than the index"""
+        if embedding_model is not None and embedding_model != self.embedding_model:
+            raise ValueError(
+                f"Query embedding model '{embedding_model}' does not match "
+                f"index embedding model '{self.embedding_model}'"
+            )
+
+    def embed_query(self, query: str, embedding_model: str = None) -> np.ndarray:
+        """
+        Embed a query for search_by_embedding()
+
+        If embedding_model is given it must match the model the index was
+        built with, otherwise a ValueError is raised.
+        """
+        self._check_model(embedding_model)
+        return self._get_embedding(query)
+
+    def search(self, query: str, top_k: int = 3, embedding_model: str = None) -> List[Tuple[str, float, Dict]]:
         """
         Search for most similar documents to query
         Returns list of (document, similarity_score, metadata) tuples
+
+        If embedding_model is given it must match the model the index was
+        built with, otherwise a ValueError is raised.
         """
-        if not self.documents:
+        self._check_model(embedding_model)
+
+        # Everything below reads this one snapshot, concurrent writes stay invisible
+        snap = self.snapshot()
+        if not snap.size:
             return []
 
         query_embedding = self._get_embedding(query)
         if query_embedding is None:
             return []
 
-        # Calculate similarities
-        similarities = []
-        for i, doc_embedding in enumerate(self.embeddings):
-            similarity = self._cosine_similarity(query_embedding, doc_embedding)
-            similarities.append((self.documents[i], similarity, self.metadata[i]))
+        results, _ = self.search_by_embedding(query_embedding, top_k, snap)
+        return results
+
+    def search_by_embedding(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int = 3,
+        snapshot: _Snapshot = None
+    ) -> Tuple[List[Tuple[str, float, Dict]], List[int]]:
+        """
+        Search with an already embedded query
+
+        Args:
+            query_embedding: Query vector from embed_query()
+            top_k: Number of results
+            snapshot: Snapshot to search (None = current)
 
-        # Sort by similarity (highest first)
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        Returns:
+            ([(document, similarity_score, metadata), ...], [chunk_id, ...])
+        """
+        snap = snapshot or self.snapshot()
+        if not snap.size or query_embedding is None:
+            return [], []
+
+        dim = snap.matrix.shape[1]
+        if len(query_embedding) != dim:
+            raise ValueError(
+                f"Query embedding dimension {len(query_embedding)} does not match "
+                f"index dimension {dim}"
+            )
 
-        return similarities[:top_k]
+        scores = self._score(query_embedding, snap)
+
+        # Partial sort: only the top_k rows need ordering
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+
+        results = [(snap.chunks.text(i), float(scores[i]), snap.chunks.metadata(i)) for i in top]
+        return results, [snap.ids[i] for i in top]
+
+    def embed_queries(self, queries: List[str], embedding_model: str = None) -> np.ndarray:
+        """
+        Embed several queries with one request for search_batch()
+
+        Raises on provider errors, unlike the single-query path, so batch
+        callers can tell which batch failed.
+
+        Returns:
+            (len(queries), dim) float32 matrix
+        """
+        self._check_model(embedding_model)
+        if not queries:
+            return np.empty((0, self.embedding_dim), dtype=np.float32)
+        return np.asarray(self.embedder.embed(list(queries)), dtype=np.float32)
+
+    def search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int = 3,
+        snapshot: _Snapshot = None
+    ) -> List[Tuple[List[Tuple[str, float, Dict]], List[int]]]:
+        """
+        Search for several embedded queries at once
+
+        All queries are scored in one pass over the embedding matrix and
+        their top-k rows selected together.
+
+        Returns:
+            One (results, chunk_ids) pair per query, as search_by_embedding()
+        """
+        snap = snapshot or self.snapshot()
+        queries = np.asarray(query_embeddings)
+        if not snap.size or not len(queries):
+            return [([], []) for _ in range(len(queries))]
+
+        dim = snap.matrix.shape[1]
+        if queries.shape[1] != dim:
+            raise ValueError(
+                f"Query embedding dimension {queries.shape[1]} does not match "
+                f"index dimension {dim}"
+            )
+
+        scores = self._score_many(queries, snap)
+
+        k = min(top_k, snap.size)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+
+        batch = []
+        for q, rows in enumerate(top):
+            results = [(snap.chunks.text(i), float(scores[q, i]), snap.chunks.metadata(i)) for i in rows]
+            batch.append((results, [snap.ids[i] for i in rows]))
+        return batch
+
+    @staticmethod
+    def _vectors_path(filepath: str) -> str:
+        """The embedding matrix is stored next to the index file"""
+        return filepath + '.vectors.npy'
 
     def save(self, filepath: str):
-        """Save vector store to disk"""
-        data = {
-            'documents': self.documents,
-            'embeddings': self.embeddings,
-            'metadata': self.metadata,
-            'embedding_model': self.embedding_model
+        """
+        Save vector store to disk
+
+        The embedding matrix goes to a raw .npy file next to the index so
+        load() can memory-map it. Both files are written to a temporary name
+        and renamed into place, so stores still mapping the old files keep
+        reading them.
+        """
+        snap = self.snapshot()
+        dim = snap.matrix.shape[1] if snap.matrix is not None else 0
+
+        header = {
+            'format_version': INDEX_FORMAT_VERSION,
+            'dtype': self.dtype,
+            'embedding_model': self.embedding_model,
+            'embedding_dim': dim,
+            'num_documents': snap.size,
+            'generation': snap.generation
+        }
+        body = {
+            'chunks': snap.chunks.to_dict(snap.size),
+            'norms': snap.norms[:snap.size].copy() if snap.norms is not None else np.empty(0, dtype=np.float32),
+            'ids': snap.ids[:snap.size],
+            'next_id': self._next_id
         }
 
-        with open(filepath, 'wb') as f:
-            pickle.dump(data, f)
+        vectors_path = self._vectors_path(filepath)
+        if snap.size:
+            matrix = snap.matrix[:snap.size]
+            if self.dtype == 'bfloat16':
+                # .npy has no bfloat16 type; store the raw 16-bit words
+                matrix = matrix.view(np.uint16)
+            _replace_file(vectors_path, lambda f: np.save(f, np.ascontiguousarray(matrix)))
+        elif os.path.exists(vectors_path):
+            os.remove(vectors_path)
+
+        def write_index(f):
+            # Header first, so opening the index reads only that
+            pickle.dump(header, f)
+            pickle.dump(body, f)
 
+        _replace_file(filepath, write_index)
+        self._file = (filepath, snap.generation)
         print(f"✓ Vector store saved to {filepath}")
 
-    def load(self, filepath: str):
-        """Load vector store from disk"""
+    def load(self, filepath: str, lazy: bool = False):
+        """
+        Load vector store from disk
+
+        Args:
+            filepath: Index file written by save()
+            lazy: Read only the header now; chunks are read and embeddings
+                memory-mapped on first use (search, len, stats, writes).
+                Files written before format version 4 always load eagerly.
+        """
         if not os.path.exists(filepath):
             raise FileNotFoundError(f"Vector store file not found: {filepath}")
 
         with open(filepath, 'rb') as f:
             data = pickle.load(f)
 
-        self.documents = data['documents']
-        self.embeddings = data['embeddings']
-        self.metadata = data['metadata']
-        self.embedding_model = data['embedding_model']
+        if data.get('format_version', 0) < 4:
+            self._load_legacy(data, filepath)
+            num_documents = self._size
+        else:
+            _resolve_dtype(data['dtype'])  # fail now on an unsupported dtype
+            with self._pending_lock:
+                self.dtype = data['dtype']
+                self.embedding_model = data['embedding_model']
+                self._pending = filepath
+            num_documents = data['num_documents']
+            if not lazy:
+                self._finish_load()
 
-        print(f"✓ Vector store loaded from {filepath}")
-        print(f"  Documents: {len(self.documents)}")
+        state = "opened (reads on first query)" if self._pending is not None else "loaded"
+        print(f"✓ Vector store {state} from {filepath}")
+        print(f"  Documents: {num_documents}")
         print(f"  Embedding model: {self.embedding_model}")
+        print(f"  Storage dtype: {self.dtype}")
+        if self._pending is None:
+            print(f"  Text compression: {self.text_compression or 'none'}")
+
+    def _finish_load(self):
+        """Read the chunks of a lazily opened index and map its embeddings"""
+        with self._pending_lock:
+            filepath = self._pending
+            if filepath is None:
+                return  # another thread finished it
+
+            with open(filepath, 'rb') as f:
+                header = pickle.load(f)
+                body = pickle.load(f)
+
+            np_dtype = _resolve_dtype(header['dtype'])
+            matrix = None
+            if header['num_documents']:
+                # Read-only mapping: pages are read as searches touch them,
+                # and the first append copies the matrix into memory
+                matrix = np.load(self._vectors_path(filepath), mmap_mode='r')
+                if matrix.dtype != np_dtype:
+                    matrix = matrix.view(np_dtype)
+                expected = (header['num_documents'], header['embedding_dim'])
+                if matrix.shape != expected:
+                    raise ValueError(
+                        f"Embedding file {self._vectors_path(filepath)} has shape {matrix.shape}, "
+                        f"index expects {expected}"
+                    )
+
+            self._install(
+                header['dtype'], np_dtype, header['embedding_model'],
+                ChunkStore.from_dict(body['chunks']), body['ids'], body['next_id'],
+                matrix, np.asarray(body['norms'], dtype=np.float32), filepath
+            )
+            self._pending = None
+
+    def _load_legacy(self, data: Dict, filepath: str):
+        """Load a single-pickle index file (format versions 1 to 3)"""
+        header = data.get('header')
+        if header is not None:
+            # The header dtype wins over the dtype this store was created with
+            dtype = header['dtype']
+            np_dtype = _resolve_dtype(dtype)
+            matrix = np.array(data['embeddings'], dtype=np_dtype)
+        elif data['embeddings']:
+            # Version 1 files hold a list of float64 arrays
+            dtype, np_dtype = self.dtype, self._np_dtype
+            matrix = np.vstack(data['embeddings']).astype(np_dtype)
+        else:
+            dtype, np_dtype = self.dtype, self._np_dtype
+            matrix = None
+
+        if 'chunks' in data:
+            chunks = ChunkStore.from_dict(data['chunks'])
+        else:
+            # Version 1 and 2 files hold parallel text / metadata lists
+            chunks = ChunkStore.from_lists(data['documents'], data['metadata'], self.text_compression)
+        # Files written before chunk IDs existed get positional IDs
+        ids = list(data.get('ids', range(len(chunks))))
+        norms = None
+        if matrix is not None and len(matrix):
+            norms = np.linalg.norm(matrix.astype(np.float32), axis=1).astype(np.float32)
+
+        with self._pending_lock:
+            self._pending = None
+        self._install(dtype, np_dtype, data['embedding_model'], chunks, ids,
+                      data.get('next_id', len(ids)), matrix, norms, filepath)
+
+    def _install(self, dtype: str, np_dtype: np.dtype, embedding_model: str, chunks: ChunkStore,
+                 ids: List[int], next_id: int, matrix: np.ndarray, norms: np.ndarray, filepath: str):
+        """Replace the whole store with loaded contents and publish it"""
+        with self._write_lock:
+            self.dtype, self._np_dtype = dtype, np_dtype
+            self.embedding_model = embedding_model
+            self._chunks = chunks
+            self.text_compression = chunks.compression
+            self._ids = list(ids)
+            self._next_id = next_id
+
+            if matrix is not None and len(matrix):
+                self._matrix, self._norms, self._size = matrix, norms, len(matrix)
+            else:
+                self._matrix, self._norms, self._size = None, None, 0
+
+            self._publish()
+            self._file = (filepath, self._generation)
 
     def clear(self):
         """Clear all documents from vector store"""
-        self.documents = []
-        self.embeddings = []
-        self.metadata = []
+        with self._pending_lock:
+            self._pending = None
+        with self._write_lock:
+            # Fresh containers: searches holding the old snapshot are unaffected
+            self._chunks = ChunkStore(self.text_compression)
+            self._ids = []
+            self._matrix, self._norms, self._size = None, None, 0
+            self._publish()
         print("✓ Vector store cleared")
 
     def stats(self):
         """Get statistics about the vector store"""
+        snap = self.snapshot()
+        scoring = self._scoring
         return {
-            'num_documents': len(self.documents),
+            'num_documents': snap.size,
             'embedding_model': self.embedding_model,
-            'embedding_dim': len(self.embeddings[0]) if self.embeddings else 0
-        }
\ No newline at end of file
+            'embedding_dim': snap.matrix.shape[1] if snap.matrix is not None else 0,
+            'dtype': self.dtype,
+            'embedding_bytes': snap.matrix[:snap.size].nbytes if snap.matrix is not None else 0,
+            'scoring_copy_bytes': scoring[2][:scoring[1]].nbytes if scoring else 0,
+            'chunk_bytes': snap.chunks.memory_bytes(),
+            'text_compression': snap.chunks.compression or 'none',
+            'num_sources': snap.chunks.num_sources,
+            'generation': snap.generation
+        }
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Filesystem watcher that keeps an index in sync with a directory
+
+Changes are detected with inotify when the inotify_simple package is
+available (Linux), otherwise by polling file stats. Bursts of changes are
+debounced and applied as one incremental index update on a live engine,
+while queries keep being served from the vector store snapshots.
+
+Usage:
+    python watcher.py <directory> [pattern] [--index my_index.pkl]
+"""
+
+import argparse
+import fnmatch
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Tuple
+from document_processor import DocumentProcessor
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+
+class _PollingSource:
+    """Detect changes by comparing (size, mtime) of matching files"""
+
+    name = 'polling'
+
+    def __init__(self, directory: str, pattern, interval: float):
+        self.directory = directory
+        self.pattern = pattern
+        self.interval = interval
+        self._state = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        state = {}
+        for path in DocumentProcessor.find_files(self.directory, self.pattern):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            state[str(path)] = (st.st_size, st.st_mtime_ns)
+        return state
+
+    def wait(self, timeout: float) -> List[Tuple[str, float]]:
+        """Block up to timeout, return (path, change_time) of changed files"""
+        time.sleep(min(self.interval, timeout))
+        now = time.time()
+        state = self._scan()
+
+        changes = []
+        for path, sig in state.items():
+            if self._state.get(path) != sig:
+                changes.append((path, sig[1] / 1e9))
+        for path in self._state.keys() - state.keys():
+            changes.append((path, now))
+
+        self._state = state
+        return changes
+
+    def close(self):
+        pass
+
+
+class _InotifySource:
+    """Detect changes with inotify watches on every directory in the tree"""
+
+    name = 'inotify'
+
+    def __init__(self, directory: str, pattern):
+        self.directory = directory
+        patterns = pattern
+        if isinstance(patterns, str):
+            patterns = patterns.replace(',', ' ').split()
+        # Match on file names; the periodic sync applies the full pattern
+        self._names = [os.path.basename(p) for p in patterns]
+        self._inotify = INotify()
+        self._mask = (inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO | inotify_flags.MOVED_FROM
+                      | inotify_flags.DELETE | inotify_flags.CREATE)
+        self._dirs = {}
+        for root, _, _ in os.walk(directory):
+            self._add(root)
+
+    def _add(self, path: str):
+        try:
+            self._dirs[self._inotify.add_watch(path, self._mask)] = path
+        except OSError:
+            pass
+
+    def wait(self, timeout: float) -> List[Tuple[str, float]]:
+        """Block up to timeout, return (path, change_time) of changed files"""
+        changes = []
+        for event in self._inotify.read(timeout=int(timeout * 1000)):
+            parent = self._dirs.get(event.wd)
+            if parent is None or not event.name:
+                continue
+            path = os.path.join(parent, event.name)
+
+            if event.mask & inotify_flags.ISDIR:
+                if event.mask & (inotify_flags.CREATE | inotify_flags.MOVED_TO):
+                    self._add(path)
+                    changes.append((path, time.time()))
+                continue
+
+            if any(fnmatch.fnmatch(event.name, name) for name in self._names):
+                try:
+                    changed_at = os.stat(path).st_mtime
+                except OSError:
+                    changed_at = time.time()
+                changes.append((path, changed_at))
+        return changes
+
+    def close(self):
+        self._inotify.close()
+
+
+class DirectoryWatcher:
+    """
+    Keep a RAGEngine index in sync with a directory
+
+    Each batch waits until no change has been seen for `debounce` seconds
+    (or `max_delay` seconds have passed since the first one), then runs one
+    incremental index_from_directory(). The lag from a file changing to it
+    being searchable is recorded for every batch.
+    """
+
+    def __init__(
+        self,
+        engine,
+        directory: str,
+        pattern='*.txt',
+        debounce: float = 1.0,
+        max_delay: float = 10.0,
+        poll_interval: float = 1.0,
+        index_kwargs: Dict = None,
+        on_update=None
+    ):
+        """
+        Initialize watcher
+
+        Args:
+            engine: RAGEngine to update
+            directory: Directory to watch
+            pattern: File pattern(s), as for index_from_directory
+            debounce: Quiet period that ends a batch of changes, seconds
+            max_delay: Longest a change waits before being applied, seconds
+            poll_interval: Stat scan interval when inotify is unavailable
+            index_kwargs: Extra arguments for index_from_directory
+            on_update: Optional callback(summary) after each applied batch
+        """
+        self.engine = engine
+        self.directory = directory
+        self.pattern = pattern
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.index_kwargs = index_kwargs or {}
+        self.on_update = on_update
+
+        self.updates = 0
+        self.files_changed = 0
+        self.lags = []  # Seconds from file change to searchable, per file
+        self.last_summary = None
+        self.last_error = None
+
+        self._source = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def backend(self) -> str:
+        return self._source.name if self._source else 'stopped'
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start watching in a background thread"""
+        if INotify is not None:
+            self._source = _InotifySource(self.directory, self.pattern)
+        else:
+            self._source = _PollingSource(self.directory, self.pattern, self.poll_interval)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='index-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._source is not None:
+            self._source.close()
+
+    def _collect_batch(self) -> List[Tuple[str, float]]:
+        """Wait for a change, then gather more until the burst settles"""
+        changes = []
+        while not changes:
+            if self._stop.is_set():
+                return []
+            changes = self._source.wait(self.poll_interval)
+
+        first_seen = time.monotonic()
+        quiet_since = first_seen
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if now - quiet_since >= self.debounce or now - first_seen >= self.max_delay:
+                break
+            more = self._source.wait(min(self.debounce, self.poll_interval))
+            if more:
+                changes.extend(more)
+                quiet_since = time.monotonic()
+
+        return changes
+
+    def _run(self):
+        while not self._stop.is_set():
+            changes = self._collect_batch()
+            if not changes:
+                continue
+
+            # The changed paths only time the batch; the sync itself rescans
+            # the tree on purpose. inotify filters on file names alone, so
+            # only find_files applies the full pattern ('**/', top-level
+            # '*.txt'); a created or moved-in directory arrives as one event
+            # for a whole subtree; and events lost to a queue overflow are
+            # picked up by the next rescan. The rescan lists the tree and
+            # stats each file; only files whose stat changed are hashed.
+            try:
+                summary = self.engine.index_from_directory(
+                    self.directory, self.pattern, **self.index_kwargs
+                )
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"✗ Watcher update failed: {e}")
+                continue
+
+            # Newest change time per file; the batch is searchable now
+            searchable_at = time.time()
+            latest = {}
+            for path, changed_at in changes:
+                latest[path] = max(changed_at, latest.get(path, 0.0))
+            lags = [max(0.0, searchable_at - t) for t in latest.values()]
+
+            self.updates += 1
+            self.files_changed += len(latest)
+            self.lags.extend(lags)
+            del self.lags[:-10000]  # keep a bounded window
+            summary['lag_sec'] = max(lags)
+            self.last_summary = summary
+
+            print(f"✓ Watcher applied {len(latest)} file change(s), "
+                  f"searchable after {max(lags):.2f}s")
+            if self.on_update:
+                self.on_update(summary)
+
+    def stats(self) -> Dict:
+        """Update counts and change-to-searchable lag statistics"""
+        lags = sorted(self.lags)
+
+        def pct(p):
+            return lags[min(len(lags) - 1, int(p * len(lags)))] if lags else 0.0
+
+        return {
+            'directory': self.directory,
+            'pattern': self.pattern,
+            'backend': self.backend,
+            'running': self.is_running,
+            'updates': self.updates,
+            'files_changed': self.files_changed,
+            'lag_last_sec': self.last_summary['lag_sec'] if self.last_summary else 0.0,
+            'lag_p50_sec': pct(0.50),
+            'lag_p95_sec': pct(0.95),
+            'lag_max_sec': lags[-1] if lags else 0.0,
+            'last_error': self.last_error
+        }
+
+
+def main():
+    import config
+    from model_warmer import parse_keep_alive
+    from rag_engine import RAGEngine
+
+    parser = argparse.ArgumentParser(description="Keep a RAG index in sync with a directory")
+    parser.add_argument('directory', help="Directory to watch")
+    parser.add_argument('pattern', nargs='?', default='*.txt', help="File pattern(s), e.g. '**/*.md, *.txt'")
+    parser.add_argument('--index', help="Index file to load at start and save after every update")
+    parser.add_argument('--debounce', type=float, default=config.WATCH_DEBOUNCE,
+                        help="Quiet period before applying changes (s)")
+    parser.add_argument('--max-delay', type=float, default=config.WATCH_MAX_DELAY,
+                        help="Longest a change may wait (s)")
+    parser.add_argument('--poll-interval', type=float, default=config.WATCH_POLL_INTERVAL,
+                        help="Polling interval without inotify (s)")
+    args = parser.parse_args()
+
+    # Same chunking and storage settings as the chatbot, so both can share an index
+    engine = RAGEngine(
+        llm_model=config.LLM_MODEL,
+        embedding_model=config.EMBEDDING_MODEL,
+        ollama_host=config.OLLAMA_HOST,
+        vector_dtype=config.VECTOR_DTYPE,
+        text_compression=config.TEXT_COMPRESSION,
+        keep_alive=parse_keep_alive(config.KEEP_ALIVE)
+    )
+    index_kwargs = {
+        'chunk_size': config.DEFAULT_CHUNK_SIZE,
+        'chunk_overlap': config.DEFAULT_CHUNK_OVERLAP,
+        'batch_size': config.DEFAULT_INDEX_BATCH_SIZE,
+        'chunk_unit': config.CHUNK_UNIT,
+        'tokenizer': config.TOKENIZER or None,
+        'chunk_strategy': config.CHUNK_STRATEGY,
+        'workers': config.INDEX_WORKERS or None
+    }
+    if args.index and os.path.exists(args.index):
+        engine.load_index(args.index)
+
+    # Initial sync so the index matches the directory before watching
+    engine.index_from_directory(args.directory, args.pattern, **index_kwargs)
+    if args.index:
+        engine.save_index(args.index)
+
+    watcher = DirectoryWatcher(
+        engine,
+        args.directory,
+        args.pattern,
+        debounce=args.debounce,
+        max_delay=args.max_delay,
+        poll_interval=args.poll_interval,
+        index_kwargs=index_kwargs,
+        on_update=(lambda _: engine.save_index(args.index)) if args.index else None
+    )
+    watcher.start()
+    print(f"👀 Watching {args.directory} ({watcher.backend}), Ctrl+C to stop")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+        stats = watcher.stats()
+        print(f"\nUpdates: {stats['updates']}, files changed: {stats['files_changed']}, "
+              f"lag p50 {stats['lag_p50_sec']:.2f}s / p95 {stats['lag_p95_sec']:.2f}s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())